@@ -4,11 +4,18 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import os
+import pathlib
+import sys
 from shutil import which
 import reframe as rfm
 import reframe.utility.sanity as sn
 import reframe.utility.udeps as udeps
 
+sys.path.append(str(pathlib.Path(__file__).parent.parent.parent.parent /
+                    'mixins'))
+
+from reference_overrides import ReferenceOverridesMixin  # noqa: E402
+
 # NOTE: do not run this check with --system (because of deps)
 ert_precisions = ['ERT_FP64']
 ert_repeat = 1
@@ -172,7 +179,7 @@ class RunErt_Base(rfm.RegressionTest):
 
 
 # {{{ class PlotErt_Base
-class PlotErt_Base(rfm.RunOnlyRegressionTest):
+class PlotErt_Base(rfm.RunOnlyRegressionTest, ReferenceOverridesMixin):
     descr = f'Empirical Roofline Toolkit (Base for plotting)'
     roofline_script1_fname = 'roofline.py'
     roofline_script1 = f'./Scripts/{roofline_script1_fname}'
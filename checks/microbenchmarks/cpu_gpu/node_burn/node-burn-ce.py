@@ -3,8 +3,11 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
-import collections
+import json
+import os
 import pathlib
+import re
+import statistics
 import sys
 
 import reframe as rfm
@@ -15,9 +18,36 @@ sys.path.append(str(pathlib.Path(__file__).parent.parent.parent.parent /
                     'mixins'))
 
 from container_engine import ContainerEngineMixin  # noqa: E402
+from reference_overrides import ReferenceOverridesMixin  # noqa: E402
 
 
-class NodeBurnCE(rfm.RunOnlyRegressionTest, ContainerEngineMixin):
+def _robust_zscores(values):
+    '''Scores of the values against their median, in scaled median absolute
+    deviations (at least 1% of the median)'''
+    median = statistics.median(values)
+    mad = statistics.median(abs(v - median) for v in values)
+    scale = max(1.4826 * mad, 0.01 * abs(median)) or 1.0
+    return median, [(v - median) / scale for v in values]
+
+
+def _parse_node_results(path, test_hw, unit):
+    '''Return the ``(node, device, value)`` rows of the node burn output,
+    read in a single pass'''
+    regex = re.compile(
+        rf'(nid\d+):({test_hw}\S*).*\s+(\d+\.\d+)\s+{re.escape(unit)},'
+    )
+    rows = []
+    with open(path) as fp:
+        for line in fp:
+            m = regex.search(line)
+            if m:
+                rows.append((m[1], m[2], float(m[3])))
+
+    return rows
+
+
+class NodeBurnCE(rfm.RunOnlyRegressionTest, ContainerEngineMixin,
+                 ReferenceOverridesMixin):
     '''The base class of the node burn test using the Container Engine.
 
        Every child class of `NodeBurnCE` can be made flexible on demand by
@@ -32,6 +62,19 @@ class NodeBurnCE(rfm.RunOnlyRegressionTest, ContainerEngineMixin):
     maintainers = ['VCUE', 'PA']
     nb_duration = variable(int, value=20)
     flexible = variable(bool, value=False)
+
+    #: Robust z-score (in scaled median absolute deviations from the fleet
+    #: median) below which a node or a device is an outlier to drain.
+    #:
+    #: :default: ``-3.5``
+    nb_outlier_zscore = variable(float, value=-3.5)
+
+    #: File with the per-node results and the nodes to drain
+    nb_results_file = variable(str, value='node_burn_results.json')
+
+    #: Unit of the node-burn results, set by the benchmark subclasses
+    nb_unit = variable(str)
+
     container_image = f'{image_repository}:{image_tag}'
     tags = {'production', 'maintenance', 'appscheckout'}
 
@@ -46,31 +89,94 @@ class NodeBurnCE(rfm.RunOnlyRegressionTest, ContainerEngineMixin):
     def num_tasks_assigned(self):
         return self.job.num_tasks
 
-    @sanity_function
-    def validate_test(self):
-        regex = rf'(nid\d+):{self.test_hw}.*\s+(\d+\.\d+)\s+\S+'
-
-        # Count the number of output performance values per node
-        nodes = sn.extractall(regex, self.stdout, 1, str)
-        node_counter = collections.Counter(nodes)
-        num_res = sn.count(nodes)
-
-        # Filter the nodes with not enough output occurrences
-        problematic_nodes = [
-            n for n, c in node_counter.items() if c != self.num_tasks_per_node
-        ]
+    @run_after('init')
+    def keep_node_results(self):
+        self.keep_files = self.keep_files + [self.nb_results_file]
+
+    @run_before('sanity')
+    def analyze_nodes(self):
+        '''Build the per-node table of the results and the list of the
+        nodes to drain.
+
+        A node is drained if it did not print a result for every task or if
+        its slowest device is an outlier of the fleet. The table and the
+        verdicts are written to :attr:`nb_results_file`.
+        '''
+        self.node_results = _parse_node_results(
+            os.path.join(self.stagedir, self.stdout.evaluate()),
+            self.test_hw, self.nb_unit
+        )
+        if self.node_results:
+            device_median, device_scores = _robust_zscores(
+                [value for _, _, value in self.node_results]
+            )
+        else:
+            device_median, device_scores = None, []
 
         # Add the nodes that might have not printed any output
-        nodeset = set(self.job.nodelist)
-        problematic_nodes += nodeset.difference(node_counter.keys())
+        nodes = {n: [] for n in self.job.nodelist or []}
+        for (node, device, value), score in zip(self.node_results,
+                                                device_scores):
+            nodes.setdefault(node, []).append(
+                {'device': device, 'value': value, 'score': score}
+            )
+
+        node_values = {n: min(d['value'] for d in devs)
+                       for n, devs in nodes.items() if devs}
+        if node_values:
+            node_median, node_scores = _robust_zscores(
+                list(node_values.values())
+            )
+            node_scores = dict(zip(node_values, node_scores))
+        else:
+            node_median, node_scores = None, {}
+
+        table = []
+        self.nodes_missing_results = []
+        self.nodes_to_drain = []
+        for node, devs in sorted(nodes.items()):
+            reasons = []
+            if len(devs) != self.num_tasks_per_node:
+                self.nodes_missing_results.append(node)
+                reasons.append(f'{len(devs)} results instead of '
+                               f'{self.num_tasks_per_node}')
+
+            score = node_scores.get(node)
+            if score is not None and score < self.nb_outlier_zscore:
+                reasons.append(f'outlier of the fleet (score {score:.2f})')
+
+            if reasons:
+                self.nodes_to_drain.append({'node': node,
+                                            'reasons': reasons})
+
+            table.append({'node': node, 'value': node_values.get(node),
+                          'score': score, 'devices': devs})
+
+        with open(os.path.join(self.stagedir, self.nb_results_file),
+                  'w') as fp:
+            json.dump({
+                'test': self.display_name,
+                'system': self.current_partition.fullname,
+                'jobid': self.job.jobid,
+                'unit': self.nb_unit,
+                'baseline': {'node_median': node_median,
+                             'device_median': device_median},
+                'outlier_zscore': self.nb_outlier_zscore,
+                'nodes_to_drain': self.nodes_to_drain,
+                'nodes': table
+            }, fp, indent=2)
 
+    @sanity_function
+    def validate_test(self):
         msg = (f'nodes with fewer than expected results: '
-               f'{",".join(problematic_nodes)!r}')
-        return sn.assert_eq(self.num_tasks_assigned, num_res, msg=msg)
+               f'{",".join(self.nodes_missing_results)!r}')
+        return sn.assert_eq(self.num_tasks_assigned,
+                            len(self.node_results), msg=msg)
 
 
 class NodeBurnGemmCE(NodeBurnCE):
     nb_matrix_size = variable(int, value=40000)
+    nb_unit = 'GFlops'
 
     @run_before('performance')
     def validate_perf(self):
@@ -85,11 +191,12 @@ class NodeBurnGemmCE(NodeBurnCE):
 
     @performance_function('GFlops')
     def nb_gflops(self):
-        regex = rf'nid\d+:{self.test_hw}.*\s+(\d+\.\d+)\s+GFlops,'
-        return sn.min(sn.extractall(regex, self.stdout, 1, float))
+        return sn.min([value for _, _, value in self.node_results])
 
 
 class NodeBurnStreamCE(NodeBurnCE):
+    nb_unit = 'GB/s'
+
     @run_before('performance')
     def validate_perf(self):
         self.uarch = uenv.uarch(self.current_partition)
@@ -103,8 +210,7 @@ class NodeBurnStreamCE(NodeBurnCE):
 
     @performance_function('GB/s')
     def nb_gbps(self):
-        regex = rf'nid\d+:{self.test_hw}.*\s+(\d+\.\d+)\s+GB/s,'
-        return sn.min(sn.extractall(regex, self.stdout, 1, float))
+        return sn.min([value for _, _, value in self.node_results])
 
 
 @rfm.simple_test
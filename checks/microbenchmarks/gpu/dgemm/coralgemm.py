@@ -4,13 +4,21 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import os
+import pathlib
+import sys
+
 import reframe as rfm
 import reframe.utility.sanity as sn
 from uenv import uarch
 
+sys.path.append(str(pathlib.Path(__file__).parent.parent.parent.parent /
+                    'mixins'))
+
+from reference_overrides import ReferenceOverridesMixin  # noqa: E402
+
 
 @rfm.simple_test
-class CoralGemm(rfm.RegressionTest):
+class CoralGemm(rfm.RegressionTest, ReferenceOverridesMixin):
     descr = 'AMD CoralGemm test'
     valid_systems = ['+amdgpu +uenv']
     valid_prog_environs = ['+uenv +prgenv +rocm']
@@ -10,10 +10,12 @@ import reframe as rfm
 from hpctestlib.microbenchmarks.gpu.memory_bandwidth import *
 
 sys.path.append(os.path.abspath(os.path.join(__file__, '../../../../')))
+sys.path.append(os.path.abspath(os.path.join(__file__, '../../../../mixins')))
 import microbenchmarks.gpu.hooks as hooks
+from reference_overrides import ReferenceOverridesMixin
 
 
-class SystemConfigCSCS(rfm.RegressionTestPlugin):
+class SystemConfigCSCS(ReferenceOverridesMixin):
     @run_after('init')
     def arola_tsa_valid_prog_environs(self):
         if self.current_system.name in ['arolla', 'tsa']:
@@ -11,9 +11,11 @@ import reframe.utility.sanity as sn
 
 sys.path.append(str(pathlib.Path(__file__).parent.parent.parent.parent / 'mixins'))
 from uenv_slurm_mpi_options import UenvSlurmMpiOptionsMixin
+from topology_placement import TopologyPlacementMixin
 
 
-class BaseCheck(rfm.RunOnlyRegressionTest, UenvSlurmMpiOptionsMixin):
+class BaseCheck(rfm.RunOnlyRegressionTest, UenvSlurmMpiOptionsMixin,
+                TopologyPlacementMixin):
     valid_systems = ['+remote']
     valid_prog_environs = ['+osu-micro-benchmarks +uenv']
     sourcesdir = None
@@ -4,12 +4,14 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import contextlib
+import json
 import os
 import pathlib
 import sys
 
 import reframe as rfm
 import reframe.utility.sanity as sn
+from reframe.core.exceptions import SanityError
 
 sys.path.append(
     str(pathlib.Path(__file__).parent.parent.parent.parent / 'mixins')
@@ -17,6 +19,16 @@ sys.path.append(
 
 from extra_launcher_options import ExtraLauncherOptionsMixin
 from container_engine import ContainerEngineCPEMixin
+from topology_placement import TopologyPlacementMixin
+
+
+def _size_label(size):
+    '''Short label of a message size, e.g. ``4096 -> '4K'``'''
+    for suffix, scale in (('M', 1 << 20), ('K', 1 << 10)):
+        if size >= scale and size % scale == 0:
+            return f'{size // scale}{suffix}'
+
+    return str(size)
 
 
 class fetch_osu_benchmarks(rfm.RunOnlyRegressionTest):
@@ -137,7 +149,7 @@ class build_osu_benchmarks(rfm.CompileOnlyRegressionTest,
 
 
 class osu_benchmark(rfm.RunOnlyRegressionTest, ExtraLauncherOptionsMixin,
-                    ContainerEngineCPEMixin):
+                    ContainerEngineCPEMixin, TopologyPlacementMixin):
     '''OSU benchmark test base class.'''
 
     #: Number of warmup iterations.
@@ -167,6 +179,38 @@ class osu_benchmark(rfm.RunOnlyRegressionTest, ExtraLauncherOptionsMixin,
     #: :type: :class:`int`
     message_size = variable(int)
 
+    #: Run the benchmark over a range of message sizes.
+    #:
+    #: All the sizes from :attr:`sweep_min_size` to :attr:`sweep_max_size`
+    #: are measured in a single launch. Every size is reported as a
+    #: ``<metric>_<size>`` performance variable, e.g. ``bandwidth_4K``, in
+    #: addition to the :attr:`message_size` one, and the curve is stored in
+    #: the :attr:`sweep_file` of the output directory.
+    #:
+    #: :type: :class:`bool`
+    #: :default: ``False``
+    sweep = variable(bool, value=False)
+
+    #: Smallest message size of the sweep.
+    #:
+    #: :type: :class:`int`
+    #: :default: ``1``
+    sweep_min_size = variable(int, value=1)
+
+    #: Largest message size of the sweep.
+    #:
+    #: The sanity check is done for this message size.
+    #:
+    #: :type: :class:`int`
+    #: :default: ``4194304``
+    sweep_max_size = variable(int, value=4194304)
+
+    #: JSON file of the message size curve of the sweep.
+    #:
+    #: :type: :class:`str`
+    #: :default: ``'osu_sweep.json'``
+    sweep_file = variable(str, value='osu_sweep.json')
+
     #: Device buffers.
     #:
     #: Use accelerator device buffers.
@@ -218,7 +262,12 @@ class osu_benchmark(rfm.RunOnlyRegressionTest, ExtraLauncherOptionsMixin,
             raise ValueError(f'unknown benchmark metric: {bench_metric}')
 
         self.executable = bench.split('.')[-1]
-        self.executable_opts = ['-m', f'{self.message_size}',
+        if self.sweep:
+            sizes = f'{self.sweep_min_size}:{self.sweep_max_size}'
+        else:
+            sizes = f'{self.message_size}'
+
+        self.executable_opts = ['-m', sizes,
                                 '-x', f'{self.num_warmup_iters}',
                                 '-i', f'{self.num_iters}', '-c']
 
@@ -234,13 +283,87 @@ class osu_benchmark(rfm.RunOnlyRegressionTest, ExtraLauncherOptionsMixin,
                 self._extract_metric, unit
             )
         }
+        if self.sweep:
+            self._sweep_unit = unit
+            for size in self._sweep_sizes():
+                self.perf_variables[f'{bench_metric}_{_size_label(size)}'] = (
+                    sn.make_performance_function(
+                        self._sweep_value(size), unit
+                    )
+                )
 
     @sanity_function
     def validate_test(self):
+        if self.sweep:
+            return sn.all([
+                sn.assert_found(rf'^{self.sweep_max_size}.*Pass',
+                                self.stdout),
+                sn.assert_not_found(r'Fail', self.stdout,
+                                    msg='validation failed for some message '
+                                        'sizes')
+            ])
+
         return sn.assert_found(rf'^{self.message_size}.*Pass', self.stdout)
 
+    @run_before('performance')
+    def write_sweep_file(self):
+        if not self.sweep:
+            return
+
+        bench, bench_metric = self.benchmark_info
+        with open(os.path.join(self.stagedir, self.sweep_file), 'w') as fp:
+            json.dump({
+                'benchmark': bench,
+                'metric': bench_metric,
+                'unit': self._sweep_unit,
+                'device_buffers': self.device_buffers,
+                'num_tasks': self.num_tasks,
+                'system': self.current_system.name,
+                'partition': self.current_partition.name,
+                'environ': self.current_environ.name,
+                'jobid': self.job.jobid,
+                'sizes': {
+                    str(size): value
+                    for size, value in self._sweep_curve().items()
+                }
+            }, fp, indent=2)
+
+        self.keep_files += [self.sweep_file]
+
+    def _sweep_sizes(self):
+        '''The message sizes of the sweep, powers of two as in OSU'''
+        size, sizes = max(self.sweep_min_size, 1), []
+        while size <= self.sweep_max_size:
+            sizes.append(size)
+            size *= 2
+
+        if self.sweep_min_size == 0:
+            sizes.insert(0, 0)
+
+        return sizes
+
+    def _sweep_curve(self):
+        '''The value of every message size, parsed once from the output'''
+        if getattr(self, '_curve', None) is None:
+            rows = sn.evaluate(sn.extractall(r'^(\d+)\s+(\S+)', self.stdout,
+                                             (1, 2), (int, float)))
+            self._curve = dict(rows)
+
+        return self._curve
+
+    @deferrable
+    def _sweep_value(self, size):
+        curve = self._sweep_curve()
+        if size not in curve:
+            raise SanityError(f'no result for message size {size}')
+
+        return curve[size]
+
     @deferrable
     def _extract_metric(self):
+        if self.sweep:
+            return self._sweep_value(self.message_size)
+
         return sn.extractsingle(rf'^{self.message_size}\s+(\S+)',
                                 self.stdout, 1, float)
 
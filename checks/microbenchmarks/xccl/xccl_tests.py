@@ -3,11 +3,14 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import json
+import os
 import pathlib
 import sys
 
 import reframe as rfm
 import reframe.utility.sanity as sn
+from reframe.core.exceptions import SanityError
 
 sys.path.append(str(pathlib.Path(__file__).parent.parent.parent / 'mixins'))
 sys.path.append(str(pathlib.Path(__file__).parent.parent.parent.parent / 'config' / 'utilities'))  # noqa: E501
@@ -16,9 +19,39 @@ from uenv import uarch                                       # noqa: E402
 from container_engine import ContainerEngineMixin            # noqa: E402
 from slurm_mpi_pmix import SlurmMpiPmixMixin                 # noqa: E402
 from uenv_slurm_mpi_options import UenvSlurmMpiOptionsMixin  # noqa: E402
+from reference_overrides import ReferenceOverridesMixin      # noqa: E402
+from topology_placement import TopologyPlacementMixin        # noqa: E402
 
+_SIZE_SUFFIXES = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
 
-class XCCLTestsBase(rfm.RunOnlyRegressionTest):
+# A row of the nccl-tests/rccl-tests results: size, count, type, redop,
+# root and the time, algbw, busbw and #wrong of the out-of-place and the
+# in-place runs
+_ROW_RE = (r'^\s*(\d+)\s+\d+\s+\S+\s+\S+\s+-?\d+'
+           r'\s+(\S+)\s+(\S+)\s+(\S+)\s+\S+'
+           r'\s+(\S+)\s+(\S+)\s+(\S+)\s+\S+\s*$')
+
+
+def _parse_size(size):
+    '''Bytes of a size option of nccl-tests, e.g. ``'1024M'``'''
+    size = size.strip().upper()
+    if size[-1:] in _SIZE_SUFFIXES:
+        return int(size[:-1]) * _SIZE_SUFFIXES[size[-1]]
+
+    return int(size)
+
+
+def _size_label(size):
+    for suffix, scale in sorted(_SIZE_SUFFIXES.items(),
+                                key=lambda x: x[1], reverse=True):
+        if size >= scale and size % scale == 0:
+            return f'{size // scale}{suffix}'
+
+    return str(size)
+
+
+class XCCLTestsBase(rfm.RunOnlyRegressionTest, ReferenceOverridesMixin,
+                    TopologyPlacementMixin):
     valid_prog_environs = ['builtin']
     maintainers = ['amadonna', 'msimberg', 'VCUE', 'SSA']
     sourcesdir = None
@@ -26,6 +59,19 @@ class XCCLTestsBase(rfm.RunOnlyRegressionTest):
     num_nodes = variable(int, value=2)
     min_bytes = variable(str, value='1024M')
     max_bytes = variable(str, value='1024M')
+
+    #: Measure all the message sizes from :attr:`sweep_min_bytes` to
+    #: :attr:`max_bytes`, doubling the size at every step.
+    #:
+    #: The time and the bus bandwidth of every size are reported as the
+    #: ``time_<size>`` and ``busbw_<size>`` performance variables, together
+    #: with the peak bus bandwidth and the smallest size reaching half of
+    #: it. The references of these variables per uarch come from the
+    #: :attr:`reference_overrides`. The table of all the sizes is stored in
+    #: the :attr:`curve_file` of the output directory.
+    sweep = variable(bool, value=False)
+    sweep_min_bytes = variable(str, value='8')
+    curve_file = variable(str, value='xccl_curve.json')
     tags = {'production', 'maintenance'}
     env_vars = {
         'NCCL_DEBUG': 'Info',
@@ -86,10 +132,13 @@ class XCCLTestsBase(rfm.RunOnlyRegressionTest):
 
     @run_after('setup')
     def set_executable_opts(self):
+        min_bytes = self.sweep_min_bytes if self.sweep else self.min_bytes
         self.executable_opts = [
-            f'--minbytes {self.min_bytes}', f'--maxbytes {self.max_bytes}',
+            f'--minbytes {min_bytes}', f'--maxbytes {self.max_bytes}',
             '--ngpus 1'
         ]
+        if self.sweep:
+            self.executable_opts += ['--stepfactor 2']
 
     @sanity_function
     def assert_sanity(self):
@@ -112,11 +161,106 @@ class XCCLTestsBase(rfm.RunOnlyRegressionTest):
 
     @run_before('performance')
     def set_perf(self):
-        self.perf_patterns = {
-            'GB/s': sn.extractsingle(
-                r'Avg bus bandwidth\s*:\s*(?P<gbs>\S+)',
-                self.stdout, 'gbs', float)
+        if not self.sweep:
+            self.perf_variables = {
+                'GB/s': sn.make_performance_function(
+                    sn.extractsingle(r'Avg bus bandwidth\s*:\s*(?P<gbs>\S+)',
+                                     self.stdout, 'gbs', float), 'GB/s'
+                )
+            }
+            return
+
+        # The average bus bandwidth is over all the sizes of the sweep, use
+        # the one of the largest size as without the sweep
+        max_size = _parse_size(self.max_bytes)
+        self.perf_variables = {
+            'GB/s': sn.make_performance_function(
+                self._curve_value(max_size, 'busbw_avg'), 'GB/s'
+            ),
+            'busbw_peak': sn.make_performance_function(
+                self._busbw_peak(), 'GB/s'
+            ),
+            'half_peak_size': sn.make_performance_function(
+                self._half_peak_size(), 'B'
+            )
         }
+        size = _parse_size(self.sweep_min_bytes)
+        while size <= max_size:
+            label = _size_label(size)
+            self.perf_variables[f'time_{label}'] = (
+                sn.make_performance_function(
+                    self._curve_value(size, 'time'), 'us'
+                )
+            )
+            self.perf_variables[f'busbw_{label}'] = (
+                sn.make_performance_function(
+                    self._curve_value(size, 'busbw'), 'GB/s'
+                )
+            )
+            size *= 2
+
+    @run_before('performance')
+    def write_curve_file(self):
+        if not self.sweep:
+            return
+
+        with open(os.path.join(self.stagedir, self.curve_file), 'w') as fp:
+            json.dump({
+                'test': self.test_name,
+                'uarch': uarch(self.current_partition),
+                'num_nodes': self.num_nodes,
+                'num_tasks': self.num_tasks,
+                'system': self.current_system.name,
+                'partition': self.current_partition.name,
+                'environ': self.current_environ.name,
+                'jobid': self.job.jobid,
+                'units': {'time': 'us', 'algbw': 'GB/s', 'busbw': 'GB/s'},
+                'sizes': {str(size): row
+                          for size, row in self._curve().items()}
+            }, fp, indent=2)
+
+        self.keep_files += [self.curve_file]
+
+    def _curve(self):
+        '''The results table by size, parsed once from the output'''
+        if getattr(self, '_curve_table', None) is None:
+            rows = sn.evaluate(sn.extractall(
+                _ROW_RE, self.stdout, tuple(range(1, 8)),
+                (int, float, float, float, float, float, float)
+            ))
+            if not rows:
+                raise SanityError('no results table in the output')
+
+            self._curve_table = {
+                size: {'time': time, 'algbw': algbw, 'busbw': busbw,
+                       'time_ip': time_ip, 'algbw_ip': algbw_ip,
+                       'busbw_ip': busbw_ip,
+                       'busbw_avg': (busbw + busbw_ip) / 2}
+                for size, time, algbw, busbw, time_ip, algbw_ip, busbw_ip
+                in rows
+            }
+
+        return self._curve_table
+
+    @deferrable
+    def _curve_value(self, size, column):
+        curve = self._curve()
+        if size not in curve:
+            raise SanityError(f'no result for message size {size}')
+
+        return curve[size][column]
+
+    @deferrable
+    def _busbw_peak(self):
+        return max(row['busbw'] for row in self._curve().values())
+
+    @deferrable
+    def _half_peak_size(self):
+        '''Smallest size reaching half of the peak bus bandwidth'''
+        curve = self._curve()
+        half_peak = max(row['busbw'] for row in curve.values()) / 2
+        return min(size for size, row in curve.items()
+                   if row['busbw'] >= half_peak)
 
 
 class XCCLTestsBaseCE(XCCLTestsBase, ContainerEngineMixin, SlurmMpiPmixMixin):
@@ -0,0 +1,81 @@
+# Copyright Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import fnmatch
+import json
+import os
+import pathlib
+import sys
+
+import reframe as rfm
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent.parent / 'config' /
+                    'utilities'))
+
+from uenv import uarch  # noqa: E402
+
+# The loaded overrides files by path, with their modification time
+_OVERRIDES = {}
+
+
+def _load_overrides(path):
+    mtime = os.path.getmtime(path)
+    cached = _OVERRIDES.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as fp:
+            cached = (mtime, json.load(fp).get('references', {}))
+
+        _OVERRIDES[path] = cached
+
+    return cached[1]
+
+
+class ReferenceOverridesMixin(rfm.RegressionTestPlugin):
+    #: The references file generated by ``utility/derive_references.py``.
+    #:
+    #: The references derived for the test, system, partition, environment
+    #: and uarch replace the ones of the test for the same performance
+    #: variables. The most specific scope of the file is used.
+    #:
+    #: :default: ``$CSCS_RFM_REFERENCE_OVERRIDES`` or ``None``
+    reference_overrides = variable(
+        str, type(None),
+        value=os.environ.get('CSCS_RFM_REFERENCE_OVERRIDES')
+    )
+
+    @run_before('performance', always_last=True)
+    def apply_reference_overrides(self):
+        if not self.reference_overrides:
+            return
+
+        scopes = _load_overrides(self.reference_overrides).get(
+            self.display_name
+        )
+        if not scopes:
+            return
+
+        part = self.current_partition
+        target = (self.current_system.name, part.name,
+                  self.current_environ.name, uarch(part) or '*')
+        best = None
+        for scope, refs in scopes.items():
+            fields = scope.split(':')
+            if len(fields) != len(target) or not all(
+                fnmatch.fnmatchcase(t, f) for t, f in zip(target, fields)
+            ):
+                continue
+
+            specificity = sum(f != '*' for f in fields)
+            if best is None or specificity > best[0]:
+                best = (specificity, refs)
+
+        if best is None:
+            return
+
+        for var, entry in best[1].items():
+            if var in self.perf_variables:
+                self.reference[f'{part.fullname}:{var}'] = tuple(
+                    entry['reference']
+                )
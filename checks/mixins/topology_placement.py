@@ -0,0 +1,146 @@
+# Copyright Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+import pathlib
+import re
+import subprocess
+import sys
+
+import reframe as rfm
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent.parent / 'config' /
+                    'utilities'))
+
+from slurm_topology import (PLACEMENTS, SwitchTopology,  # noqa: E402
+                            expand_hostlist)
+
+# The topologies read by path, or from scontrol with the key None
+_TOPOLOGIES = {}
+
+_PARTITION_OPT = re.compile(r'^(?:-p\s*|--partition[= ])(\S+)$')
+_CONSTRAINT_OPT = re.compile(r'^(?:-C\s*|--constraint[= ])(\S+)$')
+_RESERVATION_OPT = re.compile(r'^--reservation[= ](\S+)$')
+
+# The schedulers of the partitions whose Slurm commands run on this host
+_LOCAL_SLURM = ('slurm', 'squeue')
+
+
+def _topology(path):
+    if path not in _TOPOLOGIES:
+        if path:
+            _TOPOLOGIES[path] = SwitchTopology.from_file(path)
+        else:
+            _TOPOLOGIES[path] = SwitchTopology.from_scontrol()
+
+    return _TOPOLOGIES[path]
+
+
+def _run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True).stdout
+
+
+def _option(access, regex):
+    for opt in access:
+        match = regex.match(opt)
+        if match:
+            return match.group(1).strip('"\'')
+
+    return None
+
+
+def _satisfies(features, constraint):
+    '''Whether the node features satisfy a constraint of ``|`` separated
+    alternatives of ``&`` or ``,`` separated features'''
+    return any(
+        all(feat in features for feat in re.split(r'[&,]', alternative))
+        for alternative in constraint.strip('()').split('|')
+    )
+
+
+def _idle_nodes(access):
+    '''The idle nodes of the Slurm partition, constraint and reservation in
+    the access options'''
+    cmd = ['sinfo', '-h', '-N', '-o', '%N %t %f']
+    partition = _option(access, _PARTITION_OPT)
+    if partition:
+        cmd += ['-p', partition]
+
+    # The nodes of an active reservation are in the resv state
+    states = {'idle'}
+    reserved = None
+    reservation = _option(access, _RESERVATION_OPT)
+    if reservation:
+        states.add('resv')
+        descr = _run(['scontrol', 'show', 'reservation', reservation, '-o'])
+        match = re.search(r'\bNodes=(\S+)', descr)
+        reserved = set(expand_hostlist(match.group(1) if match else ''))
+
+    constraint = _option(access, _CONSTRAINT_OPT)
+    nodes = []
+    for line in _run(cmd).splitlines():
+        node, state, features = (line.split() + ['', ''])[:3]
+        if state not in states:
+            continue
+
+        if reserved is not None and node not in reserved:
+            continue
+
+        if constraint and not _satisfies(features.split(','), constraint):
+            continue
+
+        nodes.append(node)
+
+    return nodes
+
+
+class TopologyPlacementMixin(rfm.RegressionTestPlugin):
+    #: The placement of the nodes of the test in the network topology.
+    #:
+    #: ``intra-switch``, ``intra-group`` and ``inter-group`` run with
+    #: ``--nodelist`` on idle nodes of the same leaf switch, of the same
+    #: group on different switches or in different groups. ``any`` leaves
+    #: the placement to Slurm. The idle nodes are queried with the Slurm
+    #: commands of the local host, so the other placements are skipped on
+    #: partitions with other schedulers, e.g. FirecREST.
+    #: Run all the variants with ``-P placement=intra-switch,intra-group,``
+    #: ``inter-group``. The placement is logged in the perflogs.
+    #:
+    #: :default: ``$CSCS_RFM_PLACEMENT`` or ``'any'``
+    placement = variable(str, value=os.environ.get('CSCS_RFM_PLACEMENT',
+                                                   'any'), loggable=True)
+
+    #: The output of ``scontrol show topology`` saved to a file.
+    #:
+    #: If not set, the topology is read with ``scontrol``.
+    #:
+    #: :default: ``$CSCS_RFM_TOPOLOGY_FILE`` or ``None``
+    topology_file = variable(
+        str, type(None), value=os.environ.get('CSCS_RFM_TOPOLOGY_FILE')
+    )
+
+    @run_after('setup', always_last=True)
+    def set_placement(self):
+        if self.placement == 'any':
+            return
+
+        if self.placement not in PLACEMENTS:
+            raise ValueError(f'unknown placement: {self.placement!r}')
+
+        scheduler = self.current_partition.scheduler.registered_name
+        self.skip_if(scheduler not in _LOCAL_SLURM,
+                     f'{self.placement} placement needs the Slurm commands '
+                     f'of the local host, not the {scheduler!r} scheduler')
+
+        num_nodes = -(-self.num_tasks // (self.num_tasks_per_node or 1))
+        nodes = _topology(self.topology_file).select(
+            self.placement, _idle_nodes(self.current_partition.access),
+            num_nodes
+        )
+        self.skip_if(nodes is None,
+                     f'no {num_nodes} idle nodes with {self.placement} '
+                     f'placement')
+        self.job.options += [f'--nodelist={",".join(nodes)}']
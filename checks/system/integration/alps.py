@@ -839,3 +839,4 @@ else:
     check.MODULE_NAME = __name__
 
 create_checks(check)
+check.create_bundle()
@@ -6,9 +6,21 @@
 # Definition of Check class and function.
 #
 
+import os
+import re
+import shlex
+
 # needed when combining system name and tag in "valid_systems" is supported by ReFrame.
 #from itertools import product
 
+
+def is_var_true(var):
+    if var is None:
+        return False
+
+    return var.lower() in ['true', 'yes', '1']
+
+
 def make_valid_systems(valid_systems, where):
     if isinstance(valid_systems, str):
         valid_systems = [valid_systems]
@@ -35,6 +47,20 @@ def make_valid_systems(valid_systems, where):
     return valid_systems
 
 
+# Delimiters of the results of the checks in the output of the bundle.
+BUNDLE_BEGIN = 'RFM_SYSINT_BEGIN'
+BUNDLE_END = 'RFM_SYSINT_END'
+
+BUNDLE_TOTAL = 'RFM_SYSINT_TOTAL'
+
+# Time limit of every bundled check in seconds, the time limit of the
+# individual tests.
+BUNDLE_CHECK_TIMEOUT = 120
+
+# Number of bundled checks running concurrently.
+BUNDLE_WORKERS = 8
+
+
 class Check:
 
     #
@@ -58,6 +84,20 @@ class Check:
         self.TAGS          = set()
         # The name of the calling module. Should be set from the caller.
         self.MODULE_NAME   = __name__
+        # Run all the checks of a partition in a single job, whose results
+        # are then checked by the individual tests.
+        self.BUNDLE        = is_var_true(
+            os.environ.get('CSCS_RFM_SYSINT_BUNDLE')
+        )
+        # Name of the test running the bundled checks.
+        self.BUNDLE_NAME   = 'SysintBundle'
+        # Number of bundled checks running concurrently.
+        self.BUNDLE_WORKERS = int(
+            os.environ.get('CSCS_RFM_SYSINT_BUNDLE_WORKERS', BUNDLE_WORKERS)
+        )
+
+        # The checks created so far, to be run by the bundle.
+        self._checks       = []
 
     def __call__(self, cmd, expected=None, not_expected=None, where=None, *,
                  name=None, descr=None, valid_systems=None,
@@ -119,6 +159,13 @@ class Check:
         name = name or f'Check_{Check.check_id:04}_{self.CLASS}'
         descr = descr or ''
         time_limit = '2m'
+        self._checks.append({
+            'name': name,
+            'cmd': cmd,
+            'valid_systems': valid_systems,
+            'valid_prog_environs': valid_prog_environs,
+            'tags': tags
+        })
 
         if self.DEBUG:
             exp_str, nexp_str = '', ''
@@ -145,11 +192,20 @@ class Check:
         def validate(test):
             """Callback to check that we got the output we expected."""
 
-            a, b = True, True
+            a, b, done = True, True, True
+
+            outputs = {}
+            if self.BUNDLE:
+                outputs = bundle_outputs(test)
+                done = sn.assert_found(
+                    rf'^{BUNDLE_END} {re.escape(name)} ', outputs['summary'],
+                    msg=f"'{test.cmd} {test.caller}' did not complete in " +
+                        f"the bundle {self.BUNDLE_NAME}")
 
             expected, where = test.expected
             if expected is not None:
-                where = eval(f'test.{test.expected[1]}')
+                where = outputs.get(test.expected[1],
+                                    eval(f'test.{test.expected[1]}'))
                 a = sn.assert_found(
                     expected,
                     where,
@@ -158,18 +214,50 @@ class Check:
 
             not_expected, where = test.not_expected
             if not_expected is not None:
-                where = eval(f'test.{test.not_expected[1]}')
+                where = outputs.get(test.not_expected[1],
+                                    eval(f'test.{test.not_expected[1]}'))
                 b = sn.assert_not_found(
                     not_expected,
                     where,
                     msg=f"Did not expect '{not_expected}' " +
                         f"running '{test.cmd} {test.caller}'")
-            return (a and b)
+            return (done and a and b)
+
+        def bundle_outputs(test):
+            """The output files of this check in the bundle"""
+
+            bundle = test.getdep(self.BUNDLE_NAME)
+            return {
+                'stdout': os.path.join(bundle.stagedir, f'{name}.out'),
+                'stderr': os.path.join(bundle.stagedir, f'{name}.err'),
+                'summary': os.path.join(bundle.stagedir, bundle.job.stdout)
+            }
+
+        def depend_on_bundle(test):
+            """Check the output of the bundle instead of running cmd"""
+
+            test.depends_on(self.BUNDLE_NAME)
+
+        def set_bundle_timings(test):
+            """Report the exit code and the duration of the command"""
+
+            summary = bundle_outputs(test)['summary']
+            regex = (rf'^{BUNDLE_END} {re.escape(name)} '
+                     rf'rc=(\d+) elapsed=(\S+)')
+            test.perf_variables = {
+                'exit_code': sn.make_performance_function(
+                    sn.extractsingle(regex, summary, 1, int), ''
+                ),
+                'elapsed': sn.make_performance_function(
+                    sn.extractsingle(regex, summary, 2, float), 's'
+                )
+            }
 
         def set_command_options(test):
             """Set up the options we need to run"""
 
-            test.executable = test.cmd
+            if not self.BUNDLE:
+                test.executable = test.cmd
 
             if isinstance(test.expected, list):
                 test.expected = test.expected
@@ -205,28 +293,39 @@ class Check:
                 msg=f'Required system(s) {test.valid_systems} ' +
                     f'but found {test.current_system.name}.')
 
+        attrs = {
+            'cmd': cmd,
+            'descr': descr,
+            'expected': expected,
+            'not_expected': not_expected,
+            'valid_systems': valid_systems,
+            'valid_prog_environs': valid_prog_environs,
+            'time_limit': time_limit,
+            'caller': debuginfo(),
+            'tags': tags
+        }
+        hooks = [
+            builtins.run_after('setup')(set_command_options),
+            builtins.run_after('init')(check_system),
+            builtins.sanity_function(validate),
+        ]
+        if self.BUNDLE:
+            # The command runs in the bundle, this test only checks its
+            # output on the local host
+            attrs.update({'local': True, 'executable': 'true'})
+            hooks += [
+                builtins.run_after('init')(depend_on_bundle),
+                builtins.run_after('setup')(set_bundle_timings),
+            ]
+
         #
         # Finally, create and register the test.
         #
         t = make_test(
             name,
             (rfm.RunOnlyRegressionTest,),
-            {
-                'cmd': cmd,
-                'descr': descr,
-                'expected': expected,
-                'not_expected': not_expected,
-                'valid_systems': valid_systems,
-                'valid_prog_environs': valid_prog_environs,
-                'time_limit': time_limit,
-                'caller': debuginfo(),
-                'tags': tags
-            },
-            [
-                builtins.run_after('setup')(set_command_options),
-                builtins.run_after('init')(check_system),
-                builtins.sanity_function(validate),
-            ],
+            attrs,
+            hooks,
             module=self.MODULE_NAME
         )
 
@@ -237,3 +336,127 @@ class Check:
                 t = rfm.xfail(xfail[0], xfail[1])(t)
 
         rfm.simple_test(t)
+
+    def create_bundle(self):
+        """
+        Create the test running all the checks valid for a partition in a
+        single job, if the bundled mode is enabled.
+
+        Every command runs under a timeout in its own shell, with its output
+        in '<name>.out' and '<name>.err' and its exit code and duration
+        between delimiters in the job output. The commands are independent
+        and run concurrently, up to 'workers' at a time, so that the bundle
+        takes about the time of its slowest checks. The individual tests
+        depend on this test and check its results, so that their names and
+        tags still work for filtering and reporting.
+        """
+
+        if not self.BUNDLE or not self._checks:
+            return
+
+        checks = list(self._checks)
+        valid_systems = sorted({s for c in checks
+                                for s in c['valid_systems']})
+        valid_prog_environs = sorted({e for c in checks
+                                      for e in c['valid_prog_environs']})
+        tags = set().union(*(c['tags'] for c in checks))
+
+        if self.DEBUG:
+            print(f"{self.BUNDLE_NAME}: {len(checks)} checks on "
+                  f"{valid_systems} with {valid_prog_environs}")
+            return
+
+        import reframe as rfm
+        import reframe.utility.sanity as sn
+        import reframe.core.builtins as builtins
+
+        from reframe.core.meta import make_test
+
+        def write_bundle(test):
+            """Write the script running the checks of this partition"""
+
+            system = test.current_system.name
+            environ = test.current_environ.name
+            test.bundled_checks = [
+                c for c in checks
+                if (system in c['valid_systems'] or
+                    '*' in c['valid_systems']) and
+                environ in c['valid_prog_environs']
+            ]
+            lines = [
+                'elapsed_since() {',
+                '    awk -v s=$1 -v e=$(date +%s.%N) '
+                '\'BEGIN {printf "%.3f", e - s}\'',
+                '}',
+                '',
+                'run_check() {',
+                f'    echo "{BUNDLE_BEGIN} $1"',
+                '    local start=$(date +%s.%N)',
+                f'    timeout -k 5 {test.check_timeout} bash -c "$2" '
+                '> "$1.out" 2> "$1.err"',
+                '    local rc=$?',
+                f'    echo "{BUNDLE_END} $1 rc=$rc '
+                'elapsed=$(elapsed_since $start)"',
+                '}',
+                '',
+                '# Wait for a free worker',
+                'throttle() {',
+                f'    while (( $(jobs -rp | wc -l) >= {test.workers} )); do',
+                '        wait -n',
+                '    done',
+                '}',
+                '',
+                'bundle_start=$(date +%s.%N)',
+            ]
+            for c in test.bundled_checks:
+                lines += ['throttle',
+                          f"run_check {shlex.quote(c['name'])} "
+                          f"{shlex.quote(c['cmd'])} &"]
+
+            lines += ['wait',
+                      f'echo "{BUNDLE_TOTAL} '
+                      'elapsed=$(elapsed_since $bundle_start)"']
+            with open(os.path.join(test.stagedir, 'bundle.sh'), 'w') as fp:
+                fp.write('\n'.join(lines) + '\n')
+
+            test.executable = 'bash bundle.sh'
+
+        def validate_bundle(test):
+            """Check that every bundled check completed"""
+
+            return sn.assert_eq(
+                sn.count(sn.findall(rf'^{BUNDLE_END} ', test.stdout)),
+                len(test.bundled_checks))
+
+        def set_total_timing(test):
+            """Report the duration of all the bundled checks"""
+
+            test.perf_variables = {
+                'elapsed': sn.make_performance_function(
+                    sn.extractsingle(rf'^{BUNDLE_TOTAL} elapsed=(\S+)',
+                                     test.stdout, 1, float), 's'
+                )
+            }
+
+        t = make_test(
+            self.BUNDLE_NAME,
+            (rfm.RunOnlyRegressionTest,),
+            {
+                'descr': 'Run the system integration checks in one job',
+                'valid_systems': valid_systems,
+                'valid_prog_environs': valid_prog_environs,
+                'time_limit': '30m',
+                'tags': tags,
+                'workers': builtins.variable(int, value=self.BUNDLE_WORKERS),
+                'check_timeout': builtins.variable(
+                    int, value=BUNDLE_CHECK_TIMEOUT
+                )
+            },
+            [
+                builtins.run_after('setup')(set_total_timing),
+                builtins.run_before('run')(write_bundle),
+                builtins.sanity_function(validate_bundle),
+            ],
+            module=self.MODULE_NAME
+        )
+        rfm.simple_test(t)
@@ -3,8 +3,19 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import hashlib
 import json
 import os
+import sys
+
+utilities_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'utilities')
+if utilities_path not in sys.path:
+    sys.path.append(utilities_path)
+
+import perf_history  # noqa: E402,F401 (registers the perf_history handler)
+from perflog_formatters import victoriametrics_formatter  # noqa: E402
+from perflog_shipper import HTTPBatchShipper, batched  # noqa: E402
 
 
 def _format_httpjson(record, extras, ignore_keys):
@@ -28,49 +39,73 @@ def _format_httpjson(record, extras, ignore_keys):
     return json.dumps(data)
 
 
-def _format_victoriametrics(record, extras, ignore_keys):
-    data = {}
-    for attr, val in record.__dict__.items():
-        if attr in ignore_keys or attr.startswith('_'):
-            continue
-
-        if attr in ('check_perf_value', 'check_perf_ref') and val is not None:
-            data[attr] = float(val)
-        else:
-            data[attr] = val
-
-    data.update(extras)
-
-    timestamp = data.get('check_job_completion_time_unix')
-    timestamps = [int(timestamp * 1000)] if timestamp is not None else None
+# Headers of the requests to the VictoriaMetrics import endpoint
+_VICTORIAMETRICS_HEADERS = {
+    'Content-Type': 'application/x-ndjson'
+}
 
-    # VMetrics labels must be strings; keep perf values out of labels
-    labels = {
-        k: str(v) if v is not None else ''
-        for k, v in data.items()
-        if k not in ('check_perf_value', 'check_perf_ref')
-    }
-    labels.setdefault('__name__', labels.get('check_unique_name', 'reframe'))
+# Record attributes not pushed to VictoriaMetrics
+_VICTORIAMETRICS_IGNORE_KEYS = [
+    'check_perfvalues',
+    'check_info', 'version', 'check_fail_phase',
+    'check_fail_reason', 'check_perf_result',
+    'check_job_exitcode', 'check_job_nodelist',
+    'check_build_locally', 'check_build_time_limit',
+    'check_descr', 'check_env_vars',
+    'check_exclusive_access', 'check_executable',
+    'check_executable_opts', 'check_extra_resources',
+    'check_keep_files', 'check_local',
+    'check_maintainers', 'check_max_pending_time',
+    'check_modules', 'check_num_cpus_per_task',
+    'check_num_gpus_per_node', 'check_num_tasks',
+    'check_num_tasks_per_core', 'check_num_tasks_per_node',
+    'check_num_tasks_per_socket', 'check_postbuild_cmds',
+    'check_postrun_cmds', 'check_prebuild_cmds',
+    'check_prefix', 'check_prerun_cmds',
+    'check_readonly_files', 'check_short_name',
+    'check_sourcepath', 'check_sourcesdir',
+    'check_stagedir', 'check_strict_check', 'check_tags',
+    'check_time_limit', 'check_use_multithreading',
+    'check_valid_prog_environs', 'check_valid_systems',
+    'check_variables'
+]
 
-    lines = []
-    for perf_key, perf_type in (
-        ('check_perf_value', 'value'),
-        ('check_perf_ref', 'ref'),
-    ):
-        perf_val = data.get(perf_key)
-        if perf_val is None:
-            continue
 
-        payload = {
-            'metric': {**labels, 'check_perf_type': perf_type},
-            'values': [perf_val],
-        }
-        if timestamps is not None:
-            payload['timestamps'] = timestamps
+def _httpjson_formatter(formatter, url_var, headers=None):
+    '''Return the ``json_formatter`` of an ``httpjson`` handler pushing to the
+    URL in ``$url_var``.
 
-        lines.append(json.dumps(payload, separators=(',', ':')))
+    The records are shipped in gzip-compressed NDJSON batches from a
+    background thread, with the ``extra_headers`` of the handler in
+    ``headers``, unless ``$CSCS_RFM_HTTPJSON_BATCH`` is false, in which case
+    ReFrame posts every record itself. The endpoint must accept NDJSON
+    payloads of many records.
+    '''
+    url = os.getenv(url_var)
+    batch = os.getenv('CSCS_RFM_HTTPJSON_BATCH', 'true')
+    if url is None or batch.lower() not in ['true', 'yes', '1']:
+        return formatter
 
-    return '\n'.join(lines) + '\n' if lines else None
+    spool_dir = os.getenv(
+        'CSCS_RFM_HTTPJSON_SPOOL_DIR',
+        os.path.join(os.getenv('XDG_CACHE_HOME',
+                               os.path.join(os.path.expanduser('~'),
+                                            '.cache')),
+                     'cscs-reframe-tests', 'perflog-spool')
+    )
+    shipper = HTTPBatchShipper(
+        url,
+        headers=headers,
+        max_records=int(os.getenv('CSCS_RFM_HTTPJSON_BATCH_SIZE', 500)),
+        flush_interval=float(
+            os.getenv('CSCS_RFM_HTTPJSON_FLUSH_INTERVAL', 5)
+        ),
+        # Keep the undelivered records of every endpoint apart
+        spool_dir=os.path.join(
+            spool_dir, hashlib.sha256(url.encode()).hexdigest()[:16]
+        )
+    )
+    return batched(formatter, shipper)
 
 
 reframe_dir = os.getenv(
@@ -150,6 +185,8 @@ site_configuration = {
                         'rfm_ci_project':
                             os.getenv('CI_PROJECT_PATH', 'Unknown CI Project')
                     },
+                    # The data stream accepts a single document per
+                    # request, so the records are not batched
                     'json_formatter': _format_httpjson,
                     'ignore_keys': ['check_perfvalues'],
                     'debug': False
@@ -161,39 +198,20 @@ site_configuration = {
                     'url': os.getenv('CSCS_RFM_HTTPJSON_URL_VM',
                                      'http://dummy:1234/rfm'),
                     'level': 'info',
-                    'extra_headers': {
-                        'Content-Type': 'application/x-ndjson'
-                    },
+                    'extra_headers': _VICTORIAMETRICS_HEADERS,
                     'extras': {
                         'rfm_ci_pipeline': os.getenv('CI_PIPELINE_URL', '#'),
                         'rfm_ci_project':
                             os.getenv('CI_PROJECT_PATH', 'Unknown CI Project')
                     },
-                    'json_formatter': _format_victoriametrics,
-                    'ignore_keys': [
-                        'check_perfvalues',
-                        'check_info', 'version', 'check_fail_phase',
-                        'check_fail_reason', 'check_perf_result',
-                        'check_job_exitcode', 'check_job_nodelist',
-                        'check_build_locally', 'check_build_time_limit',
-                        'check_descr', 'check_env_vars',
-                        'check_exclusive_access', 'check_executable',
-                        'check_executable_opts', 'check_extra_resources',
-                        'check_keep_files', 'check_local',
-                        'check_maintainers', 'check_max_pending_time',
-                        'check_modules', 'check_num_cpus_per_task',
-                        'check_num_gpus_per_node', 'check_num_tasks',
-                        'check_num_tasks_per_core', 'check_num_tasks_per_node',
-                        'check_num_tasks_per_socket', 'check_postbuild_cmds',
-                        'check_postrun_cmds', 'check_prebuild_cmds',
-                        'check_prefix', 'check_prerun_cmds',
-                        'check_readonly_files', 'check_short_name',
-                        'check_sourcepath', 'check_sourcesdir',
-                        'check_stagedir', 'check_strict_check', 'check_tags',
-                        'check_time_limit', 'check_use_multithreading',
-                        'check_valid_prog_environs', 'check_valid_systems',
-                        'check_variables'
-                    ],
+                    'json_formatter': _httpjson_formatter(
+                        victoriametrics_formatter(
+                            _VICTORIAMETRICS_IGNORE_KEYS
+                        ),
+                        'CSCS_RFM_HTTPJSON_URL_VM',
+                        _VICTORIAMETRICS_HEADERS
+                    ),
+                    'ignore_keys': _VICTORIAMETRICS_IGNORE_KEYS,
                     'debug': False
                 },
             ]
@@ -362,3 +380,11 @@ site_configuration = {
 #         'cat /etc/xthostname', 'hostname'
 #     ]
 }
+
+if os.getenv('CSCS_RFM_PERF_HISTORY'):
+    # Append the performance values to the local SQLite history in
+    # $CSCS_RFM_PERF_HISTORY (see utilities/perf_history.py)
+    site_configuration['logging'][0]['handlers_perflog'].append({
+        'type': 'perf_history',
+        'level': 'info'
+    })
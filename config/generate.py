@@ -14,7 +14,9 @@ JINJA2_TEMPLATE = 'reframe_config_template.j2'
 
 
 def main(user_input, containers_search, devices_search, reservs,
-         exclude_feat, access_opt, tmp_dir):
+         exclude_feat, access_opt, tmp_dir, slurm_snapshot=None,
+         save_slurm_snapshot=None, use_topology_cache=True,
+         topology_cache_path=None, refresh_topology=None):
 
     # Initialize system configuration
     system_info = SystemConfig()
@@ -22,7 +24,12 @@ def main(user_input, containers_search, devices_search, reservs,
     system_info.build_config(
         user_input=user_input, detect_containers=containers_search,
         detect_devices=devices_search, exclude_feats=exclude_feats,
-        reservs=reservs, access_opt=access_opt, tmp_dir=tmp_dir
+        reservs=reservs, access_opt=access_opt, tmp_dir=tmp_dir,
+        slurm_snapshot=slurm_snapshot,
+        save_slurm_snapshot=save_slurm_snapshot,
+        use_topology_cache=use_topology_cache,
+        topology_cache_path=topology_cache_path,
+        refresh_topology=refresh_topology
     )
 
     # Set up Jinja2 environment and load the template
@@ -88,7 +95,35 @@ if __name__ == '__main__':
         '--access', action='store',
         help='Compulsory options for accesing remote nodes with sbatch'
     )
-    # Define the '--access' flag
+    # Define the '--slurm-snapshot' flag
+    parser.add_argument(
+        '--slurm-snapshot', action='store',
+        help='Read the Slurm nodes, partitions and reservations from a '
+        'snapshot file instead of querying scontrol'
+    )
+    # Define the '--save-slurm-snapshot' flag
+    parser.add_argument(
+        '--save-slurm-snapshot', action='store',
+        help='Save the Slurm nodes, partitions and reservations to a '
+        'snapshot file'
+    )
+    # Define the '--topology-cache' flag
+    parser.add_argument(
+        '--topology-cache', action='store',
+        help='File with the results of previous remote detection jobs'
+    )
+    # Define the '--no-topology-cache' flag
+    parser.add_argument(
+        '--no-topology-cache', action='store_true',
+        help='Do not reuse or store the results of the remote detection jobs'
+    )
+    # Define the '--refresh-topology' flag
+    parser.add_argument(
+        '--refresh-topology', nargs='?', const='*',
+        help='Detect again the node types with features matching the given '
+        'patterns (all node types if no pattern is given)'
+    )
+    # Define the '-v' flag
     parser.add_argument(
         '-v', action='store_true',
         help='Set the verbosity to debug. Only effective if combined with --auto.'
@@ -133,5 +168,15 @@ if __name__ == '__main__':
 
     set_logger_level(args.v or user_input)
 
+    if args.slurm_snapshot and not os.path.exists(args.slurm_snapshot):
+        raise ValueError('The specified --slurm-snapshot was not found')
+
+    if args.refresh_topology:
+        refresh_topology = args.refresh_topology.split(',')
+    else:
+        refresh_topology = []
+
     main(user_input, containers_search, devices_search,
-         reservs, exclude_feats, access_opt, tmp_dir)
+         reservs, exclude_feats, access_opt, tmp_dir,
+         args.slurm_snapshot, args.save_slurm_snapshot,
+         not args.no_topology_cache, args.topology_cache, refresh_topology)
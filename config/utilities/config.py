@@ -12,6 +12,8 @@ from utilities.io import (getlogger, request_modules,
                           user_descr, user_selection)
 from utilities.job_util import Launcher, Scheduler, SlurmContext
 from utilities.modules import ModulesSystem, modules_impl
+from utilities.slurm_inventory import SlurmInventory
+from utilities.topology_cache import TopologyCache, default_cache_path
 
 
 class SystemConfig:
@@ -110,7 +112,10 @@ class SystemConfig:
 
     def find_scheduler(self, user_input: bool, detect_containers: bool,
                        detect_devices: bool, wait: bool, access_opt: list,
-                       tmp_dir: Union[str, None]) -> Union[SlurmContext, None]:
+                       tmp_dir: Union[str, None],
+                       inventory: Union[SlurmInventory, None] = None,
+                       topology_cache: Union[TopologyCache, None] = None
+                       ) -> Union[SlurmContext, None]:
         '''Detect the remote scheduler'''
         scheduler = Scheduler()
         scheduler.detect_scheduler(user_input)
@@ -121,7 +126,9 @@ class SystemConfig:
                                 detect_containers=detect_containers,
                                 detect_devices=detect_devices,
                                 access_opt=access_opt,
-                                wait=wait, tmp_dir=tmp_dir)
+                                wait=wait, tmp_dir=tmp_dir,
+                                inventory=inventory,
+                                topology_cache=topology_cache)
         else:
             return None
 
@@ -136,7 +143,12 @@ class SystemConfig:
                      detect_devices: bool = True,
                      wait: bool = True, exclude_feats: list = [],
                      reservs: list = [], access_opt: list = [],
-                     tmp_dir: Union[str, None] = None):
+                     tmp_dir: Union[str, None] = None,
+                     slurm_snapshot: Union[str, None] = None,
+                     save_slurm_snapshot: Union[str, None] = None,
+                     use_topology_cache: bool = True,
+                     topology_cache_path: Union[str, None] = None,
+                     refresh_topology: Union[list, None] = None):
         '''Build the configuration with all the information'''
         # System name
         self.find_systemname()
@@ -153,12 +165,29 @@ class SystemConfig:
         if user_input:
             self._get_resourcesdir()
         # Scheduler
+        inventory = None
+        if slurm_snapshot:
+            getlogger().debug(f'Loading the Slurm inventory from '
+                              f'{slurm_snapshot}')
+            inventory = SlurmInventory.from_file(slurm_snapshot)
+
+        topology_cache = None
+        if use_topology_cache:
+            topology_cache = TopologyCache(
+                topology_cache_path or default_cache_path(self.systemname),
+                refresh=refresh_topology
+            )
+            getlogger().debug(f'Using the topology cache '
+                              f'{topology_cache.path}')
+
         self._slurm_schd = self.find_scheduler(
             user_input,
             detect_containers=detect_containers,
             detect_devices=detect_devices,
             access_opt=access_opt,
-            wait=wait, tmp_dir=tmp_dir
+            wait=wait, tmp_dir=tmp_dir,
+            inventory=inventory,
+            topology_cache=topology_cache
         )
         # Launcher
         self.find_launcher(user_input)
@@ -166,6 +195,10 @@ class SystemConfig:
         if self._slurm_schd:
             # Search node types
             self._slurm_schd.search_node_types(exclude_feats)
+            if save_slurm_snapshot:
+                self._slurm_schd.inventory.save(save_slurm_snapshot)
+                getlogger().info(f'Slurm inventory saved to '
+                                 f'{save_slurm_snapshot}', color=False)
             # Start creation of the partitions if slurm is the scheduler
             self._slurm_schd.create_login_partition(user_input=user_input)
             # Initialize the asynchronous loop
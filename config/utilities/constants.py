@@ -187,7 +187,34 @@ amd_gpu_architecture = {
     "HD 7750": "Cape Verde (GCN 1)"
 }
 
-containers_detect_bash = '''
+# Prefix of the lines with the JSON document of a detection probe
+PROBE_MARKER = 'RFM_PROBE_JSON'
+
+probe_json_bash = r'''
+# Helpers to print the result of a probe as a single-line JSON document
+json_str() {
+    local s=${1//\\/\\\\}
+    s=${s//\"/\\\"}
+    s=${s//$'\t'/ }
+    printf '"%s"' "$s"
+}
+
+json_list() {
+    local sep=''
+    printf '['
+    for item in "$@"; do
+        printf '%s%s' "$sep" "$(json_str "$item")"
+        sep=', '
+    done
+    printf ']'
+}
+
+emit_probe() {
+    echo "''' + PROBE_MARKER + r''' $1"
+}
+'''
+
+containers_detect_bash = r'''
 # List of containers to check
 CONTAINERS=(
     "Sarus:sarus"
@@ -243,6 +270,7 @@ for container in "${CONTAINERS[@]}"; do
     # Check if the command exists via 'which'
     found_via_command=false
     found_via_module=false
+    modules_load=""
 
     if which "$cmd" > /dev/null 2>&1; then
         found_via_command=true
@@ -267,53 +295,80 @@ for container in "${CONTAINERS[@]}"; do
     fi
 
     # Determine the status of the container
-    if $found_via_command && $found_via_module; then
-        installed+=("$name modules: $modules_load")
-    elif $found_via_command; then
-        installed+=("$name")
-    elif $found_via_module; then
-        installed+=("$name modules: $modules_load")
-    else
-        echo "$name is not installed."
+    if $found_via_command || $found_via_module; then
+        IFS="," read -ra modules <<< "$modules_load"
+        installed+=("{\"type\": $(json_str "$name"), \"command\": $found_via_command, \"module\": $found_via_module, \"modules\": $(json_list "${modules[@]}")}")
     fi
 done
 
 # Output installed containers
-echo "Installed containers:"
-for name in "${installed[@]}"; do
-    echo "$name"
-done
+containers=$(IFS=","; echo "${installed[*]}")
+emit_probe "{\"probe\": \"containers\", \"containers\": [$containers]}"
 '''
 
-devices_detect_bash = '''
+devices_detect_bash = r'''
 # Check for NVIDIA GPUs
+nvidia_gpus=()
 if command -v nvidia-smi > /dev/null 2>&1; then
-    echo "Checking for NVIDIA GPUs..."
-    gpu_info=$(nvidia-smi --query-gpu=name --format=csv,noheader)
-
-    if [ -z "$gpu_info" ]; then
-        echo "No NVIDIA GPU found."
-    else
-        echo "NVIDIA GPUs installed:"
-        echo "$gpu_info"
-    fi
-else
-    echo "No NVIDIA GPU found or nvidia-smi command is not available."
+    while IFS= read -r gpu; do
+        [ -n "$gpu" ] && nvidia_gpus+=("$gpu")
+    done < <(nvidia-smi --query-gpu=name --format=csv,noheader 2> /dev/null)
 fi
 
 # Check for AMD GPUs (if applicable)
+amd_gpus=()
 if command -v lspci > /dev/null 2>&1; then
-    echo -e "\nChecking for AMD GPUs:"
-    if lspci | grep -i 'radeon'; then
-        lspci | grep -i 'radeon'
-    else
-        echo "No AMD GPU found."
-    fi
-else
-    echo "lspci command is not available."
+    while IFS= read -r gpu; do
+        [ -n "$gpu" ] && amd_gpus+=("$gpu")
+    done < <(lspci | grep -i 'radeon')
+fi
+
+# Network interfaces and their speed in Mb/s (-1 if unknown)
+nics=()
+for dev in /sys/class/net/*; do
+    nic=$(basename "$dev")
+    [ "$nic" = "lo" ] && continue
+    speed=$(cat "$dev/speed" 2> /dev/null)
+    [[ "$speed" =~ ^-?[0-9]+$ ]] || speed=-1
+    nics+=("{\"name\": $(json_str "$nic"), \"speed\": $speed}")
+done
+
+nics=$(IFS=","; echo "${nics[*]}")
+emit_probe "{\"probe\": \"devices\", \"nvidia\": $(json_list "${nvidia_gpus[@]}"), \"amd\": $(json_list "${amd_gpus[@]}"), \"nics\": [$nics]}"
+'''
+
+topology_detect_bash = r'''
+# CPU topology as CPU,CORE,SOCKET,NODE (NUMA) rows
+cpus=()
+model=""
+vendor=""
+if command -v lscpu > /dev/null 2>&1; then
+    while IFS= read -r cpu; do
+        cpus+=("$cpu")
+    done < <(lscpu -p=CPU,CORE,SOCKET,NODE 2> /dev/null | grep -v '^#')
+    model=$(lscpu | sed -n 's/^Model name: *//p' | head -1)
+    vendor=$(lscpu | sed -n 's/^Vendor ID: *//p' | head -1)
 fi
+
+# The microarchitecture as ReFrame detects it, with the archspec package of
+# the generator ($archspec_path) if the node does not provide one
+arch=$(PYTHONPATH="${archspec_path}${PYTHONPATH:+:$PYTHONPATH}" python3 -c 'import archspec.cpu as a; h = a.host(); print(h.name, h.vendor)' 2> /dev/null)
+read -r arch arch_vendor <<< "$arch"
+
+emit_probe "{\"probe\": \"topology\", \"platform\": $(json_str "$(uname -m)"), \"model\": $(json_str "$model"), \"vendor\": $(json_str "${arch_vendor:-$vendor}"), \"arch\": $(json_str "$arch"), \"cpus\": $(json_list "${cpus[@]}")}"
 '''
 
+# Microarchitecture (archspec name) by CPU model name, used when archspec
+# is not available on the compute nodes
+cpu_architecture = {
+    r'Neoverse-V2|Grace': 'neoverse_v2',
+    r'Neoverse-N1': 'neoverse_n1',
+    r'EPYC 7\w\w2': 'zen2',
+    r'EPYC 7\w\w3': 'zen3',
+    r'EPYC 9\w\w4|MI300A': 'zen4',
+    r'EPYC 9\w\w5': 'zen5',
+}
+
 cn_memory_bash = '''
 #!/bin/bash
 
@@ -3,14 +3,24 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import contextlib
+import datetime
+import fnmatch
 import functools
+import hashlib
 import hostlist
 import itertools
 import os
 import re
 import shutil
+import subprocess
+import tarfile
+import threading
 import time
 
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+
 import reframe.core.runtime as rt
 import reframe.core.schedulers as sched
 import reframe.utility.osext as osext
@@ -25,6 +35,96 @@ import firecrest as fc
 _run_strict = functools.partial(osext.run_command, check=True)
 
 
+def _patterns_from_env(var):
+    return [p.strip() for p in os.environ.get(var, '').split(',') if p.strip()]
+
+
+# The compression algorithms supported by the FirecREST compress and extract
+# endpoints: the archive suffix, the tarfile mode and the multi-threaded
+# programs producing compatible streams, by order of preference
+_COMPRESSIONS = {
+    'none': ('.tar', '', []),
+    'gzip': ('.tar.gz', 'gz', [['pigz']]),
+    'bzip2': ('.tar.bz2', 'bz2', [['lbzip2'], ['pbzip2']]),
+    'xz': ('.tar.xz', 'xz', [['xz', '-T0']]),
+}
+
+
+# The id of a job array task or heterogeneous job component, e.g. 123_4 or
+# 123+1, with the id of the job in the first group
+_COMPONENT_JOBID = re.compile(r'^(\d+)[_+]')
+
+# The sbatch options of job arrays and heterogeneous jobs
+_MULTI_COMPONENT_OPTION = re.compile(r'^\s*(-a|--array\b|hetjob\b)')
+
+
+def _parent_jobid(descr):
+    '''The id of the job array or heterogeneous job of a job listing entry,
+    or `None` if it is a plain job'''
+    for key in ('arrayJobId', 'hetJobId', 'array_job_id', 'het_job_id'):
+        if descr.get(key):
+            return str(descr[key])
+
+    match = _COMPONENT_JOBID.match(str(descr.get('jobId')))
+    return match.group(1) if match else None
+
+
+def _remote_mtime(entry):
+    '''The modification time of a remote file listing entry in seconds since
+    the epoch, or `None` if it is not known'''
+    mtime = entry.get('lastModified') or entry.get('last_modified')
+    if not mtime:
+        return None
+
+    try:
+        return datetime.datetime.fromisoformat(
+            str(mtime).replace('Z', '+00:00')
+        ).timestamp()
+    except ValueError:
+        return None
+
+
+@contextlib.contextmanager
+def _open_archive(path, mode, compression):
+    '''Open a tar archive for reading (``'r'``) or writing (``'w'``).
+
+    If a multi-threaded (de)compressor is available, the archive is streamed
+    through it, otherwise it falls back to the single-threaded compression of
+    the tarfile module. Archives opened through a (de)compressor can only be
+    accessed sequentially.
+    '''
+
+    _, tar_mode, programs = _COMPRESSIONS[compression]
+    command = next((p for p in programs if shutil.which(p[0])), None)
+    if command is None:
+        extra_args = {'compresslevel': 6} if tar_mode == 'gz' else {}
+        with tarfile.open(path, f'{mode}:{tar_mode}', **extra_args) as archive:
+            yield archive
+
+        return
+
+    with open(path, f'{mode}b') as fp:
+        if mode == 'w':
+            proc = subprocess.Popen(command + ['-c'],
+                                    stdin=subprocess.PIPE, stdout=fp)
+            stream = proc.stdin
+        else:
+            proc = subprocess.Popen(command + ['-dc'],
+                                    stdin=fp, stdout=subprocess.PIPE)
+            stream = proc.stdout
+
+        try:
+            with tarfile.open(fileobj=stream, mode=f'{mode}|') as archive:
+                yield archive
+        finally:
+            stream.close()
+            returncode = proc.wait()
+
+        if returncode != 0:
+            raise OSError(f'{command[0]} failed with exit code {returncode} '
+                          f'while processing {path}')
+
+
 class _SlurmFirecrestJob(sched.Job):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -33,6 +133,9 @@ class _SlurmFirecrestJob(sched.Job):
         self._remotedir = None
         self._localdir = None
 
+        # The background staging and submission of the job, if any
+        self._submit_future = None
+
         # The compacted nodelist as reported by Slurm. This must be updated
         # in every poll as Slurm may be slow in reporting the exact nodelist
         self._nodespec = None
@@ -58,6 +161,47 @@ class _SlurmFirecrestJob(sched.Job):
 
         return self._nodelist
 
+    def _wait_submission(self, block=True):
+        '''Check if the background staging and submission of the job
+        completed, waiting for it if ``block`` is set.
+
+        A failed submission is raised, since the job has no id to be polled
+        or cancelled with.
+        '''
+
+        future = self._submit_future
+        if future is not None:
+            if not block and not future.done():
+                return False
+
+            futures.wait([future])
+            self.scheduler._is_submitted(self)
+
+        if self._jobid is None and self._exception is not None:
+            raise self._exception
+
+        return True
+
+    def finished(self):
+        # The job is reported as not finished while it is being staged
+        if not self._wait_submission(block=False):
+            return False
+
+        return super().finished()
+
+    def wait(self):
+        self._wait_submission()
+        super().wait()
+
+    def cancel(self):
+        try:
+            self._wait_submission()
+        except JobSchedulerError:
+            # The job was never submitted, so there is nothing to cancel
+            return
+
+        return super().cancel()
+
 
 @register_scheduler('firecrest-slurm')
 class SlurmFirecrestJobScheduler(SlurmJobScheduler):
@@ -97,44 +241,264 @@ class SlurmFirecrestJobScheduler(SlurmJobScheduler):
 
         self._cleaned_remotedirs = set()
 
-    def make_job(self, *args, **kwargs):
-        return _SlurmFirecrestJob(*args, **kwargs)
-
-    def _push_artefacts(self, job):
-        # Compress the local stage directory; the archive is created in the
-        # current working directory, which is the job's stage directory
-        self.log('Compressing local stage directory')
-        local_archive = shutil.make_archive(
-            base_name='stage_dir_archive_push',
-            format='gztar',
-            root_dir='.',
-            base_dir='.',
+        # Pool for the per-job queries that cannot be answered by the
+        # batched job listing; the client reuses its HTTP connections
+        self._poll_pool = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('FIRECREST_POLL_WORKERS', 8))
         )
-        archive_name = os.path.basename(local_archive)
-        remote_archive = os.path.join(job._remotedir, archive_name)
 
-        # The client will upload directly small files and use the staging
-        # area (blocking until the file is on the filesystem) for large ones
-        self.log(f'Uploading stage directory archive to {job._remotedir}')
-        self.client.upload(
-            self._system_name,
-            local_archive,
-            job._remotedir,
-            archive_name
+        # Files of at least this size are pushed through a content-addressed
+        # store on the remote system and symlinked into the stage directory,
+        # so that large read-only inputs are uploaded only once; 0 disables it
+        self._dedup_min_size = int(
+            os.environ.get('FIRECREST_DEDUP_MIN_SIZE', 16 * 1024 * 1024)
+        )
+        self._store_dir = os.environ.get(
+            'FIRECREST_STORE_DIR',
+            os.path.join(self._remotedir_prefix, '.rfm-store')
         )
+        self._stored_digests = None
 
-        # The client falls back internally to a transfer job when the
-        # extraction takes too long for the api call
-        self.log(f'Extracting {remote_archive} to {job._remotedir}')
-        self.client.extract(
-            self._system_name,
-            remote_archive,
-            job._remotedir
+        # Glob patterns (relative to the stage directory) selecting the files
+        # to pull back from the remote stage directory
+        self._pull_include = _patterns_from_env('FIRECREST_PULL_INCLUDE')
+        self._pull_exclude = _patterns_from_env('FIRECREST_PULL_EXCLUDE')
+
+        # Up to this number of changed files are downloaded one by one;
+        # beyond it the remote stage directory is pulled as an archive
+        self._pull_max_files = int(
+            os.environ.get('FIRECREST_PULL_MAX_FILES', 32)
+        )
+        self._transfer_pool = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('FIRECREST_TRANSFER_WORKERS', 4))
         )
 
-        self.log('Removing local and remote archives')
-        os.remove(local_archive)
-        self.client.rm(self._system_name, remote_archive)
+        # Manifests of the files pushed to every remote stage directory
+        self._pushed_manifests = {}
+        self._store_lock = threading.Lock()
+
+        # Compression of the archives used to transfer the stage directories;
+        # multi-threaded compressors are used when available
+        self._compression = os.environ.get('FIRECREST_COMPRESSION', 'gzip')
+        if self._compression not in _COMPRESSIONS:
+            raise JobSchedulerError(
+                f'invalid FIRECREST_COMPRESSION: {self._compression!r} '
+                f'(must be one of {", ".join(_COMPRESSIONS)})'
+            )
+
+        # The staging and submission of a job run in the background, so that
+        # the next job can be prepared while the previous one is staged;
+        # 0 stages and submits every job synchronously
+        staging_workers = int(os.environ.get('FIRECREST_STAGING_WORKERS', 4))
+        self._staging_pool = (ThreadPoolExecutor(max_workers=staging_workers)
+                              if staging_workers > 0 else None)
+
+    def make_job(self, *args, **kwargs):
+        return _SlurmFirecrestJob(*args, **kwargs)
+
+    def _compression_args(self):
+        # Older clients do not accept the `compression` argument
+        if self._compression == 'gzip':
+            return {}
+
+        return {'compression': self._compression}
+
+    def _local_manifest(self, localdir, exclude=()):
+        '''Return the files (and symlinks) of the local stage directory with
+        their size and modification time, by relative path.'''
+
+        manifest = {}
+        for dirpath, dirnames, filenames in os.walk(localdir):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.relpath(os.path.join(dirpath, name), localdir)
+                if path in exclude:
+                    continue
+
+                st = os.lstat(os.path.join(localdir, path))
+                manifest[path] = (st.st_size, st.st_mtime_ns)
+
+        return manifest
+
+    def _is_dedup_candidate(self, size):
+        return self._dedup_min_size > 0 and size >= self._dedup_min_size
+
+    def _push_to_store(self, job, path):
+        # Upload the file to the content-addressed store, unless a file with
+        # the same content is already there, and link it in the remote stage
+        # directory
+        local_path = os.path.join(job._localdir, path)
+        digest = hashlib.sha256()
+        with open(local_path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(1 << 20), b''):
+                digest.update(chunk)
+
+        digest = digest.hexdigest()
+        stored_path = os.path.join(self._store_dir, digest)
+
+        # Jobs are staged concurrently, so make sure that the same content
+        # is not uploaded twice
+        with self._store_lock:
+            if self._stored_digests is None:
+                try:
+                    self._stored_digests = {
+                        f['name'] for f in self.client.list_files(
+                            self._system_name, self._store_dir
+                        )
+                    }
+                except fc.FirecrestException:
+                    self.client.mkdir(self._system_name, self._store_dir,
+                                      create_parents=True)
+                    self._stored_digests = set()
+
+            if digest not in self._stored_digests:
+                self.log(f'Uploading {path} to {stored_path}')
+                self.client.upload(self._system_name, local_path,
+                                   self._store_dir, digest)
+                self._stored_digests.add(digest)
+            else:
+                self.log(f'Reusing {stored_path} for {path}')
+
+        self.client.symlink(self._system_name, stored_path,
+                            os.path.join(job._remotedir, path))
+
+    def _push_artefacts(self, job):
+        # Only the files that are new or changed since the last push to the
+        # same remote stage directory are transferred
+        archive_name = ('stage_dir_archive_push' +
+                        _COMPRESSIONS[self._compression][0])
+        localdir = job._localdir
+        manifest = self._local_manifest(localdir, exclude={archive_name})
+        pushed = self._pushed_manifests.get(job._remotedir, {})
+        changed = [path for path, sig in manifest.items()
+                   if pushed.get(path) != sig]
+        deduplicated = [
+            path for path in changed
+            if self._is_dedup_candidate(manifest[path][0]) and
+            not os.path.islink(os.path.join(localdir, path))
+        ]
+        archived = [path for path in changed if path not in deduplicated]
+
+        if archived or not pushed:
+            # Compress the changed files of the local stage directory in an
+            # archive created in the stage directory itself. Directories are
+            # always added so that the remote tree is complete.
+            self.log(f'Compressing {len(archived)} file(s) of the local '
+                     f'stage directory {localdir}')
+            local_archive = os.path.join(localdir, archive_name)
+            with _open_archive(local_archive, 'w',
+                               self._compression) as archive:
+                for dirpath, dirnames, _ in os.walk(localdir):
+                    for name in dirnames:
+                        path = os.path.join(dirpath, name)
+                        archive.add(path,
+                                    arcname=os.path.relpath(path, localdir),
+                                    recursive=False)
+
+                for path in archived:
+                    archive.add(os.path.join(localdir, path), arcname=path,
+                                recursive=False)
+
+            remote_archive = os.path.join(job._remotedir, archive_name)
+
+            # The client will upload directly small files and use the staging
+            # area (blocking until the file is on the filesystem) for large
+            # ones
+            self.log(f'Uploading stage directory archive to {job._remotedir}')
+            self.client.upload(
+                self._system_name,
+                local_archive,
+                job._remotedir,
+                archive_name
+            )
+
+            # The client falls back internally to a transfer job when the
+            # extraction takes too long for the api call
+            self.log(f'Extracting {remote_archive} to {job._remotedir}')
+            self.client.extract(
+                self._system_name,
+                remote_archive,
+                job._remotedir,
+                **self._compression_args()
+            )
+
+            self.log('Removing local and remote archives')
+            os.remove(local_archive)
+            self.client.rm(self._system_name, remote_archive)
+
+        for path in deduplicated:
+            if path in pushed:
+                # Replace the link to the previous content
+                self.client.rm(self._system_name,
+                               os.path.join(job._remotedir, path))
+
+            self._push_to_store(job, path)
+
+        self._pushed_manifests[job._remotedir] = manifest
+
+    def _should_pull(self, path):
+        if self._pull_include and not any(
+            fnmatch.fnmatch(path, p) for p in self._pull_include
+        ):
+            return False
+
+        return not any(fnmatch.fnmatch(path, p) for p in self._pull_exclude)
+
+    def _list_remote_files(self, remotedir):
+        '''Return the files of the remote stage directory by relative path.
+
+        Returns `None` if the directory tree is too large to be listed with
+        one request per directory.
+        '''
+
+        files = {}
+        dirs = ['']
+        num_requests = 0
+        while dirs:
+            num_requests += 1
+            if num_requests > self._pull_max_files:
+                return None
+
+            rel_dir = dirs.pop()
+            for entry in self.client.list_files(
+                self._system_name, os.path.join(remotedir, rel_dir),
+                show_hidden=True
+            ):
+                path = os.path.join(rel_dir, entry['name'])
+                if entry.get('type') == 'd':
+                    dirs.append(path)
+                else:
+                    files[path] = entry
+
+        return files
+
+    def _is_unchanged(self, path, entry, pushed):
+        # Links to the store are never pulled back; other pushed or pulled
+        # files are considered unchanged if neither their size nor their
+        # modification time changed
+        if entry.get('type') == 'l':
+            target = entry.get('linkTarget') or ''
+            if target.startswith(self._store_dir):
+                return True
+
+        if path not in pushed:
+            return False
+
+        size, mtime_ns = pushed[path]
+        remote_mtime = _remote_mtime(entry)
+        return (str(size) == str(entry.get('size')) and
+                remote_mtime is not None and
+                abs(remote_mtime - mtime_ns / 1e9) < 1)
+
+    def _record_pulled(self, job, paths):
+        # The pulled files are in sync with the remote stage directory, so
+        # that they are neither pushed nor pulled again if unchanged
+        manifest = self._pushed_manifests.setdefault(job._remotedir, {})
+        for path in paths:
+            local_path = os.path.join(job._localdir, path)
+            with contextlib.suppress(OSError):
+                st = os.lstat(local_path)
+                manifest[path] = (st.st_size, st.st_mtime_ns)
 
     def _pull_artefacts(self, job):
         def _download(remote_path, local_path):
@@ -158,14 +522,46 @@ class SlurmFirecrestJobScheduler(SlurmJobScheduler):
 
             return
 
+        pushed = self._pushed_manifests.get(job._remotedir, {})
+        try:
+            remote_files = self._list_remote_files(job._remotedir)
+        except fc.FirecrestException as e:
+            self.log(f'Could not list {job._remotedir}: {e}')
+            remote_files = None
+
+        if remote_files is not None:
+            to_pull = [
+                path for path, entry in sorted(remote_files.items())
+                if self._should_pull(path) and
+                not self._is_unchanged(path, entry, pushed)
+            ]
+            if len(to_pull) <= self._pull_max_files:
+                def _pull_file(path):
+                    local_path = os.path.join(job._localdir, path)
+                    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                    _download(os.path.join(job._remotedir, path), local_path)
+
+                    # Keep the remote modification time, as when extracting
+                    # an archive, to detect the later changes
+                    mtime = _remote_mtime(remote_files[path])
+                    if mtime is not None and not os.path.islink(local_path):
+                        os.utime(local_path, (mtime, mtime))
+
+                # Consume the iterator to propagate the errors
+                list(self._transfer_pool.map(_pull_file, to_pull))
+                self._record_pulled(job, to_pull)
+                return
+
         # Compress the remote stage directory; the client falls back
         # internally to a transfer job when the compression takes too long
-        remote_archive = f'{job._remotedir}_pull.tar.gz'
+        remote_archive = (f'{job._remotedir}_pull' +
+                          _COMPRESSIONS[self._compression][0])
         self.log(f'Compressing remote stage directory {job._remotedir}')
         self.client.compress(
             self._system_name,
             job._remotedir,
-            remote_archive
+            remote_archive,
+            **self._compression_args()
         )
 
         local_archive = os.path.join(
@@ -175,12 +571,32 @@ class SlurmFirecrestJobScheduler(SlurmJobScheduler):
         _download(remote_archive, local_archive)
 
         # The archive contains the stage directory as its top-level entry,
-        # so extract it in the parent directory of the local stage directory
+        # so extract it in the parent directory of the local stage directory;
+        # members are extracted while the archive is being decompressed
         self.log(f'Extracting {local_archive} to {job._localdir}')
-        _run_strict(
-            f'tar -xzf {local_archive} -C {os.path.dirname(job._localdir)}'
-        )
+        extract_args = {}
+        if hasattr(tarfile, 'fully_trusted_filter'):
+            extract_args['filter'] = 'fully_trusted'
+
+        pulled = []
+        with _open_archive(local_archive, 'r', self._compression) as archive:
+            for member in archive:
+                path = os.path.relpath(member.name, os.path.basename(
+                    job._remotedir.rstrip('/')
+                ))
+                if member.issym() and member.linkname.startswith(
+                    self._store_dir
+                ):
+                    # The local copy of deduplicated files is kept
+                    continue
+
+                if member.isdir() or path == '.' or self._should_pull(path):
+                    archive.extract(member, os.path.dirname(job._localdir),
+                                    **extract_args)
+                    if not member.isdir():
+                        pulled.append(path)
 
+        self._record_pulled(job, pulled)
         self.log('Removing local and remote archives')
         os.remove(local_archive)
         self.client.rm(self._system_name, remote_archive)
@@ -198,6 +614,18 @@ class SlurmFirecrestJobScheduler(SlurmJobScheduler):
                 os.path.relpath(os.getcwd(), job._stage_prefix)
             )
 
+        if self._staging_pool is None:
+            self._stage_and_submit(job)
+        else:
+            # The job id becomes available once the submission completes;
+            # until then the job is reported as not finished, while waiting
+            # for or cancelling the job blocks until it is submitted
+            job._submit_time = time.time()
+            job._submit_future = self._staging_pool.submit(
+                self._stage_and_submit, job
+            )
+
+    def _stage_and_submit(self, job):
         if job._remotedir not in self._cleaned_remotedirs:
             # Create a clean stage directory in the remote system
             try:
@@ -248,30 +676,47 @@ class SlurmFirecrestJobScheduler(SlurmJobScheduler):
         job._jobid = str(submission_result['jobId'])
         job._submit_time = time.time()
 
+    def _is_submitted(self, job):
+        '''Check if the background submission of the job completed.
+
+        A failed submission is recorded as the exception of the job, which
+        is raised when checking if the job has finished.
+        '''
+
+        future = job._submit_future
+        if future is None:
+            return True
+
+        if not future.done():
+            return False
+
+        job._submit_future = None
+        exc = future.exception()
+        if exc is None:
+            return True
+
+        if isinstance(exc, JobSchedulerError):
+            job._exception = exc
+        else:
+            job._exception = JobSchedulerError(
+                f'could not submit job: {exc}'
+            )
+            job._exception.__cause__ = exc
+
+        return False
+
     def poll(self, *jobs):
         '''Update the status of the jobs.'''
 
         if jobs:
-            # Filter out non-jobs
-            jobs = [job for job in jobs if job is not None]
+            # Filter out non-jobs and jobs that are still being submitted
+            jobs = [job for job in jobs
+                    if job is not None and self._is_submitted(job)]
 
         if not jobs:
             return
 
-        job_info = {}
-        for job in jobs:
-            try:
-                res = self.client.job_info(self._system_name, job.jobid)
-            except fc.FirecrestException as e:
-                if e.responses[-1].status_code == 404:
-                    # The job may not be yet in the scheduler's database
-                    continue
-
-                raise JobSchedulerError(
-                    'could not retrieve the job information') from e
-
-            if res:
-                job_info[job.jobid] = res
+        job_info = self._jobs_info(jobs)
 
         pending_reasons = {}
         for job in jobs:
@@ -306,6 +751,68 @@ class SlurmFirecrestJobScheduler(SlurmJobScheduler):
         self._cancel_if_blocked(jobs, pending_reasons)
         self._cancel_if_pending_too_long(jobs)
 
+    def _jobs_info(self, jobs):
+        '''Retrieve the job descriptions of the given jobs.
+
+        With more than one job, all the jobs of the user are first retrieved
+        with a single request. Jobs missing from that listing (e.g. jobs that
+        finished and were purged from the controller, or if the listing
+        fails) are queried individually and concurrently.
+        '''
+
+        job_info = {}
+        if len(jobs) > 1:
+            try:
+                descriptions = self.client.job_info(self._system_name)
+            except fc.FirecrestException as e:
+                self.log(f'could not list the jobs, falling back to '
+                         f'per-job queries: {e}')
+                descriptions = []
+
+            # The tasks of job arrays and the components of heterogeneous
+            # jobs may be listed without their parent id, so that only some
+            # of them would be found; such jobs are queried individually
+            jobids = {job.jobid for job in jobs
+                      if not self._has_components(job)}
+            for descr in descriptions or []:
+                jobid = str(descr.get('jobId'))
+                parent = _parent_jobid(descr)
+                if jobid in jobids:
+                    job_info.setdefault(jobid, []).append(descr)
+                elif parent in jobids:
+                    job_info.setdefault(parent, []).append(descr)
+
+        missing = [job for job in jobs if job.jobid not in job_info]
+        if len(missing) == 1:
+            results = [self._job_info(missing[0])]
+        else:
+            results = self._poll_pool.map(self._job_info, missing)
+
+        for job, res in zip(missing, results):
+            if res:
+                job_info[job.jobid] = res
+
+        return job_info
+
+    @staticmethod
+    def _has_components(job):
+        '''Whether the job is a job array or a heterogeneous job'''
+        return job.is_array or any(
+            _MULTI_COMPONENT_OPTION.match(opt)
+            for opt in job.options + job.cli_options
+        )
+
+    def _job_info(self, job):
+        try:
+            return self.client.job_info(self._system_name, job.jobid)
+        except fc.FirecrestException as e:
+            if e.responses[-1].status_code == 404:
+                # The job may not be yet in the scheduler's database
+                return None
+
+            raise JobSchedulerError(
+                'could not retrieve the job information') from e
+
     def _job_state(self, job_descr):
         state = job_descr['status'].get('state', '')
         if isinstance(state, list):
@@ -359,6 +866,11 @@ class SlurmFirecrestJobScheduler(SlurmJobScheduler):
             self._merge_files(job)
 
     def cancel(self, job):
+        try:
+            job._wait_submission()
+        except JobSchedulerError:
+            return
+
         self.client.cancel_job(self._system_name, job.jobid)
         job._is_cancelling = True
 
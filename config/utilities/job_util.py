@@ -6,26 +6,44 @@
 import asyncio
 import fnmatch
 import grp
+import importlib.util
+import json
 import os
 import re
+import shlex
 import shutil
 import subprocess
 import sys
 import tempfile
 from contextlib import contextmanager
 from typing import Union
-from utilities.constants import (amd_gpu_architecture,
+from utilities.constants import (PROBE_MARKER,
+                                 amd_gpu_architecture,
                                  containers_detect_bash,
+                                 cpu_architecture,
                                  devices_detect_bash,
                                  nvidia_gpu_architecture,
-                                 resources)
+                                 probe_json_bash,
+                                 resources,
+                                 topology_detect_bash)
 from utilities.io import (getlogger, status_bar, user_descr,
                           user_integer, user_selection, user_yn)
+from utilities.slurm_inventory import SlurmInventory
+from utilities.topology_cache import TopologyCache
 
 WDIR = os.getcwd()
 TIME_OUT_POLICY = 200
 
 
+def _archspec_path() -> str:
+    '''The directory of the archspec package of ReFrame, if installed'''
+    spec = importlib.util.find_spec('archspec')
+    if spec is None or not spec.submodule_search_locations:
+        return ''
+
+    return os.path.dirname(list(spec.submodule_search_locations)[0])
+
+
 @contextmanager
 def change_dir(destination: str):
     try:
@@ -144,7 +162,9 @@ class SlurmContext:
 
     def __init__(self, modules_system: str, detect_containers: bool = True,
                  detect_devices: bool = True, wait: bool = True,
-                 access_opt: list = [], tmp_dir: str = None):
+                 access_opt: list = [], tmp_dir: str = None,
+                 inventory: Union[SlurmInventory, None] = None,
+                 topology_cache: Union[TopologyCache, None] = None):
         self.node_types = []
         self.default_nodes = []
         self.reservations = []
@@ -158,6 +178,8 @@ class SlurmContext:
         self._job_poll = []  # Job id's to poll
         self._p_n = 0  # Number of partitions created
         self._keep_tmp_dir = False
+        self._inventory = inventory
+        self._topology_cache = topology_cache
         if not tmp_dir:
             self.TMP_DIR = tempfile.mkdtemp(
                 prefix='reframe_config_detection_', dir=os.getenv('SCRATCH'))
@@ -165,36 +187,28 @@ class SlurmContext:
             self.TMP_DIR = tempfile.mkdtemp(
                 prefix='reframe_config_detection_', dir=tmp_dir)
 
+    @property
+    def inventory(self) -> SlurmInventory:
+        '''Snapshot of the Slurm nodes, partitions and reservations'''
+        if self._inventory is None:
+            getlogger().debug('Retrieving the Slurm inventory...')
+            self._inventory = SlurmInventory.from_scontrol()
+
+        return self._inventory
+
     def search_node_types(self, exclude_feats: list = []):
 
         getlogger().debug('Filtering nodes based on ActiveFeatures...')
         try:
-            nodes_info = subprocess.run(
-                'scontrol show nodes -o | grep "ActiveFeatures"',
-                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                universal_newlines=True, check=True, shell=True
-            )
-            nodes_info = nodes_info.stdout
-            raw_node_types = re.findall(
-                r'ActiveFeatures=([^ ]+) .*? Partitions=([^ ]+)', nodes_info)
-            # Unique combinations of features and partitions
-            raw_node_types = set(raw_node_types)
             # List of [[features, partition]...]
-            raw_node_types = [[tuple(n[0].split(',')), tuple(
-                n[1].split(','))] for n in raw_node_types]
+            raw_node_types = [list(n) for n in self.inventory.node_types()]
         except Exception:
             getlogger().error(
                 'Node types could not be retrieved from scontrol'
             )
             return
 
-        default_partition = subprocess.run(
-            'scontrol show partitions -o | grep "Default=YES"',
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            universal_newlines=True, check=True, shell=True
-        )
-        default_partition = re.findall(
-            r'PartitionName=([\w]+)', default_partition.stdout)[0]
+        default_partition = self.inventory.default_partition
         getlogger().debug(f'Detected default partition: {default_partition}')
         if not default_partition:
             default_partition = None
@@ -255,20 +269,15 @@ class SlurmContext:
 
         getlogger().debug(
             f'Detecting devices for node with features {node_feats}...')
-        devices = subprocess.run(
-            'scontrol show nodes -o | grep '
-            f'"ActiveFeatures=.*{".*,.*".join(node_feats)}.*"',
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            universal_newlines=True, check=True, shell=True)
-        try:
-            devices_raw = re.findall(r'Gres=([\w,:()]+)', devices.stdout)[0]
-        except Exception:
+        devices_raw = [gres for gres in self.inventory.gres(node_feats)
+                       if gres]
+        if not devices_raw:
             getlogger().warning('Unable to detect the devices in the node')
             return None
 
-        devices = [item.rsplit(':', 1)[0]
-                   for item in devices_raw.split(',')]  # Remove the number
-        devices = [','.join(devices)]
+        devices = {','.join(item.rsplit(':', 1)[0]
+                            for item in gres.split(','))
+                   for gres in devices_raw}  # Remove the number
         if len(devices) > 1:
             # This means that the nodes with this set of features
             # do not all have the same devices installed. If the
@@ -280,32 +289,24 @@ class SlurmContext:
                                 'Please check the devices option in '
                                 'the configuration file.')
             return None
-        elif '(null)' in list(devices) or 'gpu' not in next(iter(devices)):
-            # Detects if the nodes have no devices installed at
-            # all or if not GPUs are installed
+        elif 'gpu' not in next(iter(devices)):
+            # Detects if not GPUs are installed
             getlogger().debug('No devices were found for this node type.')
             return None
         else:
             getlogger().debug('Detected GPUs.')
             # We only reach here if the devices installation
-            # is homogeneous accross the nodes
-            return self._count_gpus(devices_raw)
+            # is homogeneous accross the nodes; the minimum number
+            # of GPUs in the nodes is kept
+            return self._count_gpus(','.join(devices_raw))
 
-    @staticmethod
-    def _get_access_partition(node_feats: list) -> Union[str, None]:
-
-        nd_partitions = subprocess.run(
-            'scontrol show nodes -o | grep '
-            f'"ActiveFeatures=.*{".*,.*".join(node_feats)}.*"',
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            universal_newlines=True, check=True, shell=True)
-        nd_partitions = re.findall(
-            r'Partitions=([\w,:()]+)', nd_partitions.stdout)
-        nd_partitions = set(nd_partitions)
-        if len(nd_partitions) > 1:
+    def _get_access_partition(self, node_feats: list) -> Union[str, None]:
+
+        nd_partitions = self.inventory.partitions(node_feats)
+        if len(nd_partitions) != 1:
             return None
         else:
-            nd_partitions = nd_partitions.pop().split(",")
+            nd_partitions = nd_partitions.pop()
             for n_f in node_feats:
                 if n_f in nd_partitions:
                     return f'-p{n_f}'
@@ -343,16 +344,8 @@ class SlurmContext:
     def search_reservations(self):
 
         getlogger().debug('Searching for reservations...')
-        reservations_info = subprocess.run(
-            'scontrol show res | grep "ReservationName"',
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            universal_newlines=True, check=True, shell=True
-        )
-        reservations_info = reservations_info.stdout
         # Detecting the different types of nodes in the system
-        reservations = None
-        reservations = re.findall(
-            r'ReservationName=([\w-]+)', reservations_info)
+        reservations = self.inventory.reservations
         self.reservations = reservations
         if not reservations:
             getlogger().warning('Unable to retrieve reservations')
@@ -432,7 +425,9 @@ class SlurmContext:
                  'launcher':   'local'})
 
     async def create_remote_partition(self, node_feats: tuple, launcher: str,
-                                      scheduler: str, user_input: bool = True):
+                                      scheduler: str, user_input: bool = True,
+                                      batch: Union['DetectionBatch',
+                                                   None] = None):
 
         node_features = list(node_feats)
         _detect_devices = self._detect_devices
@@ -456,6 +451,7 @@ class SlurmContext:
             time_limit = '10m'
             container_platforms = []
             devices = []
+            processor = {}
 
             # If user_input requested, these values will be changed according
             if user_input:
@@ -502,15 +498,57 @@ class SlurmContext:
 
             # Handle the job submission only if required
             if _detect_devices or _detect_containers:
-                self._keep_tmp_dir = True
                 # All this must be inside a function
                 remote_job = JobRemoteDetect(
                     self.TMP_DIR, _detect_containers, _detect_devices)
-                access_partition = self._get_access_partition(node_features)
-                access_options = await remote_job.job_submission(
-                    name, access_options, access_node,
-                    access_partition, wait=self._wait
-                )
+                cache_key = None
+                cached = None
+                if self._topology_cache is not None:
+                    # A change of the active features of the nodes, e.g.
+                    # of their software, invalidates the cached detection
+                    cache_key = self._topology_cache.key(
+                        node_feats,
+                        self.inventory.hardware_signature(node_features,
+                                                          features=True),
+                        _detect_containers, _detect_devices
+                    )
+                    cached = self._topology_cache.get(node_feats, cache_key)
+
+                if cached:
+                    getlogger().info(
+                        f'Reusing the cached detection of partition "{name}"'
+                    )
+                    remote_job.restore(cached)
+                    access_options += cached['access']
+                else:
+                    self._keep_tmp_dir = True
+                    access_partition = self._get_access_partition(
+                        node_features)
+                    num_access_options = len(access_options)
+                    if batch is not None:
+                        # Nodes with the same hardware are probed only once
+                        probe_key = (
+                            self.inventory.hardware_signature(node_features),
+                            _detect_containers, bool(_detect_devices)
+                        )
+                        access_options = await batch.submit(
+                            node_feats, probe_key, remote_job, name,
+                            access_options, access_node, access_partition
+                        )
+                    else:
+                        access_options = await remote_job.job_submission(
+                            name, access_options, access_node,
+                            access_partition, wait=self._wait
+                        )
+
+                    # Only the detections that parsed the output of every
+                    # probe are cached, with the access options that worked
+                    if cache_key and remote_job.detected:
+                        self._topology_cache.put(node_feats, cache_key, dict(
+                            remote_job.snapshot(),
+                            access=access_options[num_access_options:]
+                        ))
+
                 if not self._wait and remote_job.job_id:
                     self._job_poll.append(remote_job.job_id)
                     # Here, the job failed or the output was already read
@@ -547,6 +585,14 @@ class SlurmContext:
                         devices = self._check_gpus_count(
                             _detect_devices, remote_job.devices)
 
+                    if remote_job.nics:
+                        getlogger().debug(
+                            f'Network interfaces in partition "{name}": '
+                            f'{remote_job.nics}'
+                        )
+
+                    processor = remote_job.processor
+
             elif access_node:
                 # No jobs were launched so we cannot check the access options
                 access_options.append(access_node)
@@ -565,6 +611,7 @@ class SlurmContext:
                  'access':     access_options,
                  'features':   node_features+['remote'],
                  'devices':    devices,
+                 'processor':  processor,
                  'container_platforms': container_platforms}
             )
         else:
@@ -639,10 +686,23 @@ class SlurmContext:
         # await asyncio.gather(*(self.create_remote_partition(node,launcher,
         # scheduler, user_input) for node in self.node_types))
 
+        # The detection jobs of all the node types are gathered and
+        # submitted together once every node type was processed
+        batch = None
+        if self._wait:
+            batch = DetectionBatch(self.TMP_DIR, self.node_types)
+
+        async def _create_partition(node):
+            try:
+                await self.create_remote_partition(
+                    node, launcher, scheduler, user_input, batch
+                )
+            finally:
+                if batch is not None:
+                    batch.leave(node)
+
         all_partitions = asyncio.ensure_future(asyncio.gather(
-            *(self.create_remote_partition(
-                node, launcher, scheduler, user_input
-            ) for node in self.node_types)))
+            *(_create_partition(node) for node in self.node_types)))
 
         status_task = None
         try:
@@ -670,6 +730,8 @@ class SlurmContext:
                     '\nNo partitions were created, ReFrame '
                     'requires at least one.\n'
                 )
+            if self._topology_cache is not None:
+                self._topology_cache.save()
             # Remove unused temp dir or print it
             if self._keep_tmp_dir:
                 getlogger().info(
@@ -689,6 +751,91 @@ class SlurmContext:
             sys.stdout.flush()
 
 
+class DetectionBatch:
+    '''Detection jobs of several node types submitted together
+
+    The detection jobs are gathered until every node type either submitted
+    its job or finished without one. The jobs are then submitted as a
+    single heterogeneous job, probing only once the node types with the same
+    hardware. The jobs of the components that failed are submitted
+    separately, retrying with the alternative access options.
+    '''
+
+    def __init__(self, tmp_dir: str, node_types: set):
+        self.TMP_DIR = tmp_dir
+        self._waiting = set(node_types)
+        self._probes = []
+
+    async def submit(self, node_feats: tuple, probe_key: tuple,
+                     remote_job: 'JobRemoteDetect', partition_name: str,
+                     access_options: list, access_node: Union[str, list],
+                     access_partition: Union[str, None]) -> list:
+        '''Wait for the detection job to be submitted and completed
+
+        Returns the access options that worked.
+        '''
+        probe = {'key': probe_key, 'job': remote_job,
+                 'name': partition_name, 'access_options': access_options,
+                 'access_node': access_node,
+                 'access_partition': access_partition,
+                 'done': asyncio.get_event_loop().create_future()}
+        self._probes.append(probe)
+        self.leave(node_feats)
+        await probe['done']
+        return probe['access_options']
+
+    def leave(self, node_feats: tuple):
+        '''Mark the node type as processed'''
+        if node_feats not in self._waiting:
+            return
+
+        self._waiting.remove(node_feats)
+        if not self._waiting and self._probes:
+            asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            groups = {}
+            for probe in self._probes:
+                groups.setdefault(probe['key'], []).append(probe)
+
+            leaders = [group[0] for group in groups.values()]
+            failed = leaders
+            if len(leaders) > 1:
+                failed = await JobRemoteDetect(
+                    self.TMP_DIR).het_job_submission(leaders)
+
+            await asyncio.gather(*(self._submit_one(p) for p in failed))
+
+            for group in groups.values():
+                leader = group[0]
+                for probe in group[1:]:
+                    getlogger().debug(
+                        f'Reusing the detection of partition '
+                        f'"{leader["name"]}" for "{probe["name"]}"'
+                    )
+                    probe['job'].restore(leader['job'].snapshot())
+                    probe['job'].detected = leader['job'].detected
+                    if probe['access_node']:
+                        probe['access_options'].append(
+                            f'--constraint="{probe["access_node"]}"'
+                        )
+        except Exception as e:
+            for probe in self._probes:
+                if not probe['done'].done():
+                    probe['done'].set_exception(e)
+        else:
+            for probe in self._probes:
+                probe['done'].set_result(None)
+
+    @staticmethod
+    async def _submit_one(probe: dict):
+        probe['access_options'] = await probe['job'].job_submission(
+            probe['name'], probe['access_options'], probe['access_node'],
+            probe['access_partition'], wait=True
+        )
+
+
 class JobRemoteDetect:
     '''Job to detect information about the remote nodes'''
 
@@ -702,6 +849,13 @@ class JobRemoteDetect:
     )
     _SBATCH_FILE = 'autodetection_{partition_name}.sh'
     _OUTPUT_FILE = 'config_autodetection_{partition_name}.out'
+    _PROBE_FILE = 'autodetection_probe_{partition_name}.sh'
+    _HET_JOB_NAME = 'node_types'
+
+    # The exit status of every component, printed by the heterogeneous job
+    _COMPONENT_STATUS = re.compile(
+        r'^Detection component (\d+) exited with status (\d+)$', re.M
+    )
 
     def __init__(self, tmp_dir: str, detect_containers: bool = True,
                  detect_devices: bool = True):
@@ -709,6 +863,9 @@ class JobRemoteDetect:
         self._detect_devices = detect_devices
         self.container_platforms = []
         self.devices = {}
+        self.processor = {}
+        self.nics = []
+        self.detected = False
         self.job_id = None
         self.TMP_DIR = tmp_dir
 
@@ -720,12 +877,124 @@ class JobRemoteDetect:
                     partition_name=partition_name))
                 for access in access_options:
                     file.write(f"#SBATCH {access}\n")
-                if self._detect_containers:
-                    file.write(containers_detect_bash)
-                file.write("\n")
-                file.write("\n")
-                if self._detect_devices:
-                    file.write(devices_detect_bash)
+                file.write(self._probe_commands())
+
+    def _probe_commands(self) -> str:
+        commands = probe_json_bash
+        if self._detect_containers:
+            commands += containers_detect_bash
+        if self._detect_devices:
+            commands += devices_detect_bash
+
+        # The processor topology is always detected since it is cheap
+        commands += f'archspec_path={shlex.quote(_archspec_path())}\n'
+        commands += topology_detect_bash
+        return commands
+
+    @staticmethod
+    def _het_partition(probe: dict) -> bool:
+        '''Whether the partition of the probe must be requested explicitly
+        in its component of the heterogeneous job'''
+        return bool(probe['access_partition']) and not any(
+            opt.startswith(('-p', '--partition'))
+            for opt in probe['access_options']
+        )
+
+    async def het_job_submission(self, probes: list) -> list:
+        '''Submit the detection jobs as components of a heterogeneous job
+
+        Every component runs the detection script of one partition and
+        writes its own output file. Returns the probes of the components
+        that failed or did not report all the probes.
+        '''
+        with change_dir(self.TMP_DIR):
+            with open(self._SBATCH_FILE.format(
+                    partition_name=self._HET_JOB_NAME), 'w') as file:
+                file.write(self._SBATCH_HEADER.format(
+                    partition_name=self._HET_JOB_NAME))
+                for i, probe in enumerate(probes):
+                    if i > 0:
+                        file.write('#SBATCH hetjob\n'
+                                   '#SBATCH --ntasks=1\n'
+                                   '#SBATCH --time=0:2:0\n')
+                    for access in probe['access_options']:
+                        file.write(f'#SBATCH {access}\n')
+                    if self._het_partition(probe):
+                        file.write(f'#SBATCH {probe["access_partition"]}\n')
+                    if probe['access_node']:
+                        file.write(f'#SBATCH --constraint='
+                                   f'"{probe["access_node"]}"\n')
+
+                file.write('\npids=()\n')
+                for i, probe in enumerate(probes):
+                    probe_file = self._PROBE_FILE.format(
+                        partition_name=probe['name'])
+                    with open(probe_file, 'w') as probe_script:
+                        probe_script.write('#!/bin/bash\n')
+                        probe_script.write(probe['job']._probe_commands())
+
+                    output = self._OUTPUT_FILE.format(
+                        partition_name=probe['name'])
+                    file.write(f'srun --het-group={i} --output={output} '
+                               f'--error={output} bash {probe_file} &\n'
+                               f'pids+=($!)\n')
+
+                # A bare wait does not report the failed components
+                file.write('\nstatus=0\n'
+                           'for i in "${!pids[@]}"; do\n'
+                           '    wait "${pids[$i]}"\n'
+                           '    code=$?\n'
+                           '    echo "Detection component $i exited with '
+                           'status $code"\n'
+                           '    [ $code -eq 0 ] || status=1\n'
+                           'done\n'
+                           'exit $status\n')
+
+        getlogger().debug(
+            f'Submitting the detection jobs of {len(probes)} partitions '
+            'as a heterogeneous job'
+        )
+        job_exec = await self._submit_job(self._HET_JOB_NAME, wait=True)
+        status = {}
+        if job_exec != 'cancelled':
+            status = self._component_status()
+
+        failed = []
+        for i, probe in enumerate(probes):
+            if (status.get(i) != 0 or
+                    not probe['job']._extract_info(probe['name'])):
+                failed.append(probe)
+                continue
+
+            if self._het_partition(probe):
+                probe['access_options'].append(probe['access_partition'])
+            if probe['access_node']:
+                probe['access_options'].append(
+                    f'--constraint="{probe["access_node"]}"'
+                )
+
+        if failed:
+            getlogger().warning(
+                f'\n{len(failed)} of the {len(probes)} components of the '
+                'heterogeneous detection job failed, submitting one job '
+                'per partition for them...'
+            )
+
+        return failed
+
+    def _component_status(self) -> dict:
+        '''The exit status of the components of the heterogeneous job'''
+        file_path = os.path.join(self.TMP_DIR, self._OUTPUT_FILE.format(
+            partition_name=self._HET_JOB_NAME
+        ))
+        try:
+            with open(file_path) as file:
+                output = file.read()
+        except OSError:
+            return {}
+
+        return {int(i): int(code)
+                for i, code in self._COMPONENT_STATUS.findall(output)}
 
     async def _submit_job(self, partition_name: str,
                           wait: bool) -> Union[bool, None, str]:
@@ -829,102 +1098,175 @@ class JobRemoteDetect:
         return access_options  # return the access options that worked
 
     @staticmethod
-    def _parse_devices(file_path: str) -> dict:
-        '''Extract the information about the GPUs from the job output'''
-        gpu_info = {}  # Initialize the dict for GPU info
-        nvidia_gpus_found = False
-        amd_gpus_found = False
-
+    def _read_probes(file_path: str):
+        '''Yield the JSON documents of the probes in the job output'''
         with open(file_path, 'r') as file:
-            lines = file.readlines()
-
-        for line in lines:
-            # Check for NVIDIA GPUs
-            if "NVIDIA GPUs installed" in line:
-                nvidia_gpus_found = True
-            elif line == '\n':
-                nvidia_gpus_found = False
-            elif not line or "Batch Job Summary" in line:
-                break
-            elif nvidia_gpus_found:
-                model = [
-                    gpu_m for gpu_m in nvidia_gpu_architecture
-                    if gpu_m in line
-                ]
-                if len(model) > 1:
-                    model = []
-                if model:
-                    if model[0] not in gpu_info:
-                        gpu_info.update({model[0]: 1})
-                    else:
-                        gpu_info[model[0]] += 1
-
-            # Check for AMD GPUs
-            if "AMD GPUs" in line:
-                amd_gpus_found = True
-                amd_lines = []
-            elif line == '\n' or "lspci" in line:
-                amd_gpus_found = False
-            elif not line or "Batch Job Summary" in line:
-                break
-            elif amd_gpus_found:
-                if line not in amd_lines:
-                    amd_lines.append(line)
-                    model = [
-                        gpu_m for gpu_m in amd_gpu_architecture
-                        if gpu_m in line
-                    ]
-                    if len(model) > 1:
-                        model = []
-                    if model:
-                        if model[0] not in gpu_info:
-                            gpu_info.update({model[0]: 1})
-                        else:
-                            gpu_info[model[0]] += 1
-                else:
-                    pass
+            for line in file:
+                if not line.startswith(PROBE_MARKER):
+                    continue
+
+                try:
+                    yield json.loads(line[len(PROBE_MARKER):])
+                except json.JSONDecodeError:
+                    getlogger().warning(
+                        f'Unable to parse a detection probe in {file_path}'
+                    )
+
+    @staticmethod
+    def _count_models(names: list, architectures: dict) -> dict:
+        '''Count the devices of each known model'''
+        models = {}
+        for name in names:
+            model = [gpu_m for gpu_m in architectures if gpu_m in name]
+            # Ambiguous or unknown models are skipped
+            if len(model) == 1:
+                models[model[0]] = models.get(model[0], 0) + 1
+
+        return models
+
+    @classmethod
+    def _parse_devices(cls, probe: dict) -> dict:
+        '''Extract the information about the GPUs from the devices probe'''
+        gpu_info = cls._count_models(probe.get('nvidia', []),
+                                     nvidia_gpu_architecture)
+        # Every AMD GPU is listed once by lspci
+        amd_info = cls._count_models(
+            list(dict.fromkeys(probe.get('amd', []))), amd_gpu_architecture
+        )
+        for model, count in amd_info.items():
+            gpu_info[model] = gpu_info.get(model, 0) + count
 
         return gpu_info
 
     @staticmethod
-    def _parse_containers(file_path: str) -> list:
-        '''Extract the information about the containers from the job output'''
+    def _parse_containers(probe: dict) -> list:
+        '''Extract the information about the containers from the
+        containers probe'''
         containers_info = []
-        containers_found = False
+        for container in probe.get('containers', []):
+            type = container['type']
+            modules = []
+            if container.get('module'):
+                modules = [m.strip() for m in container.get('modules', [])
+                           if m.strip()]
+                modules.append(type.lower())
 
-        with open(file_path, 'r') as file:
-            lines = file.readlines()
-
-        for line in lines:
-            if "Installed containers" in line:
-                containers_found = True
-            elif "GPU" in line or line == "\n" or "Batch Job Summary" in line:
-                containers_found = False
-                break
-            elif containers_found:
-                type = line.split(' modules: ')[0].strip()
-                try:
-                    modules = line.split(' modules: ')[1].split(', ')
-                    modules = [m.strip() for m in modules]
-                    if modules[0] != '':
-                        modules.append(type.lower())
-                    else:
-                        modules = [type.lower()]
-                except Exception:
-                    modules = []
-                containers_info.append({'type': type, 'modules': modules})
+            containers_info.append({'type': type, 'modules': modules})
 
         return containers_info
 
-    def _extract_info(self, partition_name: str):
-
+    @staticmethod
+    def _parse_topology(probe: dict) -> dict:
+        '''Build the processor description from the topology probe'''
+        cores, sockets, numa_nodes = {}, {}, {}
+        for row in probe.get('cpus', []):
+            try:
+                cpu, core, socket, node = (row.split(',') + [''] * 4)[:4]
+                bit = 1 << int(cpu)
+            except ValueError:
+                continue
+
+            cores[(socket, core)] = cores.get((socket, core), 0) | bit
+            sockets[socket] = sockets.get(socket, 0) | bit
+            if node:
+                numa_nodes[node] = numa_nodes.get(node, 0) | bit
+
+        # ReFrame does not detect the processor of a partition that has one
+        # in the configuration, so it is left out if the arch is unknown
+        arch = probe.get('arch')
+        if not arch:
+            arch = next((name for pattern, name in cpu_architecture.items()
+                         if re.search(pattern, probe.get('model') or '')),
+                        None)
+
+        if not cores or not arch:
+            return {}
+
+        def _masks(groups):
+            # Sorted by their first CPU
+            return [hex(m) for m in sorted(groups.values(),
+                                           key=lambda m: m & -m)]
+
+        num_cpus = sum(bin(mask).count('1') for mask in sockets.values())
+        processor = {
+            'arch': arch,
+            'num_cpus': num_cpus,
+            'num_cpus_per_core': num_cpus // len(cores),
+            'num_cpus_per_socket': num_cpus // len(sockets),
+            'num_sockets': len(sockets),
+            'topology': {
+                'numa_nodes': _masks(numa_nodes),
+                'sockets': _masks(sockets),
+                'cores': _masks(cores)
+            }
+        }
+        if probe.get('platform'):
+            processor['platform'] = probe['platform']
+
+        if probe.get('model'):
+            processor['model'] = probe['model']
+
+        if probe.get('vendor'):
+            processor['vendor'] = probe['vendor']
+
+        return processor
+
+    def _extract_info(self, partition_name: str) -> bool:
+        '''Parse the output of the detection job
+
+        Returns whether every requested probe was found in the output.
+        '''
         file_path = os.path.join(
             self.TMP_DIR, self._OUTPUT_FILE.format(
                 partition_name=partition_name
             )
         )
+        expected = {'topology'}
         if self._detect_containers:
-            self.container_platforms = self._parse_containers(file_path)
-
+            expected.add('containers')
         if self._detect_devices:
-            self.devices = self._parse_devices(file_path)
+            expected.add('devices')
+
+        # The output is read once and every probe is parsed as it is found
+        found = set()
+        try:
+            for probe in self._read_probes(file_path):
+                kind = probe.get('probe')
+                if kind == 'containers' and self._detect_containers:
+                    self.container_platforms = self._parse_containers(probe)
+                elif kind == 'devices' and self._detect_devices:
+                    self.devices = self._parse_devices(probe)
+                    self.nics = probe.get('nics', [])
+                elif kind == 'topology':
+                    self.processor = self._parse_topology(probe)
+
+                found.add(kind)
+        except OSError as e:
+            getlogger().warning(
+                f'Unable to read the detection output {file_path}: {e}'
+            )
+
+        self.detected = expected <= found
+        if not self.detected:
+            getlogger().warning(
+                f'The detection job of "{partition_name}" did not report '
+                f'the probes: {", ".join(sorted(expected - found))}'
+            )
+
+        return self.detected
+
+    def snapshot(self) -> dict:
+        '''The detected information, e.g. for caching'''
+        return {'container_platforms': self.container_platforms,
+                'devices': self.devices, 'processor': self.processor,
+                'nics': self.nics}
+
+    def restore(self, snapshot: dict):
+        '''Restore the information of a previous detection'''
+        self.container_platforms = snapshot.get('container_platforms', [])
+        self.devices = snapshot.get('devices', {})
+        self.processor = snapshot.get('processor', {})
+        if 'arch' not in self.processor:
+            # Cached before the arch was detected
+            self.processor = {}
+        self.nics = snapshot.get('nics', [])
@@ -0,0 +1,516 @@
+# Copyright ETH Zurich/Swiss National Supercomputing Centre (CSCS)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+'''Local history of the performance values of the ReFrame tests
+
+The values are stored in an SQLite database, either by the ``perf_history``
+perflog handler while the tests run or by ingesting existing ``filelog``
+perflog files. The database can be queried with the :class:`PerfHistory`
+API or from the command line:
+
+    python3 perf_history.py --db perf.sqlite ingest perflogs/
+    python3 perf_history.py --db perf.sqlite percentiles --test 'osu_*'
+    python3 perf_history.py --db perf.sqlite trend --test osu_bw --bucket week
+    python3 perf_history.py --db perf.sqlite regressions --recent 7
+'''
+
+import argparse
+import datetime
+import logging
+import math
+import os
+import re
+import sqlite3
+import statistics
+import sys
+import time
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS perf (
+    time REAL NOT NULL,
+    system TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    environ TEXT NOT NULL,
+    test TEXT NOT NULL,
+    perf_var TEXT NOT NULL,
+    value REAL,
+    ref REAL,
+    lower_thres REAL,
+    upper_thres REAL,
+    unit TEXT,
+    result TEXT,
+    jobid TEXT NOT NULL DEFAULT '',
+    num_tasks INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS perf_series ON perf (
+    system, partition, environ, test, perf_var, time, jobid
+);
+CREATE INDEX IF NOT EXISTS perf_time ON perf (time);
+CREATE INDEX IF NOT EXISTS perf_test ON perf (test, perf_var);
+'''
+
+_COLUMNS = ('time', 'system', 'partition', 'environ', 'test', 'perf_var',
+            'value', 'ref', 'lower_thres', 'upper_thres', 'unit', 'result',
+            'jobid', 'num_tasks')
+
+# The columns identifying a series of performance values
+SERIES = ('system', 'partition', 'environ', 'test', 'perf_var')
+
+# The filters of the queries and the columns they match with GLOB patterns
+_FILTERS = ('system', 'partition', 'environ', 'test', 'perf_var')
+
+_BUCKETS = {'day': '%Y-%m-%d', 'week': '%Y-W%W', 'month': '%Y-%m'}
+
+
+def _float_or_none(val):
+    try:
+        val = float(val)
+    except (TypeError, ValueError):
+        return None
+
+    return None if math.isnan(val) else val
+
+
+class PerfHistory:
+    '''SQLite store of performance values
+
+    The values are indexed by system, partition, environment, test,
+    performance variable and job completion time. The filters of the queries
+    accept shell-style patterns.
+    '''
+
+    def __init__(self, path):
+        self._path = path
+        dirname = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+    @property
+    def path(self):
+        return self._path
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def insert(self, rows):
+        '''Insert performance values, given as dicts keyed by column
+
+        Values already stored for the same series, time and job are ignored.
+        Return the number of inserted values.
+        '''
+        placeholders = ', '.join(f':{c}' for c in _COLUMNS)
+        with self._conn:
+            cur = self._conn.executemany(
+                f'INSERT OR IGNORE INTO perf ({", ".join(_COLUMNS)}) '
+                f'VALUES ({placeholders})',
+                ({c: row.get(c) for c in _COLUMNS} for row in rows)
+            )
+
+        return cur.rowcount
+
+    def _where(self, filters, since=None, until=None):
+        clauses, params = [], []
+        for column in _FILTERS:
+            pattern = filters.get(column)
+            if pattern:
+                clauses.append(f'{column} GLOB ?')
+                params.append(pattern)
+
+        if since is not None:
+            clauses.append('time >= ?')
+            params.append(since)
+
+        if until is not None:
+            clauses.append('time < ?')
+            params.append(until)
+
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        return where, params
+
+    def values(self, since=None, until=None, **filters):
+        '''Return the stored values matching the filters ordered by series
+        and time'''
+        where, params = self._where(filters, since, until)
+        return self._conn.execute(
+            f'SELECT * FROM perf {where} '
+            f'ORDER BY {", ".join(SERIES)}, time', params
+        ).fetchall()
+
+    def series(self, since=None, until=None, **filters):
+        '''Return the performance values of each series matching the filters
+
+        The result maps the series key, a tuple of :data:`SERIES`, to the
+        list of rows ordered by time.
+        '''
+        ret = {}
+        for row in self.values(since, until, **filters):
+            ret.setdefault(tuple(row[c] for c in SERIES), []).append(row)
+
+        return ret
+
+    def percentiles(self, q=(5, 50, 95), since=None, until=None, **filters):
+        '''Return the percentiles ``q`` of the values of each series'''
+        ret = {}
+        for key, rows in self.series(since, until, **filters).items():
+            values = sorted(r['value'] for r in rows
+                            if r['value'] is not None)
+            if not values:
+                continue
+
+            ret[key] = {
+                'count': len(values),
+                'unit': rows[-1]['unit'],
+                'percentiles': {p: _percentile(values, p) for p in q}
+            }
+
+        return ret
+
+    def trend(self, bucket='day', since=None, until=None, **filters):
+        '''Return the median, minimum and maximum of the values of each
+        series per time bucket (``day``, ``week`` or ``month``)'''
+        ret = {}
+        fmt = _BUCKETS[bucket]
+        for key, rows in self.series(since, until, **filters).items():
+            buckets = {}
+            for r in rows:
+                if r['value'] is None:
+                    continue
+
+                label = datetime.datetime.fromtimestamp(
+                    r['time'], datetime.timezone.utc
+                ).strftime(fmt)
+                buckets.setdefault(label, []).append(r['value'])
+
+            ret[key] = [
+                (label, len(vals), statistics.median(vals), min(vals),
+                 max(vals)) for label, vals in buckets.items()
+            ]
+
+        return ret
+
+    def regressions(self, recent=7, baseline=30, threshold=0.1, now=None,
+                    **filters):
+        '''Compare the median of the last ``recent`` days of every series
+        against the median of the ``baseline`` days before.
+
+        A series regressed if the relative change of the median exceeds
+        ``threshold`` in the direction bounded by the reference thresholds
+        of the test; series without thresholds are checked in both
+        directions. Return the list of regressions ordered by decreasing
+        relative change.
+        '''
+        now = now or time.time()
+        split = now - recent * 86400
+        ret = []
+        for key, rows in self.series(split - baseline * 86400,
+                                     **filters).items():
+            old = [r['value'] for r in rows
+                   if r['time'] < split and r['value'] is not None]
+            new = [r['value'] for r in rows
+                   if r['time'] >= split and r['value'] is not None]
+            if not old or not new:
+                continue
+
+            old_median = statistics.median(old)
+            new_median = statistics.median(new)
+            if old_median == 0:
+                continue
+
+            change = (new_median - old_median) / abs(old_median)
+            last = rows[-1]
+            lower_bounded = last['lower_thres'] is not None
+            upper_bounded = last['upper_thres'] is not None
+            if not lower_bounded and not upper_bounded:
+                lower_bounded = upper_bounded = True
+
+            if ((lower_bounded and change < -threshold) or
+                (upper_bounded and change > threshold)):
+                ret.append({
+                    'series': key, 'baseline': old_median,
+                    'recent': new_median, 'change': change,
+                    'unit': last['unit'],
+                    'count': (len(old), len(new))
+                })
+
+        return sorted(ret, key=lambda r: -abs(r['change']))
+
+
+def _percentile(values, p):
+    '''Linearly interpolated percentile of sorted values'''
+    if len(values) == 1:
+        return values[0]
+
+    pos = (len(values) - 1) * p / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def _split_info(info):
+    '''Split the ``check_info`` of a record into the test name, system,
+    partition and environment'''
+    name, _, where = info.rpartition(' @')
+    system_part, _, environ = where.partition('+')
+    system, _, partition = system_part.partition(':')
+
+    # Drop the hash of the test variant
+    name = re.sub(r' /[0-9a-f]+$', '', name)
+    return name, system, partition, environ
+
+
+def record_to_row(record):
+    '''Convert a ReFrame perflog record to a row of the store'''
+    attrs = record.__dict__
+    test = attrs.get('check_display_name') or attrs.get('check_name')
+    system = attrs.get('check_system')
+    partition = attrs.get('check_partition')
+    environ = attrs.get('check_environ')
+    if test is None or system is None:
+        test, system, partition, environ = _split_info(
+            attrs.get('check_info', '')
+        )
+
+    completion_time = attrs.get('check_job_completion_time_unix')
+    return {
+        'time': (completion_time if completion_time is not None
+                 else record.created),
+        'system': system,
+        'partition': partition or '',
+        'environ': environ or '',
+        'test': test,
+        'perf_var': attrs.get('check_perf_var'),
+        'value': _float_or_none(attrs.get('check_perf_value')),
+        'ref': _float_or_none(attrs.get('check_perf_ref')),
+        'lower_thres': _float_or_none(attrs.get('check_perf_lower_thres')),
+        'upper_thres': _float_or_none(attrs.get('check_perf_upper_thres')),
+        'unit': attrs.get('check_perf_unit'),
+        'result': attrs.get('check_perf_result'),
+        'jobid': str(attrs.get('check_jobid') or ''),
+        'num_tasks': attrs.get('check_num_tasks'),
+    }
+
+
+class PerfHistoryHandler(logging.Handler):
+    '''Perflog handler appending the performance values to a
+    :class:`PerfHistory` store
+
+    The values are committed every ``batch_size`` records and when the
+    handler is flushed or closed.
+    '''
+
+    def __init__(self, path, batch_size=100):
+        super().__init__()
+        self._path = path
+        self._batch_size = batch_size
+        self._rows = []
+        self._store = None
+
+    def emit(self, record):
+        try:
+            row = record_to_row(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        if row['perf_var'] is None or row['system'] is None:
+            return
+
+        self._rows.append(row)
+        if len(self._rows) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+
+        self.acquire()
+        try:
+            if self._store is None:
+                self._store = PerfHistory(self._path)
+
+            self._store.insert(self._rows)
+            self._rows = []
+        except sqlite3.Error as e:
+            sys.stderr.write(f'perf_history: could not store the '
+                             f'performance values in {self._path}: {e}\n')
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+        super().close()
+
+
+try:
+    from reframe.core.logging import register_log_handler
+except ImportError:
+    # The store can be queried without ReFrame
+    pass
+else:
+    @register_log_handler('perf_history')
+    def _create_perf_history_handler(site_config, config_prefix):
+        return PerfHistoryHandler(os.environ['CSCS_RFM_PERF_HISTORY'])
+
+
+# The filelog perflog lines, as formatted in config/common.py
+_FILELOG_LINE = re.compile(
+    r'^(?P<time>[^|]+)\|reframe [^|]*\|(?P<info>[^|]+)\|'
+    r'jobid=(?P<jobid>[^|]*)\|num_tasks=(?P<num_tasks>[^|]*)\|'
+    r'(?P<perf_var>[^|=]+)=(?P<value>[^|]*)\|'
+    r'ref=(?P<ref>\S*) \(l=(?P<lower>[^,]*), u=(?P<upper>[^)]*)\)\|'
+    r'(?P<unit>[^|]*)$'
+)
+
+
+def parse_filelog(path):
+    '''Yield the rows of the performance values of a filelog perflog file'''
+    with open(path) as fp:
+        for line in fp:
+            m = _FILELOG_LINE.match(line.rstrip('\n'))
+            if not m:
+                continue
+
+            try:
+                timestamp = datetime.datetime.fromisoformat(
+                    m['time']
+                ).timestamp()
+            except ValueError:
+                continue
+
+            test, system, partition, environ = _split_info(m['info'])
+            try:
+                num_tasks = int(m['num_tasks'])
+            except ValueError:
+                num_tasks = None
+
+            yield {
+                'time': timestamp, 'system': system,
+                'partition': partition, 'environ': environ, 'test': test,
+                'perf_var': m['perf_var'],
+                'value': _float_or_none(m['value']),
+                'ref': _float_or_none(m['ref']),
+                'lower_thres': _float_or_none(m['lower']),
+                'upper_thres': _float_or_none(m['upper']),
+                'unit': m['unit'], 'result': None,
+                'jobid': m['jobid'], 'num_tasks': num_tasks
+            }
+
+
+def _fmt_key(key):
+    system, partition, environ, test, perf_var = key
+    return f'{test} @{system}:{partition}+{environ} {perf_var}'
+
+
+def _iso_time(value):
+    return (value if value is None
+            else datetime.datetime.fromisoformat(value).timestamp())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Query the local history of the performance values'
+    )
+    parser.add_argument(
+        '--db', default=os.environ.get('CSCS_RFM_PERF_HISTORY'),
+        help='Path of the database (default: $CSCS_RFM_PERF_HISTORY)'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser(
+        'ingest', help='Ingest filelog perflog files or directories'
+    )
+    ingest.add_argument('paths', nargs='+')
+    for name, help_msg in (
+        ('percentiles', 'Percentiles of the values of each series'),
+        ('trend', 'Median, minimum and maximum per time bucket'),
+        ('regressions', 'Series whose recent median regressed'),
+    ):
+        cmd = commands.add_parser(name, help=help_msg)
+        for column in _FILTERS:
+            cmd.add_argument(f'--{column.replace("_", "-")}',
+                             dest=column, metavar='PATTERN')
+
+        if name != 'regressions':
+            cmd.add_argument('--since', type=_iso_time,
+                             help='ISO date of the oldest values')
+            cmd.add_argument('--until', type=_iso_time,
+                             help='ISO date of the newest values')
+
+    commands.choices['percentiles'].add_argument(
+        '-q', type=float, nargs='+', default=[5, 50, 95],
+        help='Percentiles to compute'
+    )
+    commands.choices['trend'].add_argument(
+        '--bucket', choices=list(_BUCKETS), default='day'
+    )
+    regressions = commands.choices['regressions']
+    regressions.add_argument('--recent', type=float, default=7,
+                             help='Days of the recent window')
+    regressions.add_argument('--baseline', type=float, default=30,
+                             help='Days of the baseline window')
+    regressions.add_argument('--threshold', type=float, default=0.1,
+                             help='Relative change considered a regression')
+    args = parser.parse_args(argv)
+    if not args.db:
+        parser.error('no database given with --db or '
+                     '$CSCS_RFM_PERF_HISTORY')
+
+    with PerfHistory(args.db) as store:
+        if args.command == 'ingest':
+            count = 0
+            for path in args.paths:
+                files = [path]
+                if os.path.isdir(path):
+                    files = [os.path.join(root, f)
+                             for root, _, names in os.walk(path)
+                             for f in sorted(names) if f.endswith('.log')]
+
+                for f in files:
+                    count += store.insert(parse_filelog(f))
+
+            print(f'Ingested {count} new performance values into {args.db}')
+            return 0
+
+        filters = {c: getattr(args, c) for c in _FILTERS}
+        if args.command == 'percentiles':
+            for key, res in store.percentiles(args.q, args.since, args.until,
+                                              **filters).items():
+                pcts = ' '.join(f'p{p:g}={v:g}'
+                                for p, v in res['percentiles'].items())
+                print(f'{_fmt_key(key)}: n={res["count"]} {pcts} '
+                      f'{res["unit"] or ""}')
+        elif args.command == 'trend':
+            for key, buckets in store.trend(args.bucket, args.since,
+                                            args.until, **filters).items():
+                print(_fmt_key(key))
+                for label, count, median, lo, hi in buckets:
+                    print(f'  {label}: n={count} median={median:g} '
+                          f'min={lo:g} max={hi:g}')
+        else:
+            for res in store.regressions(args.recent, args.baseline,
+                                         args.threshold, **filters):
+                print(f'{_fmt_key(res["series"])}: {res["baseline"]:g} -> '
+                      f'{res["recent"]:g} {res["unit"] or ""} '
+                      f'({res["change"]:+.1%}, n={res["count"]})')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# Copyright ETH Zurich/Swiss National Supercomputing Centre (CSCS)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import json
+
+
+def victoriametrics_formatter(ignore_keys):
+    '''Return a ``json_formatter`` producing VictoriaMetrics import lines
+
+    The labels that do not depend on the performance variable are computed
+    once per test case and reused for all its performance variables. The
+    keys ignored by the handler, which also include the standard log record
+    attributes, are merged with ``ignore_keys`` into a set once.
+    '''
+    ignore_keys = frozenset(ignore_keys)
+    ignored = {'arg': None, 'keys': ignore_keys}
+    perf_types = (('check_perf_value', 'value'), ('check_perf_ref', 'ref'))
+
+    # The serialized static labels and timestamps and the per variable label
+    # keys of the last test case formatted
+    last_case = {'key': None}
+
+    _dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+    def _static_labels(attrs, extras, ignore_keys):
+        labels, perf_keys = {}, []
+        for attr, val in attrs.items():
+            if attr in ignore_keys or attr.startswith('_'):
+                continue
+
+            if attr.startswith('check_perf_'):
+                # VMetrics labels must be strings; keep perf values out
+                if attr not in ('check_perf_value', 'check_perf_ref',
+                                'check_perf_type'):
+                    perf_keys.append(attr)
+            else:
+                labels[attr] = str(val) if val is not None else ''
+
+        for attr, val in extras.items():
+            labels[attr] = str(val) if val is not None else ''
+
+        labels.setdefault('__name__',
+                          labels.get('check_unique_name', 'reframe'))
+        timestamp = attrs.get('check_job_completion_time_unix')
+        if timestamp is not None:
+            suffix = f',"timestamps":[{int(timestamp * 1000)}]}}'
+        else:
+            suffix = '}'
+
+        # The labels are serialized once, without the enclosing braces
+        return '{"metric":{' + _dumps(labels)[1:-1], perf_keys, suffix
+
+    def _format(record, extras, handler_ignore_keys):
+        if handler_ignore_keys is not ignored['arg']:
+            ignored['arg'] = handler_ignore_keys
+            ignored['keys'] = ignore_keys.union(handler_ignore_keys or ())
+            last_case['key'] = None
+
+        attrs = record.__dict__
+        case = (attrs.get('check_info'), attrs.get('check_jobid'),
+                attrs.get('check_job_completion_time_unix'))
+        if case[0] is None or case != last_case['key']:
+            last_case['key'] = case
+            last_case['static'] = _static_labels(attrs, extras,
+                                                 ignored['keys'])
+
+        prefix, perf_keys, suffix = last_case['static']
+        perf_labels = {}
+        for attr in perf_keys:
+            val = attrs.get(attr)
+            perf_labels[attr] = str(val) if val is not None else ''
+
+        if perf_labels:
+            prefix += ',' + _dumps(perf_labels)[1:-1]
+
+        lines = []
+        for perf_key, perf_type in perf_types:
+            perf_val = attrs.get(perf_key)
+            if perf_val is None:
+                continue
+
+            lines.append(f'{prefix},"check_perf_type":"{perf_type}"}},'
+                         f'"values":[{_dumps(float(perf_val))}]{suffix}')
+
+        return '\n'.join(lines) + '\n' if lines else None
+
+    return _format
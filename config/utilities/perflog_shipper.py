@@ -0,0 +1,250 @@
+# Copyright ETH Zurich/Swiss National Supercomputing Centre (CSCS)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import atexit
+import glob
+import gzip
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+_logger = logging.getLogger(__name__)
+
+# Sentinel asking the shipping thread to flush its buffer
+_FLUSH = object()
+
+
+class HTTPBatchShipper:
+    '''Ship NDJSON perflog records to an HTTP endpoint in batches.
+
+    Records are buffered and posted from a background thread as a single
+    gzip-compressed NDJSON payload when ``max_records`` or ``max_bytes`` is
+    reached or ``flush_interval`` seconds passed since the first buffered
+    record. Failed posts are retried with exponential backoff; payloads that
+    still cannot be delivered are written to ``spool_dir`` and sent again
+    after the next delivered batch. Payloads that the endpoint rejects with
+    a client error are moved to the ``rejected`` subdirectory of
+    ``spool_dir`` for inspection and are never sent again. The buffer is
+    flushed when the interpreter exits.
+    '''
+
+    def __init__(self, url, headers=None, max_records=500,
+                 max_bytes=4 * 1024 * 1024, flush_interval=5.0,
+                 compress=True, timeout=10.0, backoff=(1, 2, 4, 8),
+                 spool_dir=None):
+        self._url = url
+        self._headers = {'Content-Type': 'application/x-ndjson',
+                         **(headers or {})}
+        if compress:
+            self._headers['Content-Encoding'] = 'gzip'
+
+        self._compress = compress
+        self._max_records = max_records
+        self._max_bytes = max_bytes
+        self._flush_interval = flush_interval
+        self._timeout = timeout
+        self._backoff = list(backoff)
+        self._spool_dir = spool_dir
+        self._rejected_dir = (os.path.join(spool_dir, 'rejected')
+                              if spool_dir else None)
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='perflog-shipper')
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def url(self):
+        return self._url
+
+    def submit(self, payload):
+        '''Buffer one or more NDJSON lines for shipping'''
+        if not payload:
+            return
+
+        if not payload.endswith('\n'):
+            payload += '\n'
+
+        self._queue.put(payload)
+
+    def flush(self):
+        '''Ship the buffered records and wait until they are processed'''
+        if self._closed:
+            return
+
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait()
+
+    def close(self, timeout=None):
+        '''Flush the buffered records and stop the shipping thread'''
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        self._send_spooled()
+        lines, size, deadline = [], 0, None
+        while True:
+            timeout = (None if deadline is None
+                       else max(deadline - time.monotonic(), 0))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH
+
+            if isinstance(item, str):
+                lines.append(item)
+                size += len(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+
+                if (len(lines) < self._max_records and
+                    size < self._max_bytes):
+                    continue
+
+            if lines:
+                # Do not delay the exit with retries, spool instead
+                self._ship(''.join(lines), retry=item is not None)
+                lines, size, deadline = [], 0, None
+
+            if item is None:
+                return
+
+            if isinstance(item, tuple):
+                item[1].set()
+
+    def _encode(self, data):
+        data = data.encode()
+        return gzip.compress(data, compresslevel=6) if self._compress else data
+
+    def _post(self, body):
+        req = urllib.request.Request(self._url, data=body,
+                                     headers=self._headers, method='POST')
+        with urllib.request.urlopen(req, timeout=self._timeout) as resp:
+            resp.read()
+
+    @staticmethod
+    def _is_rejected(error):
+        # Client errors other than throttling will not go away by retrying
+        return error.code < 500 and error.code != 429
+
+    def _post_with_retries(self, body, retry=True):
+        '''Post the payload and return whether it was delivered
+
+        The HTTP error of a payload rejected by the endpoint is raised.
+        '''
+        for delay in (self._backoff if retry else []) + [None]:
+            try:
+                self._post(body)
+                return True
+            except urllib.error.HTTPError as e:
+                if self._is_rejected(e):
+                    raise
+
+                error = e
+            except OSError as e:
+                error = e
+
+            if delay is not None:
+                time.sleep(delay)
+
+        _logger.warning(f'could not ship perflog records to {self._url}: '
+                        f'{error}')
+        return False
+
+    def _ship(self, data, retry=True):
+        body = self._encode(data)
+        try:
+            delivered = self._post_with_retries(body, retry)
+        except urllib.error.HTTPError as e:
+            _logger.warning(f'perflog records rejected by {self._url}: {e}')
+            self._spool(body, self._rejected_dir)
+            return
+
+        if delivered:
+            self._send_spooled()
+        else:
+            self._spool(body, self._spool_dir)
+
+    def _spool(self, body, spool_dir):
+        if not spool_dir:
+            return
+
+        try:
+            os.makedirs(spool_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=spool_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(body)
+
+            suffix = '.ndjson.gz' if self._compress else '.ndjson'
+            os.replace(tmp_path, os.path.join(
+                spool_dir, f'{time.time():.6f}-{uuid.uuid4().hex}{suffix}'
+            ))
+        except OSError as e:
+            _logger.warning(f'could not spool perflog records: {e}')
+
+    def _send_spooled(self):
+        if not self._spool_dir:
+            return
+
+        suffix = '.ndjson.gz' if self._compress else '.ndjson'
+        for path in sorted(glob.glob(os.path.join(self._spool_dir,
+                                                  f'*{suffix}'))):
+            try:
+                with open(path, 'rb') as fp:
+                    body = fp.read()
+            except OSError:
+                continue
+
+            # Stop at the first failure, the endpoint is still unavailable;
+            # the payloads it rejects are not sent again
+            try:
+                self._post(body)
+            except urllib.error.HTTPError as e:
+                if not self._is_rejected(e):
+                    return
+
+                _logger.warning(f'spooled perflog records rejected by '
+                                f'{self._url}: {e}')
+                try:
+                    os.makedirs(self._rejected_dir, exist_ok=True)
+                    os.replace(path, os.path.join(self._rejected_dir,
+                                                  os.path.basename(path)))
+                except OSError:
+                    pass
+
+                continue
+            except OSError:
+                return
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def batched(formatter, shipper):
+    '''Wrap a ``json_formatter`` of an ``httpjson`` perflog handler so that
+    its output is shipped by ``shipper``.
+
+    The wrapped formatter returns :obj:`None`, so that ReFrame does not post
+    the record itself.
+    '''
+
+    def _format(record, extras, ignore_keys):
+        shipper.submit(formatter(record, extras, ignore_keys))
+
+    return _format
@@ -0,0 +1,182 @@
+# Copyright 2024 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import json
+import re
+import subprocess
+
+_SCONTROL_ENTITIES = ('nodes', 'partitions', 'reservations')
+
+# The socket affinity reported with the Gres, e.g. gpu:4(S:0-3)
+_GRES_SOCKETS = re.compile(r'\([^)]*\)')
+_KEY_VALUE = re.compile(r'(\w+)=(\S*)')
+
+
+def _as_list(value) -> list:
+    '''Normalize a comma-separated string or a list to a list'''
+    if not value or value == '(null)':
+        return []
+
+    if isinstance(value, str):
+        return [v for v in value.split(',') if v]
+
+    return list(value)
+
+
+def _parse_scontrol_text(output: str) -> list:
+    '''Parse the one-line output of ``scontrol show <entity> -o``'''
+    return [dict(_KEY_VALUE.findall(line))
+            for line in output.splitlines() if line.strip()]
+
+
+class SlurmInventory:
+    '''Snapshot of the Slurm nodes, partitions and reservations
+
+    The snapshot is retrieved with a single ``scontrol`` call per entity and
+    indexed once, so that the detection of the node types, devices and
+    access partitions does not query the Slurm controller repeatedly. A
+    snapshot can be saved to and loaded from a file to run the configuration
+    generator offline.
+    '''
+
+    def __init__(self, nodes: list, partitions: list, reservations: list):
+        self._raw = {'nodes': nodes, 'partitions': partitions,
+                     'reservations': reservations}
+        self.nodes = {}
+        self._nodes_by_feature = {}
+        for node in nodes:
+            # JSON (scontrol --json) or text (scontrol -o) keys
+            name = node.get('name') or node.get('NodeName')
+            if not name:
+                continue
+
+            features = node.get('active_features',
+                                node.get('ActiveFeatures'))
+            gres = node.get('gres', node.get('Gres')) or ''
+            gres = _GRES_SOCKETS.sub('', gres)
+            self.nodes[name] = {
+                'features': tuple(_as_list(features)),
+                'partitions': tuple(_as_list(
+                    node.get('partitions', node.get('Partitions'))
+                )),
+                'gres': '' if gres == '(null)' else gres,
+                'cpus': node.get('cpus', node.get('CPUTot')),
+                'real_memory': node.get('real_memory',
+                                        node.get('RealMemory')),
+                'sockets': node.get('sockets', node.get('Sockets')),
+                'cores': node.get('cores', node.get('CoresPerSocket')),
+                'threads': node.get('threads', node.get('ThreadsPerCore')),
+                'arch': node.get('architecture', node.get('Arch')),
+            }
+            for feat in self.nodes[name]['features']:
+                self._nodes_by_feature.setdefault(feat, set()).add(name)
+
+        self.default_partition = None
+        for part in partitions:
+            if self._is_default(part):
+                self.default_partition = (part.get('name') or
+                                          part.get('PartitionName'))
+                break
+
+        self.reservations = [
+            res.get('name') or res.get('ReservationName')
+            for res in reservations
+        ]
+
+    @staticmethod
+    def _is_default(partition: dict) -> bool:
+        if partition.get('Default') == 'YES' or partition.get('default'):
+            return True
+
+        # The flag is reported in different fields across Slurm versions
+        flags = _as_list(partition.get('flags'))
+        flags += _as_list(partition.get('partition', {}).get('state'))
+        flags += _as_list(partition.get('partition', {}).get('flags'))
+        return 'DEFAULT' in (str(f).upper() for f in flags)
+
+    @staticmethod
+    def _scontrol(entity: str) -> list:
+        try:
+            completed = subprocess.run(
+                ['scontrol', 'show', entity, '--json'],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True, check=True
+            )
+            return json.loads(completed.stdout).get(entity) or []
+        except (subprocess.CalledProcessError, json.JSONDecodeError):
+            # Slurm built without the JSON plugins
+            completed = subprocess.run(
+                ['scontrol', 'show', entity, '-o'],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True, check=True
+            )
+            return _parse_scontrol_text(completed.stdout)
+
+    @classmethod
+    def from_scontrol(cls) -> 'SlurmInventory':
+        '''Take a snapshot of the system with scontrol'''
+        return cls(**{entity: cls._scontrol(entity)
+                      for entity in _SCONTROL_ENTITIES})
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SlurmInventory':
+        '''Load a snapshot saved with :meth:`save`
+
+        The file may also be written by hand combining the ``nodes``,
+        ``partitions`` and ``reservations`` lists of the respective
+        ``scontrol show <entity> --json`` outputs.
+        '''
+        with open(path) as fp:
+            snapshot = json.load(fp)
+
+        return cls(**{entity: snapshot.get(entity) or []
+                      for entity in _SCONTROL_ENTITIES})
+
+    def save(self, path: str):
+        '''Save the snapshot to a file'''
+        with open(path, 'w') as fp:
+            json.dump(self._raw, fp)
+
+    def node_types(self) -> set:
+        '''Unique combinations of node features and partitions'''
+        return {(node['features'], node['partitions'])
+                for node in self.nodes.values() if node['features']}
+
+    def nodes_with_features(self, node_feats: list) -> list:
+        '''Names of the nodes that have all the given features'''
+        if not node_feats:
+            return sorted(self.nodes)
+
+        matching = set.intersection(*(
+            self._nodes_by_feature.get(feat, set()) for feat in node_feats
+        ))
+        return sorted(matching)
+
+    def gres(self, node_feats: list) -> list:
+        '''Gres of the nodes that have all the given features'''
+        return [self.nodes[n]['gres']
+                for n in self.nodes_with_features(node_feats)]
+
+    def hardware_signature(self, node_feats: list,
+                           features: bool = False) -> tuple:
+        '''Gres, CPUs, CPU layout and arch and memory of the nodes with the
+        given features, and their active features if ``features`` is set'''
+        nodes = self.nodes_with_features(node_feats)
+        if not nodes:
+            # Nothing is known about the hardware of these nodes
+            return ('features',) + tuple(node_feats)
+
+        keys = ('gres', 'cpus', 'sockets', 'cores', 'threads', 'arch',
+                'real_memory')
+        return tuple(sorted({
+            tuple(str(self.nodes[n][k]) for k in keys) +
+            (tuple(sorted(self.nodes[n]['features'])) if features else ())
+            for n in nodes
+        }))
+
+    def partitions(self, node_feats: list) -> set:
+        '''Partitions of the nodes that have all the given features'''
+        return {self.nodes[n]['partitions']
+                for n in self.nodes_with_features(node_feats)}
@@ -0,0 +1,120 @@
+# Copyright Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import itertools
+import re
+import subprocess
+
+from slurm_inventory import _parse_scontrol_text
+
+# The placement classes of a set of nodes in the network topology
+PLACEMENTS = ('intra-switch', 'intra-group', 'inter-group')
+
+# A host list item with an optional range, e.g. nid[001-004,010]
+_HOSTLIST_ITEM = re.compile(r'([^,\[]+)(?:\[([^\]]+)\])?([^,]*)')
+
+
+def expand_hostlist(hostlist: str) -> list:
+    '''Expand a Slurm host list, e.g. ``nid[001-002],login1``'''
+    hosts = []
+    for prefix, ranges, suffix in _HOSTLIST_ITEM.findall(hostlist or ''):
+        if not ranges:
+            hosts.append(prefix + suffix)
+            continue
+
+        for rng in ranges.split(','):
+            first, _, last = rng.partition('-')
+            width = len(first)
+            for i in range(int(first), int(last or first) + 1):
+                hosts.append(f'{prefix}{i:0{width}d}{suffix}')
+
+    return hosts
+
+
+class SwitchTopology:
+    '''The switches and groups of the nodes of a tree topology
+
+    The leaf switches of the ``topology/tree`` plugin list their nodes and
+    the switches of the next level group the leaf switches, e.g. the
+    Dragonfly groups. The topology is read from the output of
+    ``scontrol show topology``, or from a file with the same content.
+    '''
+
+    def __init__(self, switches: list):
+        self.switch_of = {}
+        self.group_of = {}
+        parent = {}
+        for switch in switches:
+            for child in expand_hostlist(switch.get('Switches')):
+                parent[child] = switch['SwitchName']
+
+        for switch in switches:
+            if switch.get('Level', '0') != '0':
+                continue
+
+            for node in expand_hostlist(switch.get('Nodes')):
+                self.switch_of[node] = switch['SwitchName']
+                self.group_of[node] = parent.get(switch['SwitchName'],
+                                                 switch['SwitchName'])
+
+    @classmethod
+    def from_scontrol(cls) -> 'SwitchTopology':
+        completed = subprocess.run(
+            ['scontrol', 'show', 'topology'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, check=True
+        )
+        return cls(_parse_scontrol_text(completed.stdout))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SwitchTopology':
+        '''Load the topology saved from ``scontrol show topology``'''
+        with open(path) as fp:
+            return cls(_parse_scontrol_text(fp.read()))
+
+    def select(self, placement: str, nodes: list, num_nodes: int):
+        '''Select ``num_nodes`` of ``nodes`` with the given placement
+
+        ``intra-switch`` nodes share a leaf switch, ``intra-group`` nodes
+        share a group but no leaf switch and ``inter-group`` nodes are all
+        in different groups. Return ``None`` if no such nodes are
+        available.
+        '''
+        if placement not in PLACEMENTS:
+            raise ValueError(f'unknown placement: {placement!r}')
+
+        nodes = sorted(n for n in nodes if n in self.switch_of)
+        if placement == 'intra-switch':
+            for _, members in itertools.groupby(
+                sorted(nodes, key=self.switch_of.get), key=self.switch_of.get
+            ):
+                members = list(members)
+                if len(members) >= num_nodes:
+                    return members[:num_nodes]
+
+            return None
+
+        if placement == 'intra-group':
+            for _, members in itertools.groupby(
+                sorted(nodes, key=self.group_of.get), key=self.group_of.get
+            ):
+                selected = self._one_per(members, self.switch_of, num_nodes)
+                if selected:
+                    return selected
+
+            return None
+
+        return self._one_per(nodes, self.group_of, num_nodes)
+
+    @staticmethod
+    def _one_per(nodes, key, num_nodes):
+        '''One node for each of ``num_nodes`` different keys'''
+        selected = {}
+        for node in nodes:
+            selected.setdefault(key[node], node)
+            if len(selected) == num_nodes:
+                return sorted(selected.values())
+
+        return None
@@ -0,0 +1,133 @@
+import json
+import pathlib
+import sys
+import types
+
+import pytest
+
+_ROOT = pathlib.Path(__file__).parent.parent.parent.parent
+sys.path.append(str(_ROOT / 'utility'))
+sys.path.append(str(_ROOT / 'checks' / 'mixins'))
+
+from derive_references import derive, rows_from_report  # noqa: E402
+from reference_overrides import ReferenceOverridesMixin  # noqa: E402
+
+
+def _rows(values, partition='normal', lower=-0.1, upper=None,
+          result='pass'):
+    return [{'time': i, 'system': 'daint', 'partition': partition,
+             'environ': 'gnu', 'test': 'stream', 'perf_var': 'triad',
+             'value': v, 'lower_thres': lower, 'upper_thres': upper,
+             'unit': 'GB/s', 'result': result}
+            for i, v in enumerate(values)]
+
+
+def test_derive_median_mad():
+    """Verify that the reference is the median and the threshold the scaled
+    median absolute deviation, on the side of the test thresholds."""
+    refs = derive(_rows([100, 102, 98, 101, 99, 150]))
+    assert refs == {'stream': {'daint:normal:gnu:*': {'triad': {
+        'reference': [100.5, -0.0664, None, 'GB/s'], 'samples': 6
+    }}}}
+
+
+@pytest.mark.parametrize('values,tolerance', [
+    ([100] * 5, 0.05), ([100, 20, 180, 30, 170], 0.5)
+])
+def test_derive_tolerance_bounds(values, tolerance):
+    """Verify that the thresholds are within the minimum and maximum
+    tolerance and on both sides if the test has no thresholds."""
+    refs = derive(_rows(values, lower=None))
+    ref = refs['stream']['daint:normal:gnu:*']['triad']['reference']
+    assert ref == [100, -tolerance, tolerance, 'GB/s']
+
+
+def test_derive_min_samples():
+    """Verify that the references need a minimum number of valid values."""
+    rows = _rows([100, 101, 99, 100]) + _rows([100], result='fail')
+    rows += _rows([float('nan'), None])
+    assert derive(rows) == {}
+    assert derive(rows, min_samples=4)['stream']['daint:normal:gnu:*'][
+        'triad']['samples'] == 4
+    assert derive(rows, include_failures=True)['stream'][
+        'daint:normal:gnu:*']['triad']['samples'] == 5
+
+
+def test_derive_uarch_scopes():
+    """Verify that the values of the partitions of the same uarch are also
+    aggregated."""
+    rows = _rows([100] * 3) + _rows([110] * 3, partition='debug')
+    refs = derive(rows, uarch_map=[('daint:*', 'gh200')], min_samples=3)
+    assert {scope: entry['triad']['samples']
+            for scope, entry in refs['stream'].items()} == {
+        'daint:debug:gnu:gh200': 3, 'daint:normal:gnu:gh200': 3,
+        '*:*:gnu:gh200': 6
+    }
+    assert refs['stream']['*:*:gnu:gh200']['triad']['reference'][0] == 105
+
+
+def test_rows_from_report(tmp_path):
+    """Verify that the performance values of the passed tests and of the
+    tests failing the performance check are read from the report."""
+    def _testcase(name, result, fail_phase=None):
+        return {'display_name': name, 'result': result,
+                'fail_phase': fail_phase, 'system': 'daint',
+                'partition': 'normal', 'environ': 'gnu',
+                'job_completion_time_unix': 1000.0,
+                'perfvalues': {
+                    'daint:normal:triad': [100.0, 90.0, -0.1, None, 'GB/s',
+                                           'pass']
+                }}
+
+    report = tmp_path / 'report.json'
+    report.write_text(json.dumps({'runs': [{'testcases': [
+        _testcase('stream', 'pass'),
+        _testcase('stream_perf', 'fail', 'performance'),
+        _testcase('stream_run', 'fail', 'run')
+    ]}]}))
+    rows = list(rows_from_report(report))
+    assert [row['test'] for row in rows] == ['stream', 'stream_perf']
+    assert rows[0] == {
+        'time': 1000.0, 'system': 'daint', 'partition': 'normal',
+        'environ': 'gnu', 'test': 'stream', 'perf_var': 'triad',
+        'value': 100.0, 'ref': 90.0, 'lower_thres': -0.1,
+        'upper_thres': None, 'unit': 'GB/s', 'result': 'pass'
+    }
+
+
+def test_apply_reference_overrides(tmp_path):
+    """Verify that the references of the most specific scope matching the
+    test replace the references of its performance variables."""
+    def _ref(value):
+        return {'reference': [value, -0.1, None, 'GB/s'], 'samples': 5}
+
+    overrides = tmp_path / 'references.json'
+    overrides.write_text(json.dumps({'version': 1, 'references': {'stream': {
+        '*:*:gnu:gh200': {'triad': _ref(1), 'copy': _ref(1)},
+        'daint:normal:gnu:*': {'triad': _ref(2)},
+        'daint:normal:gnu:gh200': {'triad': _ref(3), 'unknown': _ref(3)},
+        'daint:normal:cray:gh200': {'triad': _ref(4)},
+        'daint:normal:gnu': {'triad': _ref(5)}
+    }}}))
+    partition = types.SimpleNamespace(
+        name='normal', fullname='daint:normal',
+        devices=[types.SimpleNamespace(arch='sm_90')]
+    )
+    test = types.SimpleNamespace(
+        reference_overrides=str(overrides), display_name='stream',
+        current_system=types.SimpleNamespace(name='daint'),
+        current_partition=partition,
+        current_environ=types.SimpleNamespace(name='gnu'),
+        perf_variables={'triad': None, 'copy': None},
+        reference={'daint:normal:copy': (10, -0.2, None, 'GB/s')}
+    )
+    ReferenceOverridesMixin.apply_reference_overrides(test)
+    assert test.reference == {
+        'daint:normal:triad': (3, -0.1, None, 'GB/s'),
+        'daint:normal:copy': (10, -0.2, None, 'GB/s')
+    }
+
+    test.display_name = 'other'
+    test.reference = {}
+    ReferenceOverridesMixin.apply_reference_overrides(test)
+    assert test.reference == {}
@@ -0,0 +1,387 @@
+import datetime
+import hashlib
+import os
+import pathlib
+import shutil
+import sys
+import tarfile
+import threading
+import types
+
+import pytest
+
+pytest.importorskip('firecrest')
+pytest.importorskip('hostlist')
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+import firecrest as fc  # noqa: E402
+import httpx  # noqa: E402
+from reframe.core.backends import getlauncher  # noqa: E402
+from reframe.core.exceptions import JobSchedulerError  # noqa: E402
+from reframe.core.schedulers import Job  # noqa: E402
+from reframe.core.schedulers.slurm import SlurmJobScheduler  # noqa: E402
+
+import firecrest_slurm  # noqa: E402
+
+
+def _firecrest_error(status_code):
+    return fc.FirecrestException([httpx.Response(
+        status_code, json={'message': 'error'},
+        request=httpx.Request('GET', 'https://firecrest.test')
+    )])
+
+
+class _StubClient:
+    '''FirecREST client operating on a local directory as the remote
+    filesystem'''
+
+    def __init__(self, root):
+        self.root = root
+        self.calls = []
+        self.submit_started = threading.Event()
+        self.submit_released = threading.Event()
+        self.submit_released.set()
+        self.submit_error = None
+
+        # The job listing of the user and the jobs that can be queried
+        # individually, by job id
+        self.listing = []
+        self.jobs = {}
+
+        # The files of the uploaded archives
+        self.archived = []
+
+    def _local(self, path):
+        return os.path.join(self.root, path.lstrip('/'))
+
+    def rm(self, system, path):
+        self.calls.append(('rm', path))
+        local_path = self._local(path)
+        if os.path.isdir(local_path) and not os.path.islink(local_path):
+            shutil.rmtree(local_path)
+        elif os.path.lexists(local_path):
+            os.remove(local_path)
+        else:
+            raise _firecrest_error(404)
+
+    def mkdir(self, system, path, create_parents=False):
+        self.calls.append(('mkdir', path))
+        os.makedirs(self._local(path), exist_ok=True)
+
+    def upload(self, system, local_file, directory, filename):
+        self.calls.append(('upload', os.path.join(directory, filename)))
+        if tarfile.is_tarfile(local_file):
+            with tarfile.open(local_file) as archive:
+                self.archived.append(sorted(m.name for m in archive
+                                            if not m.isdir()))
+
+        shutil.copy(local_file, self._local(os.path.join(directory,
+                                                         filename)))
+
+    def download(self, system, source_path, target_path):
+        self.calls.append(('download', source_path))
+        shutil.copy(self._local(source_path), target_path)
+
+    def symlink(self, system, path, link_path):
+        self.calls.append(('symlink', link_path))
+        os.symlink(path, self._local(link_path))
+
+    def list_files(self, system, path, show_hidden=False):
+        local_path = self._local(path)
+        if not os.path.isdir(local_path):
+            raise _firecrest_error(404)
+
+        entries = []
+        for name in sorted(os.listdir(local_path)):
+            entry_path = os.path.join(local_path, name)
+            st = os.lstat(entry_path)
+            entry = {
+                'name': name, 'size': str(st.st_size),
+                'lastModified': datetime.datetime.fromtimestamp(
+                    st.st_mtime, datetime.timezone.utc
+                ).isoformat(),
+                'type': '-', 'linkTarget': None
+            }
+            if os.path.islink(entry_path):
+                entry.update(type='l', linkTarget=os.readlink(entry_path))
+            elif os.path.isdir(entry_path):
+                entry['type'] = 'd'
+
+            entries.append(entry)
+
+        return entries
+
+    def compress(self, system, source_path, target_path, compression='gzip'):
+        self.calls.append(('compress', source_path))
+        with tarfile.open(self._local(target_path), 'w:gz') as archive:
+            archive.add(self._local(source_path),
+                        arcname=os.path.basename(source_path))
+
+    def extract(self, system, path, target_path, compression='gzip'):
+        self.calls.append(('extract', path))
+        with tarfile.open(self._local(path)) as archive:
+            archive.extractall(self._local(target_path))
+
+    def submit(self, system, working_dir, script_remote_path):
+        self.calls.append(('submit', script_remote_path))
+        self.submit_started.set()
+        self.submit_released.wait()
+        if self.submit_error:
+            raise self.submit_error
+
+        return {'jobId': 42}
+
+    def cancel_job(self, system, jobid):
+        self.calls.append(('cancel_job', jobid))
+
+    def job_info(self, system, jobid=None):
+        self.calls.append(('job_info', jobid))
+        if jobid is None and self.listing is not None:
+            return self.listing
+
+        if jobid not in self.jobs:
+            raise _firecrest_error(404 if jobid else 500)
+
+        return self.jobs[jobid]
+
+
+@pytest.fixture
+def client(tmp_path):
+    ret = _StubClient(str(tmp_path / 'remote'))
+    yield ret
+
+    # Do not leave a blocked submission behind if the test failed
+    ret.submit_released.set()
+
+
+@pytest.fixture
+def scheduler(monkeypatch, tmp_path, client):
+    for var in ('FIRECREST_CLIENT_ID', 'FIRECREST_CLIENT_SECRET',
+                'AUTH_TOKEN_URL', 'FIRECREST_URL', 'FIRECREST_SYSTEM'):
+        monkeypatch.setenv(var, 'test')
+
+    monkeypatch.setenv('FIRECREST_BASEDIR', '/scratch/rfm')
+
+    # The options of the Slurm scheduler are read from the configuration
+    # of the ReFrame runtime
+    monkeypatch.setattr(SlurmJobScheduler, '__init__', lambda self: None)
+    monkeypatch.setattr(firecrest_slurm.rt, 'runtime',
+                        lambda: types.SimpleNamespace(
+                            stage_prefix=str(tmp_path / 'stage')))
+    ret = firecrest_slurm.SlurmFirecrestJobScheduler()
+    ret._resubmit_on_errors = []
+    ret.client = client
+    return ret
+
+
+def _make_job(scheduler, tmp_path, monkeypatch, name='rfm-job'):
+    stagedir = tmp_path / 'stage' / 'test'
+    stagedir.mkdir(parents=True, exist_ok=True)
+    (stagedir / f'{name}.sh').write_text('#!/bin/bash\n')
+    monkeypatch.chdir(stagedir)
+    return Job.create(scheduler, getlauncher('local')(), name=name,
+                      workdir=str(stagedir))
+
+
+def test_background_submission(scheduler, client, tmp_path, monkeypatch):
+    """Verify that a job being staged is reported as not finished and that
+    cancelling it waits for its job id."""
+    client.submit_released.clear()
+    job = _make_job(scheduler, tmp_path, monkeypatch)
+    job.submit()
+    assert client.submit_started.wait(10)
+    assert job.jobid is None
+    assert not job.finished()
+
+    client.submit_released.set()
+    job.cancel()
+    assert job.jobid == '42'
+    assert client.calls[-1] == ('cancel_job', '42')
+    assert (tmp_path / 'remote' / 'scratch' / 'rfm' / 'test' /
+            'rfm-job.sh').exists()
+
+
+def test_failed_background_submission(scheduler, client, tmp_path,
+                                      monkeypatch):
+    """Verify that a failed background submission is raised when polling
+    or waiting for the job and that it is not cancelled."""
+    client.submit_error = RuntimeError('no allocation')
+    job = _make_job(scheduler, tmp_path, monkeypatch)
+    job.submit()
+    with pytest.raises(JobSchedulerError, match='no allocation'):
+        job.wait()
+
+    with pytest.raises(JobSchedulerError, match='no allocation'):
+        job.finished()
+
+    job.cancel()
+    assert not [c for c in client.calls if c[0] == 'cancel_job']
+
+
+def _descr(jobid, state='RUNNING', **kwargs):
+    return {'jobId': jobid, 'status': {'state': state}, 'nodes': 'nid001',
+            'time': {}, **kwargs}
+
+
+def _job(jobid, options=()):
+    return types.SimpleNamespace(jobid=jobid, is_array=False,
+                                 options=list(options), cli_options=[])
+
+
+def test_jobs_info_listing(scheduler, client):
+    """Verify that the jobs, job array tasks and heterogeneous job components
+    are found in the job listing."""
+    client.listing = [
+        _descr(1), _descr('2_0', arrayJobId=2), _descr('2_1', arrayJobId=2),
+        _descr('3+0'), _descr('3+1'), _descr(9)
+    ]
+    jobs = [_job('1'), _job('2'), _job('3')]
+    info = scheduler._jobs_info(jobs)
+    assert {jobid: [d['jobId'] for d in descrs]
+            for jobid, descrs in info.items()} == {
+        '1': [1], '2': ['2_0', '2_1'], '3': ['3+0', '3+1']
+    }
+    assert client.calls == [('job_info', None)]
+
+
+def test_jobs_info_queried_individually(scheduler, client):
+    """Verify that the jobs with components and the jobs missing from the
+    listing are queried individually and that unknown jobs are skipped."""
+    client.listing = [_descr(1), _descr('2_0', arrayJobId=2)]
+    client.jobs = {
+        '2': [_descr('2_0', arrayJobId=2), _descr('2_1', arrayJobId=2)],
+        '3': [_descr(3, 'COMPLETED')]
+    }
+    jobs = [_job('1'), _job('2', ['--array=0-1']), _job('3'), _job('4')]
+    info = scheduler._jobs_info(jobs)
+    assert {jobid: [d['jobId'] for d in descrs]
+            for jobid, descrs in info.items()} == {
+        '1': [1], '2': ['2_0', '2_1'], '3': [3]
+    }
+    assert sorted(c[1] for c in client.calls
+                  if c[1] is not None) == ['2', '3', '4']
+
+
+def test_jobs_info_listing_failure(scheduler, client):
+    """Verify that all the jobs are queried individually if the listing
+    fails."""
+    client.listing = None
+    client.jobs = {'1': [_descr(1)], '2': [_descr(2)]}
+    info = scheduler._jobs_info([_job('1'), _job('2')])
+    assert sorted(info) == ['1', '2']
+
+
+@pytest.fixture
+def stage_job(tmp_path):
+    localdir = tmp_path / 'stage' / 'test'
+    localdir.mkdir(parents=True)
+    return types.SimpleNamespace(name='rfm-job', _localdir=str(localdir),
+                                 _remotedir='/scratch/rfm/test')
+
+
+def _push(scheduler, client, job):
+    client.mkdir('test', job._remotedir)
+    scheduler._push_artefacts(job)
+
+
+def _remote(client, job, path=''):
+    return pathlib.Path(client._local(os.path.join(job._remotedir, path)))
+
+
+def _downloaded(client):
+    return [os.path.basename(c[1]) for c in client.calls if c[0] == 'download']
+
+
+def test_push_changed_files(scheduler, client, stage_job):
+    """Verify that only the new and changed files are pushed again."""
+    localdir = pathlib.Path(stage_job._localdir)
+    (localdir / 'rfm-job.sh').write_text('#!/bin/bash\n')
+    (localdir / 'src').mkdir()
+    (localdir / 'src' / 'main.c').write_text('int main() {}\n')
+    _push(scheduler, client, stage_job)
+    assert client.archived == [['rfm-job.sh', 'src/main.c']]
+    assert (_remote(client, stage_job, 'src/main.c').read_text() ==
+            'int main() {}\n')
+
+    (localdir / 'src' / 'main.c').write_text('int main() { return 1; }\n')
+    _push(scheduler, client, stage_job)
+    assert client.archived[-1] == ['src/main.c']
+    assert (_remote(client, stage_job, 'src/main.c').read_text() ==
+            'int main() { return 1; }\n')
+
+    _push(scheduler, client, stage_job)
+    assert len(client.archived) == 2
+
+
+def test_push_dedup(scheduler, client, stage_job, tmp_path):
+    """Verify that the large files are uploaded once to the store and
+    linked in every remote stage directory."""
+    scheduler._dedup_min_size = 1024
+    data = b'x' * 4096
+    digest = hashlib.sha256(data).hexdigest()
+    jobs = [stage_job, types.SimpleNamespace(
+        name='rfm-job', _localdir=str(tmp_path / 'stage' / 'other'),
+        _remotedir='/scratch/rfm/other'
+    )]
+    for job in jobs:
+        os.makedirs(job._localdir, exist_ok=True)
+        pathlib.Path(job._localdir, 'input.dat').write_bytes(data)
+        pathlib.Path(job._localdir, 'rfm-job.sh').write_text('#!/bin/bash\n')
+        _push(scheduler, client, job)
+        assert (os.readlink(_remote(client, job, 'input.dat')) ==
+                f'/scratch/rfm/.rfm-store/{digest}')
+
+    assert client.archived == [['rfm-job.sh'], ['rfm-job.sh']]
+    assert [c[1] for c in client.calls if c[0] == 'upload' and
+            '.rfm-store' in c[1]] == [f'/scratch/rfm/.rfm-store/{digest}']
+    assert (pathlib.Path(client._local('/scratch/rfm/.rfm-store')) /
+            digest).read_bytes() == data
+
+
+@pytest.mark.parametrize('max_files', [32, 0])
+def test_pull_patterns(scheduler, client, stage_job, max_files):
+    """Verify that only the files selected by the include and exclude
+    patterns are pulled, by file and by archive."""
+    scheduler._pull_include = ['*.out', 'results/*']
+    scheduler._pull_exclude = ['*.tmp.out']
+    scheduler._pull_max_files = max_files
+    remotedir = _remote(client, stage_job)
+    (remotedir / 'results').mkdir(parents=True)
+    for path in ('rfm-job.out', 'rfm-job.err', 'scratch.tmp.out',
+                 'results/data.csv'):
+        (remotedir / path).write_text(path)
+
+    scheduler._pull_artefacts(stage_job)
+    localdir = pathlib.Path(stage_job._localdir)
+    assert sorted(str(p.relative_to(localdir))
+                  for p in localdir.rglob('*') if p.is_file()) == [
+        'results/data.csv', 'rfm-job.out'
+    ]
+    assert (localdir / 'results' / 'data.csv').read_text() == (
+        'results/data.csv'
+    )
+
+
+def test_pull_by_mtime(scheduler, client, stage_job):
+    """Verify that the pushed and pulled files are pulled again only if they
+    changed on the remote system."""
+    localdir = pathlib.Path(stage_job._localdir)
+    for name in ('rfm-job.sh', 'input.txt'):
+        (localdir / name).write_text(name)
+
+    _push(scheduler, client, stage_job)
+    remotedir = _remote(client, stage_job)
+    (remotedir / 'rfm-job.out').write_text('output')
+    (remotedir / 'input.txt').write_text('input.tx2')
+    mtime = os.stat(remotedir / 'input.txt').st_mtime + 60
+    os.utime(remotedir / 'input.txt', (mtime, mtime))
+
+    scheduler._pull_artefacts(stage_job)
+    assert sorted(_downloaded(client)) == ['input.txt', 'rfm-job.out']
+    assert (localdir / 'input.txt').read_text() == 'input.tx2'
+    assert os.stat(localdir / 'input.txt').st_mtime == pytest.approx(mtime)
+
+    client.calls.clear()
+    scheduler._pull_artefacts(stage_job)
+    assert _downloaded(client) == []
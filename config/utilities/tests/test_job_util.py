@@ -0,0 +1,129 @@
+import asyncio
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent.parent))
+
+from utilities.job_util import (DetectionBatch,  # noqa: E402
+                                JobRemoteDetect, SlurmContext)
+from utilities.slurm_inventory import SlurmInventory  # noqa: E402
+from utilities.topology_cache import TopologyCache  # noqa: E402
+
+# Runs the command of a heterogeneous job component with its output file,
+# failing the component $FAIL_HET_GROUP
+_FAKE_SRUN = '''#!/bin/bash
+for arg; do
+    case $arg in
+        --het-group=*) group=${arg#*=} ;;
+        --output=*) output=${arg#*=} ;;
+        --*) ;;
+        *) break ;;
+    esac
+    shift
+done
+
+[ "$group" = "$FAIL_HET_GROUP" ] && exit 3
+exec "$@" > "$output" 2>&1
+'''
+
+
+async def _run_locally(self, partition_name, wait):
+    # Run the job script in place of sbatch -W
+    output = self._OUTPUT_FILE.format(partition_name=partition_name)
+    with open(os.path.join(self.TMP_DIR, output), 'w') as fp:
+        completed = subprocess.run(
+            ['bash', self._SBATCH_FILE.format(partition_name=partition_name)],
+            cwd=self.TMP_DIR, stdout=fp, stderr=subprocess.STDOUT
+        )
+
+    return completed.returncode == 0
+
+
+@pytest.fixture
+def tmp_dir(tmp_path, monkeypatch):
+    bindir = tmp_path / 'bin'
+    bindir.mkdir()
+    (bindir / 'srun').write_text(_FAKE_SRUN)
+    (bindir / 'srun').chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bindir}{os.pathsep}{os.environ["PATH"]}')
+    monkeypatch.setattr(JobRemoteDetect, '_submit_job', _run_locally)
+    ret = tmp_path / 'detect'
+    ret.mkdir()
+    return str(ret)
+
+
+def _probe(tmp_dir, name):
+    return {'key': name, 'name': name, 'access_options': [],
+            'access_node': None, 'access_partition': f'-p{name}',
+            'job': JobRemoteDetect(tmp_dir, detect_containers=False,
+                                   detect_devices=False)}
+
+
+def test_het_job_failed_component(tmp_dir, monkeypatch):
+    """Verify that only the components of the heterogeneous job that
+    succeeded are detected."""
+    monkeypatch.setenv('FAIL_HET_GROUP', '1')
+    probes = [_probe(tmp_dir, 'normal'), _probe(tmp_dir, 'debug')]
+    failed = asyncio.run(
+        JobRemoteDetect(tmp_dir).het_job_submission(probes)
+    )
+    assert failed == [probes[1]]
+    assert probes[0]['job'].detected
+    assert probes[0]['access_options'] == ['-pnormal']
+    assert not probes[1]['job'].detected
+    assert probes[1]['access_options'] == []
+
+
+def test_batch_resubmits_failed_components(tmp_dir, monkeypatch):
+    """Verify that the partitions of the failed components are detected
+    with one job per partition."""
+    monkeypatch.setenv('FAIL_HET_GROUP', '0')
+    jobs = {name: JobRemoteDetect(tmp_dir, detect_containers=False,
+                                  detect_devices=False)
+            for name in ('normal', 'debug')}
+
+    async def _detect():
+        batch = DetectionBatch(tmp_dir, {('normal',), ('debug',)})
+        return await asyncio.gather(*(
+            batch.submit((name,), name, job, name, [], None, f'-p{name}')
+            for name, job in jobs.items()
+        ))
+
+    assert asyncio.run(_detect()) == [['-pnormal'], ['-pdebug']]
+    assert all(job.detected for job in jobs.values())
+
+
+def test_missing_output_is_not_detected(tmp_dir):
+    """Verify that a detection job without output is not detected."""
+    job = JobRemoteDetect(tmp_dir)
+    assert not job._extract_info('normal')
+    assert not job.detected
+
+
+async def _no_output(self, partition_name, wait):
+    # The job completed without running the probes
+    return True
+
+
+@pytest.mark.parametrize('submit_job,cached', [(_run_locally, True),
+                                               (_no_output, False)])
+def test_only_detections_are_cached(tmp_dir, tmp_path, monkeypatch,
+                                    submit_job, cached):
+    """Verify that a detection job without the probe output is not
+    cached."""
+    monkeypatch.setattr(JobRemoteDetect, '_submit_job', submit_job)
+    inventory = SlurmInventory([{
+        'NodeName': 'nid001', 'ActiveFeatures': 'gpu', 'Partitions': 'normal'
+    }], [], [])
+    cache = TopologyCache(str(tmp_path / 'cache.json'))
+    context = SlurmContext('lmod', detect_devices=False, tmp_dir=tmp_dir,
+                           inventory=inventory, topology_cache=cache)
+    asyncio.run(context.create_remote_partition(
+        ('gpu',), 'srun', 'slurm', user_input=False
+    ))
+    cache.save()
+    assert os.path.exists(cache.path) == cached
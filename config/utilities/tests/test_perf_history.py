@@ -0,0 +1,108 @@
+import logging
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+from perf_history import (PerfHistory, PerfHistoryHandler,  # noqa: E402
+                          parse_filelog)
+
+
+# A perflog line with the filelog format of config/common.py
+_FILELOG = (
+    '2024-05-02T10:15:30+02:00|reframe 4.6.0|'
+    'stream_test /1a2b3c4d @daint:normal+gnu|jobid=123456|num_tasks=4|'
+    'triad=51234.5|ref=50000.0 (l=-0.1, u=null)|MB/s\n'
+)
+
+
+def _row(time, value, **kwargs):
+    row = {
+        'time': time, 'system': 'daint', 'partition': 'normal',
+        'environ': 'gnu', 'test': 'stream_test', 'perf_var': 'triad',
+        'value': value, 'ref': 50000.0, 'lower_thres': -0.1,
+        'upper_thres': None, 'unit': 'MB/s', 'result': 'pass',
+        'jobid': str(time), 'num_tasks': 4
+    }
+    row.update(kwargs)
+    return row
+
+
+def test_parse_filelog(tmp_path):
+    """Verify that a filelog line is split into the columns of the store."""
+    perflog = tmp_path / 'stream_test.log'
+    perflog.write_text('not a perflog line\n' + _FILELOG)
+
+    rows = list(parse_filelog(perflog))
+    assert len(rows) == 1
+    row = rows[0]
+    assert row['time'] == 1714637730.0
+    assert (row['system'], row['partition'], row['environ']) == (
+        'daint', 'normal', 'gnu'
+    )
+    assert row['test'] == 'stream_test'
+    assert row['perf_var'] == 'triad'
+    assert row['value'] == 51234.5
+    assert row['ref'] == 50000.0
+    assert row['lower_thres'] == -0.1
+    assert row['upper_thres'] is None
+    assert row['unit'] == 'MB/s'
+    assert row['jobid'] == '123456'
+    assert row['num_tasks'] == 4
+
+
+def test_insert_query_round_trip(tmp_path):
+    """Verify that the inserted values are returned by the queries and that
+    values already stored are ignored."""
+    with PerfHistory(str(tmp_path / 'perf.db')) as store:
+        assert store.insert([_row(2.0, 20.0), _row(1.0, 10.0),
+                             _row(1.0, 5.0, environ='cray')]) == 3
+        assert store.insert([_row(1.0, 10.0)]) == 0
+
+        rows = store.values(environ='gnu')
+        assert [(r['time'], r['value']) for r in rows] == [(1.0, 10.0),
+                                                          (2.0, 20.0)]
+        assert rows[0]['unit'] == 'MB/s'
+        assert rows[0]['num_tasks'] == 4
+        assert len(store.values(environ='*')) == 3
+
+        series = store.series()
+        assert list(series) == [
+            ('daint', 'normal', 'cray', 'stream_test', 'triad'),
+            ('daint', 'normal', 'gnu', 'stream_test', 'triad')
+        ]
+
+
+def test_parsed_filelog_round_trip(tmp_path):
+    """Verify that the values parsed from a filelog can be stored."""
+    perflog = tmp_path / 'stream_test.log'
+    perflog.write_text(_FILELOG)
+    with PerfHistory(str(tmp_path / 'perf.db')) as store:
+        assert store.insert(parse_filelog(perflog)) == 1
+        row, = store.values(test='stream_*')
+        assert row['value'] == 51234.5
+        assert row['jobid'] == '123456'
+
+
+def test_handler_stores_records(tmp_path):
+    """Verify that the handler stores the perflog records when flushed."""
+    path = str(tmp_path / 'perf.db')
+    handler = PerfHistoryHandler(path, batch_size=10)
+    record = logging.makeLogRecord({
+        'check_info': 'stream_test /1a2b3c4d @daint:normal+gnu',
+        'check_job_completion_time_unix': 1714637730.0,
+        'check_perf_var': 'triad', 'check_perf_value': 51234.5,
+        'check_perf_ref': 50000.0, 'check_perf_unit': 'MB/s',
+        'check_jobid': 123456, 'check_num_tasks': 4
+    })
+    handler.emit(record)
+    handler.close()
+
+    with PerfHistory(path) as store:
+        row, = store.values()
+        assert (row['system'], row['partition'], row['environ']) == (
+            'daint', 'normal', 'gnu'
+        )
+        assert row['test'] == 'stream_test'
+        assert row['value'] == 51234.5
+        assert row['jobid'] == '123456'
@@ -0,0 +1,175 @@
+import argparse
+import json
+import logging
+import pathlib
+import sys
+import timeit
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+from perflog_formatters import victoriametrics_formatter  # noqa: E402
+
+EXTRAS = {'rfm_ci_pipeline': '#', 'rfm_ci_project': 'Unknown CI Project'}
+
+# A few of the test variables that config/common.py does not push
+IGNORE_KEYS = ['check_perfvalues', 'check_info', 'version',
+               'check_perf_result', 'check_job_nodelist', 'check_num_tasks',
+               'check_tags']
+
+# The standard log record attributes, which the ReFrame httpjson handler
+# adds to the ignored keys passed to the formatter
+LOG_ATTRS = set(logging.makeLogRecord({}).__dict__) | {'message'}
+
+
+def _format_per_record(record, extras, ignore_keys):
+    '''The VictoriaMetrics formatter before the labels were precomputed'''
+    data = {}
+    for attr, val in record.__dict__.items():
+        if attr in ignore_keys or attr.startswith('_'):
+            continue
+
+        if attr in ('check_perf_value', 'check_perf_ref') and val is not None:
+            data[attr] = float(val)
+        else:
+            data[attr] = val
+
+    data.update(extras)
+
+    timestamp = data.get('check_job_completion_time_unix')
+    timestamps = [int(timestamp * 1000)] if timestamp is not None else None
+    labels = {
+        k: str(v) if v is not None else ''
+        for k, v in data.items()
+        if k not in ('check_perf_value', 'check_perf_ref')
+    }
+    labels.setdefault('__name__', labels.get('check_unique_name', 'reframe'))
+
+    lines = []
+    for perf_key, perf_type in (
+        ('check_perf_value', 'value'),
+        ('check_perf_ref', 'ref'),
+    ):
+        perf_val = data.get(perf_key)
+        if perf_val is None:
+            continue
+
+        payload = {
+            'metric': {**labels, 'check_perf_type': perf_type},
+            'values': [perf_val],
+        }
+        if timestamps is not None:
+            payload['timestamps'] = timestamps
+
+        lines.append(json.dumps(payload, separators=(',', ':')))
+
+    return '\n'.join(lines) + '\n' if lines else None
+
+
+def _make_records(num_cases, num_perf_vars):
+    '''Log records shaped like the ReFrame perflog records'''
+    records = []
+    for case in range(num_cases):
+        attrs = {
+            'check_name': f'osu_bw_{case}',
+            'check_unique_name': f'osu_bw_{case}',
+            'check_info': f'osu_bw_{case} @daint:normal+PrgEnv-gnu',
+            'check_system': 'daint',
+            'check_partition': 'normal',
+            'check_environ': 'PrgEnv-gnu',
+            'check_jobid': str(100000 + case),
+            'check_job_completion_time': '2024-01-01T00:00:00+0000',
+            'check_job_completion_time_unix': 1704067200.0 + case,
+            'check_job_nodelist': ['nid001', 'nid002'],
+            'check_num_tasks': 2,
+            'check_perfvalues': {},
+            'check_descr': 'Bandwidth "µs" test',
+            'check_exclusive_access': None,
+            'version': '4.7.0',
+        }
+        for var in range(num_perf_vars):
+            record = logging.makeLogRecord(attrs)
+            record.__dict__.update({
+                'check_perf_var': f'bw_{2 ** var}',
+                'check_perf_value': 1000.0 + var,
+                'check_perf_ref': 900 if var % 2 else None,
+                'check_perf_lower_thres': -0.1,
+                'check_perf_upper_thres': None,
+                'check_perf_unit': 'MB/s',
+                'check_perf_result': 'pass',
+            })
+            records.append(record)
+
+    return records
+
+
+def _parse(lines):
+    return [json.loads(line) for line in lines.splitlines()]
+
+
+@pytest.mark.parametrize('ignore_keys', [LOG_ATTRS,
+                                         LOG_ATTRS | set(IGNORE_KEYS)])
+def test_victoriametrics_formatter(ignore_keys):
+    """Verify that the precomputed labels produce the same import lines as
+    serializing every record."""
+    formatter = victoriametrics_formatter(IGNORE_KEYS)
+    expected_ignore_keys = ignore_keys | set(IGNORE_KEYS)
+    records = _make_records(3, 4)
+
+    # Records of the same test case are not always consecutive
+    records.append(records[0])
+    for record in records:
+        expected = _format_per_record(record, EXTRAS, expected_ignore_keys)
+        actual = formatter(record, EXTRAS, ignore_keys)
+        assert actual.endswith('\n')
+        assert _parse(actual) == _parse(expected)
+
+
+def test_victoriametrics_formatter_no_values():
+    """Verify that the records without values and without completion time
+    are formatted as before."""
+    formatter = victoriametrics_formatter(IGNORE_KEYS)
+    record = logging.makeLogRecord({'check_info': 'test @daint:normal+gnu',
+                                    'check_perf_var': 'bw',
+                                    'check_perf_value': None})
+    assert formatter(record, {}, LOG_ATTRS) is None
+
+    record.check_perf_value = '1.5'
+    assert _parse(formatter(record, {}, LOG_ATTRS)) == _parse(
+        _format_per_record(record, {}, LOG_ATTRS | set(IGNORE_KEYS))
+    )
+
+
+if __name__ == '__main__':
+    # Manual benchmark, e.g. with --cases 50 --perf-vars 100
+    parser = argparse.ArgumentParser(
+        description='Microbenchmark of the VictoriaMetrics perflog formatter'
+    )
+    parser.add_argument('--cases', type=int, default=20,
+                        help='number of test cases')
+    parser.add_argument('--perf-vars', type=int, default=50,
+                        help='number of perf variables per test case')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of timed repetitions')
+    args = parser.parse_args()
+
+    records = _make_records(args.cases, args.perf_vars)
+    ignore_keys = LOG_ATTRS | set(IGNORE_KEYS)
+    formatters = {
+        'per-record': _format_per_record,
+        'precomputed': victoriametrics_formatter(IGNORE_KEYS),
+    }
+    print(f'{len(records)} records '
+          f'({args.cases} test cases x {args.perf_vars} perf variables)')
+    costs = {}
+    for name, formatter in formatters.items():
+        best = min(timeit.repeat(
+            lambda: [formatter(r, EXTRAS, ignore_keys) for r in records],
+            number=1, repeat=args.repeat
+        ))
+        costs[name] = best / len(records) * 1e6
+        print(f'{name:>12}: {costs[name]:.2f} us/record')
+
+    print(f'{"speedup":>12}: '
+          f'{costs["per-record"] / costs["precomputed"]:.2f}x')
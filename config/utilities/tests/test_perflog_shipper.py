@@ -0,0 +1,121 @@
+import gzip
+import http.server
+import json
+import pathlib
+import sys
+import threading
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+from perflog_shipper import HTTPBatchShipper, batched  # noqa: E402
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((dict(self.headers), body))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.HTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.requests = []
+    httpd.status = 204
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server):
+    return f'http://127.0.0.1:{server.server_port}/api/v1/import'
+
+
+def test_batch_body_and_headers(server):
+    """Verify that the records are posted as one gzip NDJSON payload with the
+    handler headers."""
+    shipper = HTTPBatchShipper(_url(server), headers={'X-Tenant': 'cscs'},
+                               backoff=())
+    formatter = batched(lambda record, extras, ignore: json.dumps(record),
+                        shipper)
+    for i in range(3):
+        assert formatter({'value': i}, {}, ()) is None
+
+    shipper.flush()
+    shipper.close()
+
+    assert len(server.requests) == 1
+    headers, body = server.requests[0]
+    assert headers['Content-Type'] == 'application/x-ndjson'
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['X-Tenant'] == 'cscs'
+    lines = gzip.decompress(body).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'value': 0}, {'value': 1}, {'value': 2}
+    ]
+
+
+def test_failed_batch_is_spooled(server, tmp_path):
+    """Verify that a batch that could not be delivered is kept in the spool
+    and replayed after the next delivered batch."""
+    server.status = 503
+    shipper = HTTPBatchShipper(_url(server), backoff=(), spool_dir=tmp_path)
+    shipper.submit('{"value": 1}')
+    shipper.flush()
+    spooled = list(tmp_path.glob('*.ndjson.gz'))
+    assert len(spooled) == 1
+
+    server.status = 204
+    shipper.submit('{"value": 2}')
+    shipper.flush()
+    shipper.close()
+
+    assert not list(tmp_path.glob('*.ndjson.gz'))
+    bodies = [gzip.decompress(body).decode() for _, body in server.requests]
+    assert bodies == ['{"value": 1}\n', '{"value": 2}\n', '{"value": 1}\n']
+
+
+def test_rejected_batch_is_not_replayed(server, tmp_path):
+    """Verify that a batch rejected by the endpoint is moved out of the
+    spool and never sent again."""
+    server.status = 400
+    shipper = HTTPBatchShipper(_url(server), backoff=(), spool_dir=tmp_path)
+    shipper.submit('{"value": 1}')
+    shipper.flush()
+    assert not list(tmp_path.glob('*.ndjson.gz'))
+    rejected = list((tmp_path / 'rejected').glob('*.ndjson.gz'))
+    assert len(rejected) == 1
+    assert gzip.decompress(rejected[0].read_bytes()) == b'{"value": 1}\n'
+
+    server.status = 204
+    for i in (2, 3):
+        shipper.submit(f'{{"value": {i}}}')
+        shipper.flush()
+
+    shipper.close()
+    bodies = [gzip.decompress(body).decode() for _, body in server.requests]
+    assert bodies == ['{"value": 1}\n', '{"value": 2}\n', '{"value": 3}\n']
+
+
+def test_rejected_spooled_batch(server, tmp_path):
+    """Verify that a spooled batch rejected when replayed is moved out of
+    the spool."""
+    server.status = 503
+    shipper = HTTPBatchShipper(_url(server), backoff=(), spool_dir=tmp_path)
+    shipper.submit('{"value": 1}')
+    shipper.flush()
+    shipper.close()
+
+    server.status = 422
+    shipper = HTTPBatchShipper(_url(server), backoff=(), spool_dir=tmp_path)
+    shipper.close()
+    assert not list(tmp_path.glob('*.ndjson.gz'))
+    assert len(list((tmp_path / 'rejected').glob('*.ndjson.gz'))) == 1
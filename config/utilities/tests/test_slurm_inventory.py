@@ -0,0 +1,31 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+from slurm_inventory import SlurmInventory  # noqa: E402
+
+
+def _node(name, features, gres='gpu:4', cpus='288'):
+    return {'NodeName': name, 'ActiveFeatures': features, 'Gres': gres,
+            'CPUTot': cpus, 'RealMemory': '860000', 'Sockets': '4',
+            'CoresPerSocket': '72', 'ThreadsPerCore': '1',
+            'Arch': 'aarch64', 'Partitions': 'normal'}
+
+
+def test_hardware_signature():
+    """Verify that node types with the same hardware share the signature
+    unless their active features are included."""
+    inventory = SlurmInventory([
+        _node('nid001', 'gh200,amd_gpu_off'),
+        _node('nid002', 'gh200,debug'),
+        _node('nid003', 'mc', gres='(null)', cpus='256')
+    ], [], [])
+
+    gh200 = inventory.hardware_signature(['amd_gpu_off'])
+    assert gh200 == inventory.hardware_signature(['debug'])
+    assert gh200 != inventory.hardware_signature(['mc'])
+    assert (inventory.hardware_signature(['amd_gpu_off'], features=True) !=
+            inventory.hardware_signature(['debug'], features=True))
+    assert inventory.hardware_signature(['unknown']) == ('features',
+                                                         'unknown')
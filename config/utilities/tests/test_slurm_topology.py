@@ -0,0 +1,118 @@
+import pathlib
+import sys
+import types
+
+import pytest
+
+_ROOT = pathlib.Path(__file__).parent.parent.parent.parent
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+sys.path.append(str(_ROOT / 'checks' / 'mixins'))
+
+import topology_placement  # noqa: E402
+from reframe.core.exceptions import SkipTestError  # noqa: E402
+from slurm_inventory import _parse_scontrol_text  # noqa: E402
+from slurm_topology import SwitchTopology, expand_hostlist  # noqa: E402
+
+# Two groups of leaf switches with four nodes each
+_TOPOLOGY = '''\
+SwitchName=sw0 Level=0 LinkSpeed=1 Nodes=nid[001-004]
+SwitchName=sw1 Level=0 LinkSpeed=1 Nodes=nid[005-008]
+SwitchName=sw2 Level=0 LinkSpeed=1 Nodes=nid[009-012]
+SwitchName=g0 Level=1 LinkSpeed=1 Switches=sw[0-1]
+SwitchName=g1 Level=1 LinkSpeed=1 Switches=sw2
+'''
+
+
+@pytest.fixture
+def topology():
+    return SwitchTopology(_parse_scontrol_text(_TOPOLOGY))
+
+
+@pytest.mark.parametrize('hostlist,hosts', [
+    ('nid[001-003,010],login1', ['nid001', 'nid002', 'nid003', 'nid010',
+                                 'login1']),
+    ('nid[8-10]-ib', ['nid8-ib', 'nid9-ib', 'nid10-ib']),
+    ('nid001', ['nid001']),
+    ('', []),
+    (None, [])
+])
+def test_expand_hostlist(hostlist, hosts):
+    assert expand_hostlist(hostlist) == hosts
+
+
+def test_topology(topology):
+    assert topology.switch_of['nid006'] == 'sw1'
+    assert topology.group_of['nid006'] == 'g0'
+    assert topology.group_of['nid012'] == 'g1'
+
+
+@pytest.mark.parametrize('placement,nodes,num_nodes,selected', [
+    ('intra-switch', ['nid005', 'nid001', 'nid002'], 2, ['nid001', 'nid002']),
+    ('intra-switch', ['nid001', 'nid005', 'nid009'], 2, None),
+    ('intra-group', ['nid001', 'nid002', 'nid006'], 2, ['nid001', 'nid006']),
+    ('intra-group', ['nid001', 'nid002', 'nid009'], 2, None),
+    ('inter-group', ['nid001', 'nid005', 'nid010'], 2, ['nid001', 'nid010']),
+    ('inter-group', ['nid001', 'nid005', 'nid010'], 3, None),
+    ('intra-switch', ['login1', 'nid001'], 1, ['nid001'])
+])
+def test_select(topology, placement, nodes, num_nodes, selected):
+    assert topology.select(placement, nodes, num_nodes) == selected
+
+
+def test_select_unknown_placement(topology):
+    with pytest.raises(ValueError):
+        topology.select('intra-rack', ['nid001'], 1)
+
+
+@pytest.mark.parametrize('features,constraint,satisfied', [
+    (['gh200', 'amd'], 'gh200', True),
+    (['gh200', 'amd'], 'gh200&amd', True),
+    (['gh200', 'amd'], 'gh200,amd', True),
+    (['gh200'], 'gh200&amd', False),
+    (['mc'], '(gh200|mc)', True),
+    (['a100'], 'gh200|mc', False)
+])
+def test_satisfies(features, constraint, satisfied):
+    assert topology_placement._satisfies(features, constraint) == satisfied
+
+
+def test_idle_nodes(monkeypatch):
+    """Verify that the idle nodes are filtered by the constraint and the
+    reservation of the access options."""
+    outputs = {
+        'sinfo': ('nid001 idle gh200\nnid002 resv gh200\nnid003 resv mc\n'
+                  'nid004 alloc gh200\nnid005 resv gh200\n'),
+        'scontrol': 'ReservationName=maint Nodes=nid[001-003] State=ACTIVE'
+    }
+    commands = []
+
+    def _run(cmd):
+        commands.append(cmd)
+        return outputs[cmd[0]]
+
+    monkeypatch.setattr(topology_placement, '_run', _run)
+    nodes = topology_placement._idle_nodes(
+        ['-pnormal', '--constraint=gh200', '--reservation=maint']
+    )
+    assert nodes == ['nid001', 'nid002']
+    assert commands[-1] == ['sinfo', '-h', '-N', '-o', '%N %t %f',
+                            '-p', 'normal']
+
+    assert topology_placement._idle_nodes([]) == ['nid001']
+
+
+def test_placement_skipped_without_local_slurm():
+    """Verify that a placement is skipped on partitions whose scheduler
+    does not run the Slurm commands on the local host."""
+    def _skip_if(cond, msg):
+        if cond:
+            raise SkipTestError(msg)
+
+    test = types.SimpleNamespace(
+        placement='intra-switch', skip_if=_skip_if,
+        current_partition=types.SimpleNamespace(
+            scheduler=types.SimpleNamespace(registered_name='firecrest-slurm')
+        )
+    )
+    with pytest.raises(SkipTestError, match='firecrest-slurm'):
+        topology_placement.TopologyPlacementMixin.set_placement(test)
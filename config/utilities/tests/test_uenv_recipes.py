@@ -0,0 +1,133 @@
+import json
+import pathlib
+import sys
+import time
+import pytest
+
+pytest.importorskip("reframe")
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+import uenv  # noqa: E402
+
+SYSTEMS = ["daint", "eiger", "santis", "clariden", "starlex"]
+UARCHS = ["gh200", "zen2", "a100", "mi300"]
+
+RECIPE_YAML = """\
+gnu:
+  features: [gcc, mpi]
+  cc: mpicc
+  cxx: mpic++
+  ftn: mpifort
+  activation: [/user-environment/env/default/activate.sh]
+  views: [default]
+"""
+
+
+def make_recipes(root: pathlib.Path, num_recipes: int) -> list[dict]:
+    """Creates `num_recipes` recipes (name/version/uarch) and an inventory
+    covering half of them."""
+    records = []
+    for i in range(num_recipes):
+        name, version = f"app{i // 40}", f"{i % 10}.0"
+        uarch = UARCHS[(i // 10) % len(UARCHS)]
+        meta = root / name / version / uarch / "extra"
+        meta.mkdir(parents=True)
+        (meta / "reframe.yaml").write_text(RECIPE_YAML)
+        if i % 2 == 0:
+            for system in SYSTEMS[: 1 + i % len(SYSTEMS)]:
+                records.append({"name": name, "version": version,
+                                "uarch": uarch, "system": system})
+
+    return records
+
+
+def naive_target_systems(recipe_root, recipe_dir_path, records):
+    """The original O(records) linear scan, used as reference."""
+    parts = recipe_root.relative_to(recipe_dir_path).as_posix().split("/")
+    name, version = parts[0], parts[1]
+    uarch = parts[2] if len(parts) > 2 else None
+    return sorted({
+        r["system"] for r in records
+        if r.get("name") == name and r.get("version") == version
+        and (uarch is None or r.get("uarch") == uarch)
+    })
+
+
+@pytest.fixture
+def recipes(tmp_path, monkeypatch):
+    recipe_dir = tmp_path / "recipes"
+    records = make_recipes(recipe_dir, 200)
+    inventory = tmp_path / "inventory.json"
+    inventory.write_text(json.dumps({"records": records}))
+    monkeypatch.setenv(uenv.UENV_IMAGE_INVENTORY_ENVVAR, str(inventory))
+    monkeypatch.setenv(uenv.UENV_CACHE_DIR_ENVVAR, str(tmp_path / "cache"))
+    return recipe_dir, records
+
+
+def test_index_matches_linear_scan(recipes):
+    recipe_dir, records = recipes
+    index = uenv._index_inventory_records(records)
+    for rfm_meta in uenv._find_recipe_metadata(recipe_dir):
+        recipe_root = rfm_meta.parent.parent
+        for root in (recipe_root, recipe_root.parent):
+            assert (uenv._recipe_target_systems(root, recipe_dir, index) ==
+                    naive_target_systems(root, recipe_dir, records))
+
+
+def test_recipes_are_cached_by_mtime(recipes, tmp_path):
+    recipe_dir, _ = recipes
+    cold = uenv._load_uenvs_from_recipes(str(recipe_dir))
+    assert len(cold) == 100
+    assert cold[0]["prepare_cmds"] == [
+        "/user-environment/env/default/activate.sh"
+    ]
+    assert (tmp_path / "cache" / "recipes.json").is_file()
+
+    assert uenv._load_uenvs_from_recipes(str(recipe_dir)) == cold
+
+    changed = uenv._find_recipe_metadata(recipe_dir)[0]
+    changed.write_text(RECIPE_YAML.replace("mpicc", "cc") + "  # edited\n")
+    warm = uenv._load_uenvs_from_recipes(str(recipe_dir))
+    assert [e["cc"] for e in warm].count("cc") == 1
+
+
+if __name__ == "__main__":
+    # Manual benchmark, with an optional number of recipes
+    import os
+    import tempfile
+
+    num_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        recipe_dir = tmp / "recipes"
+        records = make_recipes(recipe_dir, num_recipes)
+        (tmp / "inventory.json").write_text(json.dumps({"records": records}))
+        os.environ[uenv.UENV_IMAGE_INVENTORY_ENVVAR] = str(
+            tmp / "inventory.json"
+        )
+        os.environ[uenv.UENV_CACHE_DIR_ENVVAR] = str(tmp / "cache")
+
+        roots = [p.parent.parent
+                 for p in uenv._find_recipe_metadata(recipe_dir)]
+        start = time.perf_counter()
+        for root in roots:
+            naive_target_systems(root, recipe_dir, records)
+        linear = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = uenv._index_inventory_records(records)
+        for root in roots:
+            uenv._recipe_target_systems(root, recipe_dir, index)
+        indexed = time.perf_counter() - start
+
+        print(f"{num_recipes} recipes, {len(records)} inventory records, "
+              f"yaml loader: {uenv._YAML_LOADER.__name__}")
+        print(f"  target systems, linear scan: {linear:8.3f} s")
+        print(f"  target systems, index:       {indexed:8.3f} s")
+        for run in ("cold", "warm"):
+            start = time.perf_counter()
+            envs = uenv._load_uenvs_from_recipes(str(recipe_dir))
+            elapsed = time.perf_counter() - start
+            print(f"  _load_uenvs_from_recipes ({run}): {elapsed:8.3f} s "
+                  f"({len(envs)} environments)")
@@ -0,0 +1,118 @@
+# Copyright 2024 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import fnmatch
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Union
+from utilities.io import getlogger
+
+# The entries of version 1 may hold failed detections
+CACHE_VERSION = 2
+
+# Seconds after which the detected container platforms, which are software
+# and may change without any change of the hardware, are detected again
+CONTAINERS_TTL = 24 * 3600
+
+
+def default_cache_path(system_name: str) -> str:
+    '''Default location of the topology cache of a system'''
+    cache_home = os.environ.get('XDG_CACHE_HOME',
+                                os.path.join(os.path.expanduser('~'),
+                                             '.cache'))
+    return os.path.join(cache_home, 'cscs-reframe-tests', 'config-detection',
+                        f'{system_name}.json')
+
+
+class TopologyCache:
+    '''Results of the remote detection jobs of previous runs
+
+    The entries are keyed by the node features, a hash of the node hardware
+    reported by Slurm and the detection options, so that a node type is
+    detected again only if its hardware changed or it is explicitly
+    refreshed. The entries with container platforms expire after
+    ``containers_ttl`` seconds.
+    '''
+
+    def __init__(self, path: str, refresh: Union[list, None] = None,
+                 containers_ttl: float = CONTAINERS_TTL):
+        self._path = path
+        self._containers_ttl = containers_ttl
+        # Patterns of the node features to detect again
+        self._refresh = refresh or []
+        self._modified = False
+        self._entries = {}
+        try:
+            with open(path) as fp:
+                data = json.load(fp)
+
+            if data.get('version') == CACHE_VERSION:
+                self._entries = data.get('entries', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            getlogger().warning(f'Ignoring the topology cache {path}: {e}')
+
+    @property
+    def path(self):
+        return self._path
+
+    @staticmethod
+    def key(node_feats: tuple, hardware: tuple, detect_containers: bool,
+            detect_devices: bool) -> str:
+        hardware_hash = hashlib.sha256(
+            json.dumps(hardware).encode()).hexdigest()[:16]
+        return json.dumps([list(node_feats), hardware_hash,
+                           bool(detect_containers), bool(detect_devices)])
+
+    def _is_refreshed(self, node_feats: tuple) -> bool:
+        return any(fnmatch.fnmatch(feat, pattern)
+                   for pattern in self._refresh for feat in node_feats)
+
+    def get(self, node_feats: tuple, key: str) -> Union[dict, None]:
+        '''Return the cached detection of the node type, if any'''
+        if self._is_refreshed(node_feats):
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None and json.loads(key)[2]:
+            # The cache time is unknown for entries written before the
+            # expiry was introduced
+            age = time.time() - entry.get('time', 0)
+            if age > self._containers_ttl:
+                return None
+
+        return entry
+
+    def put(self, node_feats: tuple, key: str, entry: dict):
+        # Drop the stale entries of the node type, e.g. of older hardware
+        self._entries = {k: v for k, v in self._entries.items()
+                         if json.loads(k)[0] != list(node_feats)}
+        self._entries[key] = dict(entry, time=time.time())
+        self._modified = True
+
+    def save(self):
+        '''Write the cache atomically if it was modified'''
+        if not self._modified:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self._path) or '.', suffix='.tmp'
+            )
+            with os.fdopen(fd, 'w') as fp:
+                json.dump({'version': CACHE_VERSION,
+                           'entries': self._entries}, fp, indent=2)
+
+            os.replace(tmp_path, self._path)
+            self._modified = False
+        except OSError as e:
+            getlogger().warning(
+                f'Unable to write the topology cache {self._path}: {e}'
+            )
@@ -1,8 +1,13 @@
+import functools
+import hashlib
 import json
 import os
 import pathlib
+import tempfile
+import time
 import yaml
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Tuple
 
 import reframe.utility.osext as osext
@@ -22,6 +27,18 @@ _RFM_META_DIR = pathlib.Path('meta')
 UENV_RECIPES_ENVVAR = 'CSCS_RFM_UENV_RECIPES_DIR'
 UENV_IMAGE_INVENTORY_ENVVAR = 'CSCS_RFM_UENV_IMAGE_INVENTORY'
 UENV_TARGET_SYSTEMS_ENVVAR = 'CSCS_RFM_UENV_TARGET_SYSTEMS'
+UENV_CACHE_DIR_ENVVAR = 'CSCS_RFM_UENV_CACHE_DIR'
+UENV_INVENTORY_TTL_ENVVAR = 'CSCS_RFM_UENV_INVENTORY_TTL'
+_UENV_CACHE_DIR_DEFAULT = (
+    pathlib.Path(os.environ.get('XDG_CACHE_HOME', '~/.cache')) /
+    'cscs-reframe-tests' / 'uenv'
+)
+# Seconds a cached 'uenv image find' result is reused; 0 disables the cache
+_UENV_INVENTORY_TTL_DEFAULT = 3600
+_UENV_INVENTORY_MAX_WORKERS = 8
+
+# Prefer the libyaml based loader, it is much faster than the pure Python one
+_YAML_LOADER = getattr(yaml, 'CBaseLoader', yaml.BaseLoader)
 
 # Environment variable used to explicitly request UENV image inventory
 # queries for one or more target systems. This avoids relying on the
@@ -110,6 +127,80 @@ def _parse_uenv_identifier(
 
     return (uenv_name, uenv_path)
 
+
+def _uenv_cache_dir() -> pathlib.Path:
+    return pathlib.Path(
+        os.environ.get(UENV_CACHE_DIR_ENVVAR, _UENV_CACHE_DIR_DEFAULT)
+    ).expanduser()
+
+
+def _write_json_atomic(path: pathlib.Path, data) -> None:
+    # Write to a temporary file in the same directory and rename it, so that
+    # concurrent readers (e.g. parallel reframe invocations in a CI pipeline)
+    # never see a partially written file. Caching is best effort, errors are
+    # ignored.
+    tmp_path = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp'
+        )
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        os.replace(tmp_path, path)
+    except OSError:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _uenv_inventory_ttl() -> float:
+    ttl = os.environ.get(UENV_INVENTORY_TTL_ENVVAR)
+    if ttl is None:
+        return _UENV_INVENTORY_TTL_DEFAULT
+
+    try:
+        return float(ttl)
+    except ValueError:
+        raise ConfigError(
+            f"{UENV_INVENTORY_TTL_ENVVAR} must be a number of seconds: {ttl}"
+        )
+
+
+def _find_uenv_images(system: Optional[str] = None) -> dict:
+    # Return the output of 'uenv image find --json [@system]', reusing the
+    # result of a previous query for the same system if it is not older than
+    # the configured TTL
+    if system:
+        cmd = f"{_UENV_CLI} image find --json @{system}"
+    else:
+        cmd = f"{_UENV_CLI} image find --json"
+
+    ttl = _uenv_inventory_ttl()
+    cache_name = (system or '_default').replace('/', '_')
+    cache_file = _uenv_cache_dir() / 'inventory' / f'{cache_name}.json'
+    if ttl > 0:
+        try:
+            if time.time() - cache_file.stat().st_mtime < ttl:
+                with open(cache_file, encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    output = osext.run_command(cmd, shell=True).stdout
+    try:
+        inventory = json.loads(output)
+    except json.JSONDecodeError as err:
+        raise ConfigError(
+            f"Cannot parse JSON from '{cmd}': {err}"
+        )
+
+    if ttl > 0 and isinstance(inventory, dict):
+        _write_json_atomic(cache_file, inventory)
+
+    return inventory
+
+
 def _load_uenv_image_inventory(path: str | None = None) -> list[dict]:
     # Load UENV inventory from a provided JSON file or from the UENV CLI.
     # When no inventory file is configured, prefer explicit per-system
@@ -139,17 +230,17 @@ def _load_uenv_image_inventory(path: str | None = None) -> list[dict]:
         # This is the preferred path for multi-system availability checks.
         target_systems = os.environ.get(UENV_TARGET_SYSTEMS_ENVVAR)
         if target_systems:
+            systems = [s.strip() for s in target_systems.split(',')
+                       if s.strip()]
+            # The queries are independent, run them concurrently; results
+            # are merged in the order of the systems to keep it stable
+            workers = min(len(systems), _UENV_INVENTORY_MAX_WORKERS) or 1
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                inventories = list(pool.map(_find_uenv_images, systems))
+
             records: list[dict] = []
             seen: set[str] = set()
-            for sys in [s.strip() for s in target_systems.split(',') if s.strip()]:
-                cmd = f"{_UENV_CLI} image find --json @{sys}"
-                output = osext.run_command(cmd, shell=True).stdout
-                try:
-                    inv = json.loads(output)
-                except json.JSONDecodeError as err:
-                    raise ConfigError(
-                        f"Cannot parse JSON from '{cmd}': {err}"
-                    )
+            for inv in inventories:
                 recs = inv.get('records') if isinstance(inv, dict) else None
                 if isinstance(recs, list):
                     for r in recs:
@@ -162,18 +253,7 @@ def _load_uenv_image_inventory(path: str | None = None) -> list[dict]:
                         records.append(r)
             inventory = {'records': records}
         else:
-            cluster_name = os.environ.get('CLUSTER_NAME')
-            if cluster_name:
-                cmd = f"{_UENV_CLI} image find --json @{cluster_name}"
-            else:
-                cmd = f"{_UENV_CLI} image find --json"
-            output = osext.run_command(cmd, shell=True).stdout
-            try:
-                inventory = json.loads(output)
-            except json.JSONDecodeError as err:
-                raise ConfigError(
-                    f"Cannot parse JSON from '{cmd}': {err}"
-                )
+            inventory = _find_uenv_images(os.environ.get('CLUSTER_NAME'))
 
     if not isinstance(inventory, dict):
         raise ConfigError(
@@ -189,10 +269,32 @@ def _load_uenv_image_inventory(path: str | None = None) -> list[dict]:
     return [r for r in records if isinstance(r, dict)]
 
 
+def _index_inventory_records(
+    inventory_records: list[dict],
+) -> dict[tuple, set[str]]:
+    # Map (name, version, uarch) to the systems providing the image. The
+    # (name, version, None) entry collects the systems of all uarchs, for
+    # recipes that are not uarch specific.
+    index: dict[tuple, set[str]] = {}
+    for record in inventory_records:
+        system = record.get('system')
+        if not isinstance(system, str) or not system:
+            continue
+
+        name = record.get('name')
+        version = record.get('version')
+        index.setdefault((name, version, None), set()).add(system)
+        uarch = record.get('uarch')
+        if uarch is not None:
+            index.setdefault((name, version, uarch), set()).add(system)
+
+    return index
+
+
 def _recipe_target_systems(
     recipe_root: pathlib.Path,
     recipe_dir_path: pathlib.Path,
-    inventory_records: list[dict],
+    inventory_index: dict[tuple, set[str]],
 ) -> list[str]:
     relative_recipe_path = recipe_root.relative_to(recipe_dir_path).as_posix()
     parts = relative_recipe_path.split('/')
@@ -204,20 +306,70 @@ def _recipe_target_systems(
     recipe_version = parts[1]
     recipe_uarch = parts[2] if len(parts) > 2 else None
 
-    systems: set[str] = set()
-    for record in inventory_records:
-        if record.get('name') != recipe_name:
-            continue
-        if recipe_version and record.get('version') != recipe_version:
+    systems = inventory_index.get(
+        (recipe_name, recipe_version, recipe_uarch), set()
+    )
+    return sorted(systems)
+
+
+def _find_recipe_metadata(recipe_dir_path: pathlib.Path) -> list[pathlib.Path]:
+    # Equivalent to rglob('extra/reframe.yaml') but based on os.walk, which
+    # avoids the per-path pattern matching of pathlib; hidden directories
+    # (e.g. .git) are skipped
+    found = []
+    for dirpath, dirnames, filenames in os.walk(recipe_dir_path):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        if (os.path.basename(dirpath) == _RFM_META.parent.name and
+            _RFM_META.name in filenames):
+            found.append(pathlib.Path(dirpath) / _RFM_META.name)
+
+    return sorted(found)
+
+
+def _load_recipe_metadata(
+    recipe_metadata: list[pathlib.Path],
+) -> dict[pathlib.Path, object]:
+    # Parse the reframe.yaml of the recipes, reusing the results cached on
+    # disk for files whose mtime and size did not change. Files that cannot
+    # be read are reported and left out.
+    cache_file = _uenv_cache_dir() / 'recipes.json'
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, json.JSONDecodeError):
+        cache = {}
+
+    parsed = {}
+    updated = {}
+    for rfm_meta in recipe_metadata:
+        key = str(rfm_meta)
+        signature = _file_signature(rfm_meta)
+        entry = cache.get(key)
+        if (signature is not None and isinstance(entry, dict) and
+            entry.get('signature') == signature):
+            parsed[rfm_meta] = entry.get('data')
+            updated[key] = entry
             continue
-        if recipe_uarch and record.get('uarch') != recipe_uarch:
+
+        try:
+            with open(rfm_meta, encoding='utf-8') as image_envs:
+                data = yaml.load(image_envs.read(), Loader=_YAML_LOADER)
+        except OSError as err:
+            print(
+                f'Skipping local uenv recipe `{rfm_meta}`, there was an error '
+                f'reading the metadata: {err}'
+            )
             continue
 
-        system = record.get('system')
-        if isinstance(system, str) and system:
-            systems.add(system)
+        parsed[rfm_meta] = data
+        updated[key] = {'signature': signature, 'data': data}
 
-    return sorted(systems)
+    if updated != cache:
+        _write_json_atomic(cache_file, updated)
+
+    return parsed
 
 
 def _load_uenvs_from_recipes(recipe_dir: str) -> list[dict]:
@@ -230,29 +382,22 @@ def _load_uenvs_from_recipes(recipe_dir: str) -> list[dict]:
 
     inventory_path = os.environ.get(UENV_IMAGE_INVENTORY_ENVVAR)
     inventory_records = _load_uenv_image_inventory(inventory_path)
+    inventory_index = _index_inventory_records(inventory_records)
+    recipe_metadata = _load_recipe_metadata(
+        _find_recipe_metadata(recipe_dir_path)
+    )
     uenv_environments = []
 
-    for rfm_meta in recipe_dir_path.rglob('extra/reframe.yaml'):
+    for rfm_meta, image_environments in recipe_metadata.items():
         recipe_root = rfm_meta.parent.parent
         uenv_name = recipe_root.relative_to(recipe_dir_path).as_posix()
         uenv_name_pretty = uenv_name.replace('/', '_').replace(':', '_')
 
-        try:
-            with open(rfm_meta, encoding='utf-8') as image_envs:
-                image_environments = yaml.load(
-                    image_envs.read(), Loader=yaml.BaseLoader)
-        except OSError as err:
-            print(
-                f'Skipping local uenv recipe `{rfm_meta}`, there was an error '
-                f'reading the metadata: {err}'
-            )
-            continue
-
         if not isinstance(image_environments, dict):
             continue
 
         target_systems = _recipe_target_systems(
-            recipe_root, recipe_dir_path, inventory_records
+            recipe_root, recipe_dir_path, inventory_index
         )
         if not target_systems:
             continue
@@ -299,6 +444,80 @@ def _load_uenvs_from_recipes(recipe_dir: str) -> list[dict]:
 
     return uenv_environments
 
+def _uenv_memo_file(uenv: str) -> pathlib.Path:
+    digest = hashlib.sha256(uenv.encode()).hexdigest()
+    return _uenv_cache_dir() / 'environments' / f'{digest}.json'
+
+
+def _file_signature(path: pathlib.Path) -> Optional[List[int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _memoize_uenv(uenv: str, image_path: pathlib.Path,
+                  rfm_meta: pathlib.Path, from_label: bool,
+                  environments: List[dict]) -> None:
+    # Store the environments built for an entry of CSCS_RFM_UENV, keyed by
+    # the entry and validated by the signature of the squashfs image and of
+    # its metadata file
+    _write_json_atomic(_uenv_memo_file(uenv), {
+        'uenv': uenv,
+        'image': str(image_path),
+        'image_signature': _file_signature(pathlib.Path(image_path)),
+        'meta': str(rfm_meta),
+        'meta_signature': _file_signature(pathlib.Path(rfm_meta)),
+        'from_label': from_label,
+        'created': time.time(),
+        'environments': environments
+    })
+
+
+def _load_memoized_uenv(uenv: str) -> Optional[List[dict]]:
+    # Return the memoized environments of an entry of CSCS_RFM_UENV, or None
+    # if there is no valid entry. An entry is valid if the squashfs image and
+    # its metadata are unchanged. Entries of uenv labels (as opposed to
+    # squashfs paths) also expire after CSCS_RFM_UENV_INVENTORY_TTL, since a
+    # label may resolve to a newly pulled image.
+    try:
+        with open(_uenv_memo_file(uenv), encoding='utf-8') as f:
+            memo = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    try:
+        if memo['uenv'] != uenv:
+            return None
+
+        if memo['from_label']:
+            ttl = _uenv_inventory_ttl()
+            if ttl <= 0 or time.time() - memo['created'] >= ttl:
+                return None
+
+        image_signature = _file_signature(pathlib.Path(memo['image']))
+        if image_signature is None or image_signature != memo['image_signature']:
+            return None
+
+        meta_signature = _file_signature(pathlib.Path(memo['meta']))
+        if meta_signature != memo['meta_signature']:
+            return None
+
+        environments = memo['environments']
+    except (KeyError, TypeError):
+        return None
+
+    for env in environments:
+        # JSON turns the (version, tag) tuple into a list
+        version = env.get('extras', {}).get('version')
+        if isinstance(version, list):
+            env['extras']['version'] = tuple(version)
+
+    return environments
+
+
 def _get_uenvs() -> Optional[List]:
     recipes_dir = os.environ.get(UENV_RECIPES_ENVVAR, None)
     if recipes_dir:
@@ -310,11 +529,16 @@ def _get_uenvs() -> Optional[List]:
 
     uenv_environments = []
     uenv_list = uenv.split(_UENV_DELIMITER)
-    uenv_version = osext.run_command(
-        f'{_UENV_CLI} --version', shell=True
-    ).stdout.strip()
+
+    # Only queried if an image has to be inspected
+    uenv_version = None
 
     for uenv in uenv_list:
+        memoized = _load_memoized_uenv(uenv)
+        if memoized is not None:
+            uenv_environments += memoized
+            continue
+
         uenv_identifier, *uenv_mountpoint = uenv.split(_UENV_MOUNT_DELIMITER)
         uenv_identifier = uenv_identifier.replace(_UENV_RFM_SYSTEM_DELIMITER, _UENV_CLI_SYSTEM_DELIMITER)
         uenv_name, uenv_path = _parse_uenv_identifier(uenv_identifier)
@@ -354,6 +578,11 @@ def _get_uenvs() -> Optional[List]:
             except FileNotFoundError:
                 raise ConfigError(f"{uenv_name} was not found")
 
+            if uenv_version is None:
+                uenv_version = osext.run_command(
+                    f'{_UENV_CLI} --version', shell=True
+                ).stdout.strip()
+
             # FIXME temporary workaround for older uenv versions
             if Version(uenv_version) >= Version('5.1.0-dev'):
                 meta_path = osext.run_command(
@@ -366,13 +595,14 @@ def _get_uenvs() -> Optional[List]:
         try:
             with open(rfm_meta) as image_envs:
                 image_environments = yaml.load(
-                    image_envs.read(), Loader=yaml.BaseLoader)
+                    image_envs.read(), Loader=_YAML_LOADER)
         except OSError as err:
             print(f'Skipping uenv `{uenv}`, there was an error '
                   f'reading the metadata: {err}')
 
             continue
 
+        image_uenv_environments = []
         for k, v in image_environments.items():
             # strip out the fields that are not to be part reframe environment
             activation = v.pop('activation', [])
@@ -421,9 +651,24 @@ def _get_uenvs() -> Optional[List]:
             if env['name'].startswith('prgenv'):
                 env['features'] += ['prgenv']
 
-            uenv_environments.append(env)
+            image_uenv_environments.append(env)
+
+        _memoize_uenv(uenv, image_path, rfm_meta, uenv_path is None,
+                      image_uenv_environments)
+        uenv_environments += image_uenv_environments
 
     return uenv_environments
 
 
-UENV = _get_uenvs() or None
+@functools.lru_cache(maxsize=None)
+def _uenv_environments() -> Optional[List]:
+    return _get_uenvs() or None
+
+
+def __getattr__(name):
+    # `UENV` is resolved on first access instead of at import time, so that
+    # importing this module (e.g. for `uarch`) does not call the uenv CLI
+    if name == 'UENV':
+        return _uenv_environments()
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from .models import CommandResult
+
+
+class DescribeCache:
+    """
+    Content-addressed on-disk cache for `reframe --describe` results.
+
+    Entries are keyed by a SHA-256 digest of everything that can change the
+    describe output: the exact command, the ReFrame related environment
+    (`CSCS_RFM_*` and `RFM_*` variables), the content of the check and
+    configuration files referenced by the command and of the uenv inventory
+    and recipes pointed to by the environment.
+
+    The cache is bounded in size; when the total size exceeds `max_bytes` the
+    least recently used entries are evicted.
+    """
+
+    ENV_PREFIXES = ("CSCS_RFM_", "RFM_")
+    PATH_FLAGS = ("-c", "--checkpath", "-C", "--config-file")
+    PATH_ENV_VARS = ("CSCS_RFM_UENV_IMAGE_INVENTORY", "CSCS_RFM_UENV_RECIPES_DIR")
+    FILE_SUFFIXES = (".py", ".json", ".yaml", ".yml", ".j2")
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (Path): Directory where cache entries are stored.
+            max_bytes (int): Maximum total size of the cache entries in bytes.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def default_dir() -> Path:
+        """Returns the default cache directory (honours $XDG_CACHE_HOME)."""
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        return Path(base) / "reframe_reporter"
+
+    def key(self, cmd: List[str], env: Dict[str, str]) -> str:
+        """
+        Computes the cache key of a ReFrame command.
+
+        Args:
+            cmd (List[str]): The ReFrame command.
+            env (Dict[str, str]): The environment the command runs with.
+
+        Returns:
+            str: The hexadecimal digest identifying the command inputs.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(cmd).encode())
+
+        rfm_env = sorted(
+            (k, v) for k, v in env.items() if k.startswith(self.ENV_PREFIXES)
+        )
+        digest.update(json.dumps(rfm_env).encode())
+
+        reframe_bin = shutil.which(cmd[0], path=env.get("PATH")) if cmd else None
+        if reframe_bin:
+            digest.update(reframe_bin.encode())
+            digest.update(str(os.stat(reframe_bin).st_mtime_ns).encode())
+
+        paths = list(self._cmd_paths(cmd))
+        paths.extend(env[var] for var in self.PATH_ENV_VARS if env.get(var))
+        for path in paths:
+            self._hash_path(digest, Path(path))
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CommandResult]:
+        """
+        Looks up a cached result and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[CommandResult]: The cached result or None on a cache miss.
+        """
+        entry = self._entry_path(key)
+        try:
+            with open(entry, encoding="utf-8") as f:
+                payload = json.load(f)
+            os.utime(entry)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        return CommandResult(
+            returncode=payload["returncode"],
+            stdout=payload["stdout"],
+            stderr=payload["stderr"],
+            cmd=payload["cmd"],
+        )
+
+    def put(self, key: str, result: CommandResult) -> None:
+        """
+        Stores a result in the cache and evicts old entries if needed.
+
+        Args:
+            key (str): The cache key.
+            result (CommandResult): The result to store.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        payload = {
+            "returncode": result.returncode,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "cmd": result.cmd,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _evict(self) -> None:
+        """Removes the least recently used entries until the cache fits `max_bytes`."""
+        entries = []
+        for entry in self.cache_dir.glob("*.json"):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def _cmd_paths(self, cmd: List[str]) -> Iterable[str]:
+        """Yields the check and configuration paths passed to ReFrame."""
+        for i, arg in enumerate(cmd):
+            if arg in self.PATH_FLAGS and i + 1 < len(cmd):
+                yield cmd[i + 1]
+            else:
+                for flag in self.PATH_FLAGS:
+                    if flag.startswith("--") and arg.startswith(f"{flag}="):
+                        yield arg.split("=", 1)[1]
+
+    def _hash_path(self, digest, path: Path) -> None:
+        """Feeds the content of a file, or of the relevant files below a directory, into `digest`."""
+        if path.is_file():
+            # A configuration file usually imports its siblings (e.g. config/systems/*.py)
+            files = [path]
+            if path.suffix == ".py":
+                files = sorted(self._iter_files(path.parent))
+        elif path.is_dir():
+            files = sorted(self._iter_files(path))
+        else:
+            digest.update(f"missing:{path}".encode())
+            return
+
+        for file in files:
+            digest.update(str(file).encode())
+            try:
+                with open(file, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+            except OSError:
+                digest.update(b"unreadable")
+
+    def _iter_files(self, root: Path) -> Iterable[Path]:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "__pycache__"]
+            for name in filenames:
+                if name.endswith(self.FILE_SUFFIXES):
+                    yield Path(dirpath) / name
@@ -17,10 +17,16 @@ def parse_args() -> Tuple[ReFrameReporterConfig, argparse.Namespace]:
     parser.add_argument("--uenv-image-inventory", type=str, help="Path to UHM image inventory JSON")
     parser.add_argument("--matrix-mode", type=str, help="Comma-separated matrix entries: label:system:mode,label2:system2:mode")
     parser.add_argument("--matrix-tag", type=str, help="Comma-separated matrix entries: label:system:tag,label2:system2:tag2")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of matrix targets to run concurrently (default: 1)")
+    parser.add_argument("--no-cache", action="store_true", help="Always run 'reframe --describe' instead of reusing cached results")
+    parser.add_argument("--cache-dir", type=str, help="Directory of the describe cache (default: ~/.cache/reframe_reporter)")
+    parser.add_argument("--cache-max-mb", type=int, default=256, help="Maximum size of the describe cache in MiB (default: 256)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose mode")
     parser.add_argument("extra", nargs=argparse.REMAINDER, help="Extra args passed to ReFrame after '--'")
 
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be a positive integer")
 
     # Build config from parsed arguments
     config = ReFrameReporterConfig(
@@ -28,7 +34,11 @@ def parse_args() -> Tuple[ReFrameReporterConfig, argparse.Namespace]:
         recursive=args.recursive,
         uenv_recipes_dir=Path(args.uenv_recipes_dir) if args.uenv_recipes_dir else None,
         uenv_image_inventory=Path(args.uenv_image_inventory) if args.uenv_image_inventory else None,
-        output_dir=Path(args.output_dir) if args.output_dir else Path.cwd()
+        output_dir=Path(args.output_dir) if args.output_dir else Path.cwd(),
+        jobs=args.jobs,
+        use_cache=not args.no_cache,
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+        cache_max_mb=args.cache_max_mb
     )
 
     # Handle filename: None means not provided, so use default
@@ -1,12 +1,19 @@
 import json
+import re
 import subprocess
 import os
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Union
 from .models import CommandResult
 
 class ReFrameReporterExecutor:
     """Handles the execution of ReFrame CLI commands and parsing of their output."""
 
+    _decoder = json.JSONDecoder()
+
+    # An array of test objects starts with '[' followed by '{' (or ']' if empty)
+    _ARRAY_START = re.compile(r'\[\s*[{\]]')
+
     def run(self, cmd: list[str], env: Optional[dict[str, str]] = None) -> CommandResult:
         """
         Execute the ReFrame CLI command as a subprocess.
@@ -46,8 +53,11 @@ class ReFrameReporterExecutor:
         """
         Parse ReFrame --describe JSON output into a standardized list of test dictionaries.
 
-        This method attempts to isolate the JSON array from any noise in the stdout 
-        by iteratively searching for matching brackets.
+        This method isolates the JSON array from any noise in the stdout in a single
+        pass: only a '[' followed by '{' or ']' can start the describe array, and each
+        candidate is decoded with `json.JSONDecoder.raw_decode`, which stops at the end
+        of the array. Noise before or after it (including '[' and ']' in log lines) is
+        thus skipped without re-parsing the rest of the output.
 
         Args:
             text (str): The raw stdout string containing the JSON output.
@@ -62,24 +72,11 @@ class ReFrameReporterExecutor:
             return []
 
         try:
-            # Isolate the JSON array by finding the outermost brackets to handle noise.
-            # Noise may contain '[' so we iteratively try parsing to find the actual JSON.
-            raw_items = None
-            start_idx = text.find('[')
-            end_idx = text.rfind(']') + 1
-            
-            while start_idx != -1 and end_idx > start_idx:
-                json_str = text[start_idx:end_idx]
-                try:
-                    raw_items = json.loads(json_str)
-                    break
-                except json.JSONDecodeError:
-                    start_idx = text.find('[', start_idx + 1)
-            
+            raw_items = self._find_json_array(text)
             if raw_items is None:
                 # Fallback to parsing the whole text if no bracket substring worked
                 raw_items = json.loads(text)
-            
+
             items = []
             for item in raw_items:
                 # Standardize the keys to a strict, internal schema. 
@@ -96,3 +93,41 @@ class ReFrameReporterExecutor:
         except json.JSONDecodeError as e:
             raise ValueError(f"Failed to parse ReFrame JSON output: {str(e)}\nOutput was truncated: {text[:500]}...")
 
+    def parse_json_file(self, path: Union[str, Path]) -> list[dict]:
+        """
+        Parse a file holding ReFrame --describe output (e.g. `reframe --describe > tests.json`).
+
+        Args:
+            path (Union[str, Path]): Path to the file with the describe output.
+
+        Returns:
+            list[dict]: A list of parsed tests, see `parse_json`.
+        """
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return self.parse_json(f.read())
+
+    def _find_json_array(self, text: str) -> Optional[list]:
+        """
+        Returns the first JSON array of test objects embedded in `text`.
+
+        An empty array is only returned if no non-empty array of objects is found,
+        so that log noise such as `[]` cannot shadow the actual describe output.
+        """
+        empty = None
+        match = self._ARRAY_START.search(text)
+        while match:
+            idx = match.start()
+            try:
+                value, end = self._decoder.raw_decode(text, idx)
+            except json.JSONDecodeError:
+                match = self._ARRAY_START.search(text, idx + 1)
+                continue
+
+            if value:
+                return value
+
+            if empty is None:
+                empty = value
+            match = self._ARRAY_START.search(text, end)
+
+        return empty
@@ -19,6 +19,10 @@ class ReFrameReporterConfig:
         system (str): Target system name.
         mode (Optional[str]): Execution mode (e.g., production, maintenance).
         tag (Optional[str]): ReFrame tag to filter checks.
+        jobs (int): Maximum number of matrix targets executed concurrently. Defaults to 1.
+        use_cache (bool): Whether to reuse cached `reframe --describe` results. Defaults to True.
+        cache_dir (Optional[Path]): Directory of the describe cache. Defaults to ~/.cache/reframe_reporter.
+        cache_max_mb (int): Maximum size of the describe cache in MiB. Defaults to 256.
     """
     config_files: list[Path] = field(default_factory=list)
     check_paths: list[Path] = field(default_factory=list)
@@ -32,6 +36,10 @@ class ReFrameReporterConfig:
     system: str = ""
     mode: Optional[str] = None
     tag: Optional[str] = None
+    jobs: int = 1
+    use_cache: bool = True
+    cache_dir: Optional[Path] = None
+    cache_max_mb: int = 256
 
 @dataclass
 class CommandResult:
@@ -1,11 +1,14 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from .models import ReFrameReporterConfig
 from .builder import CommandBuilder
+from .cache import DescribeCache
 from .executor import ReFrameReporterExecutor
 from .renderers import MatrixModeRenderer
+from .utils import StringUtils
 
 class ReportOrchestrator:
     def __init__(self, config: ReFrameReporterConfig, explicit_filename: bool = False):
@@ -22,6 +25,12 @@ class ReportOrchestrator:
         self.config = config
         self.builder = CommandBuilder(config)
         self.executor = ReFrameReporterExecutor()
+        self.cache = None
+        if config.use_cache:
+            self.cache = DescribeCache(
+                config.cache_dir or DescribeCache.default_dir(),
+                max_bytes=config.cache_max_mb * 1024 * 1024
+            )
         self.matrix_renderer = MatrixModeRenderer()
         self.explicit_filename = explicit_filename
 
@@ -72,16 +81,10 @@ class ReportOrchestrator:
         Returns:
             Path: The path to the generated matrix report file.
         """
-        all_results = []
-        processed_targets_ordered = []
-        any_failures = False
-
+        jobs = []
         for target in targets:
             clean_target = target.strip()
-            parts = clean_target.split(':')
-            label = parts[0] if len(parts) > 0 and parts[0] else clean_target
-            exec_system = parts[1] if len(parts) > 1 and parts[1] else ""
-            exec_mode = parts[2] if len(parts) > 2 and parts[2] else ""
+            label, exec_system, exec_mode = self._split_target(clean_target)
 
             cmd = self.builder.build_reframe_cmd(exec_system, exec_mode, "", extra_args)
             env = self._prepare_env(exec_system)
@@ -91,23 +94,9 @@ class ReportOrchestrator:
                 f"Executing Matrix Target: {exec_system} (Label entry: {label}, Mode: {exec_mode})"
             )
             print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] [INFO] Executing Matrix Mode Command: {' '.join(cmd)}")
+            jobs.append((clean_target, cmd, env))
 
-            result = self._run_and_save_raw(cmd, env)
-
-            if result.returncode == 0:
-                try:
-                    data = self.executor.parse_json(result.stdout)
-                    for item in data:
-                        item["target"] = clean_target 
-                        all_results.append(item)
-                    if clean_target not in processed_targets_ordered:
-                        processed_targets_ordered.append(clean_target)
-                except ValueError as e:
-                    print(f"ERROR: {e}")
-                    any_failures = True
-            else:
-                self._report_failure(f"Matrix Target ({clean_target})", cmd, result)
-                any_failures = True
+        all_results, processed_targets_ordered, any_failures = self._execute_targets(jobs, "Matrix Target")
 
         filename = self.builder.build_output_filename("matrix", explicit_filename=self.explicit_filename)
         target_dir = self._get_target_dir()
@@ -133,16 +122,10 @@ class ReportOrchestrator:
         Returns:
             Path: The path to the generated matrix report file.
         """
-        all_results = []
-        processed_targets_ordered = []
-        any_failures = False
-
+        jobs = []
         for target in targets:
             clean_target = target.strip()
-            parts = clean_target.split(':')
-            label = parts[0] if len(parts) > 0 and parts[0] else clean_target
-            exec_system = parts[1] if len(parts) > 1 and parts[1] else ""
-            exec_tag = parts[2] if len(parts) > 2 and parts[2] else ""
+            label, exec_system, exec_tag = self._split_target(clean_target)
 
             cmd = self.builder.build_tag_reframe_cmd(exec_tag, extra_args, exec_system)
             env = self._prepare_env(exec_system)
@@ -152,23 +135,9 @@ class ReportOrchestrator:
                 f"Executing Matrix Tag Target: {exec_system} (Label: {label}, Tag: {exec_tag})"
             )
             print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] [INFO] Command: {' '.join(cmd)}")
+            jobs.append((clean_target, cmd, env))
 
-            result = self._run_and_save_raw(cmd, env)
-
-            if result.returncode == 0:
-                try:
-                    data = self.executor.parse_json(result.stdout)
-                    for item in data:
-                        item["target"] = clean_target
-                        all_results.append(item)
-                    if clean_target not in processed_targets_ordered:
-                        processed_targets_ordered.append(clean_target)
-                except ValueError as e:
-                    print(f"ERROR: {e}")
-                    any_failures = True
-            else:
-                self._report_failure(f"Matrix Tag Target ({clean_target})", cmd, result)
-                any_failures = True
+        all_results, processed_targets_ordered, any_failures = self._execute_targets(jobs, "Matrix Tag Target")
 
         filename = self.builder.build_output_filename("tag_matrix", explicit_filename=self.explicit_filename)
         target_dir = self._get_target_dir()
@@ -195,25 +164,116 @@ class ReportOrchestrator:
             print(f"\n--- STDERR --- \n{result.stderr}")
         print(f"{'!'*49}\n")
 
-    def _run_and_save_raw(self, cmd: List[str], env: Dict[str, str]) -> Any:
-        """Executes the command and preserves raw stdout/stderr to a file."""
-        result = self.executor.run(cmd, env=env)
+    def _split_target(self, target: str) -> Tuple[str, str, str]:
+        """Splits a 'label:system:mode/tag' target into its three components."""
+        parts = target.split(':')
+        label = parts[0] if len(parts) > 0 and parts[0] else target
+        exec_system = parts[1] if len(parts) > 1 and parts[1] else ""
+        selector = parts[2] if len(parts) > 2 and parts[2] else ""
+        return label, exec_system, selector
+
+    def _execute_targets(self, jobs: List[Tuple[str, List[str], Dict[str, str]]],
+                         context_label: str) -> Tuple[List[Dict[str, Any]], List[str], bool]:
+        """
+        Runs the ReFrame command of every target and merges the parsed results.
+
+        Up to ``config.jobs`` commands run concurrently. Results are always merged
+        in the order of ``jobs`` so the rendered matrix does not depend on which
+        subprocess finishes first.
+
+        Args:
+            jobs (List[Tuple[str, List[str], Dict[str, str]]]): (target, command, environment) triples.
+            context_label (str): Prefix used when reporting a failed target.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[str], bool]: The merged test entries, the
+                successfully processed targets in order and whether any target failed.
+        """
+        max_workers = max(1, min(self.config.jobs, len(jobs) or 1))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(self._run_and_save_raw, cmd, env, target)
+                for target, cmd, env in jobs
+            ]
+            results = [future.result() for future in futures]
+
+        all_results = []
+        processed_targets_ordered = []
+        any_failures = False
+        for (target, cmd, _), result in zip(jobs, results):
+            if result.returncode == 0:
+                try:
+                    data = self.executor.parse_json(result.stdout)
+                    for item in data:
+                        item["target"] = target
+                        all_results.append(item)
+                    if target not in processed_targets_ordered:
+                        processed_targets_ordered.append(target)
+                except ValueError as e:
+                    print(f"ERROR: {e}")
+                    any_failures = True
+            else:
+                self._report_failure(f"{context_label} ({target})", cmd, result)
+                any_failures = True
+
+        return all_results, processed_targets_ordered, any_failures
+
+    def _run_and_save_raw(self, cmd: List[str], env: Dict[str, str], target: str = "") -> Any:
+        """
+        Executes the command and preserves raw stdout/stderr to a per-target file.
+
+        The file is named ``reframe_raw_<target>.reframe.out`` so that concurrent
+        targets do not overwrite each other's output.
+        """
+        result = self._run_cached(cmd, env)
         try:
             directory = self._get_target_dir()
-            from .utils import StringUtils
-            raw_name = "reframe_raw"
+            raw_name = f"reframe_raw_{target}" if target else "reframe_raw"
             raw_filename = StringUtils.sanitize_for_filename(raw_name) + ".reframe.out"
             raw_path = directory / raw_filename
             os.makedirs(directory, exist_ok=True)
             with open(raw_path, "w") as f:
                 f.write("=== COMMAND ===\n")
                 f.write(" ".join(cmd) + "\n")
+                f.write(f"=== RETURN CODE ===\n{result.returncode}\n")
+                f.write("=== STDOUT ===\n")
+                f.write(result.stdout or "")
+                f.write("\n=== STDERR ===\n")
+                f.write(result.stderr or "")
         except (OSError, IOError) as e:
             print(f"WARNING: Failed to save raw output file due to I/O error: {e}")
         except Exception as e:
             print(f"WARNING: An unexpected error occurred while saving raw output: {e}")
         return result
 
+    def _run_cached(self, cmd: List[str], env: Dict[str, str]) -> Any:
+        """
+        Executes the command unless an identical run is found in the describe cache.
+
+        Only successful runs are stored, so failures are always retried.
+        """
+        if self.cache is None:
+            return self.executor.run(cmd, env=env)
+
+        try:
+            key = self.cache.key(cmd, env)
+        except OSError as e:
+            print(f"WARNING: Could not compute describe cache key: {e}")
+            return self.executor.run(cmd, env=env)
+
+        result = self.cache.get(key)
+        if result is not None:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] [INFO] Using cached result for: {' '.join(cmd)}")
+            return result
+
+        result = self.executor.run(cmd, env=env)
+        if result.returncode == 0:
+            try:
+                self.cache.put(key, result)
+            except OSError as e:
+                print(f"WARNING: Failed to store describe cache entry: {e}")
+        return result
+
     def _prepare_env(self, system: str) -> Dict[str, str]:
         """Prepares the environment variables."""
         env = os.environ.copy()
@@ -1,4 +1,5 @@
 import datetime
+import json
 import re
 from abc import ABC, abstractmethod
 from pathlib import Path
@@ -8,6 +9,13 @@ from urllib.parse import quote
 
 from .utils import StringUtils
 
+# Precompiled patterns shared by the renderers
+_BR_SUFFIX_RE = re.compile(r'<br>.*')
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+_PARAM_SEPARATOR_RE = re.compile(r"<br>|•")
+_PARAM_RE = re.compile(r"%.*?(?=\s%|$)")
+_PARAM_STRIP_RE = re.compile(r"\s*%.*?(?=\s%|$)")
+
 class ReportGenerator(ABC):
     """Base class for generating report files from test data.
 
@@ -50,8 +58,7 @@ class ReportGenerator(ABC):
 
     def _base_test_id(self, name: str) -> str:
         """Strip parameter part from a test name."""
-        import re
-        return re.sub(r'<br>.*', '', name).strip()
+        return _BR_SUFFIX_RE.sub('', name).strip()
 
 
     def _normalize_test_name(self, name: str) -> str:
@@ -88,17 +95,14 @@ class ReportGenerator(ABC):
         )
     
     def _group_tests_by_base(self, test_names):
-        from collections import defaultdict
-        import re
-
         grouped = defaultdict(list)
 
         for full_name in test_names:
             # remove markdown link wrapper [text](link)
-            name = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", full_name)
+            name = _MD_LINK_RE.sub(r"\1", full_name)
 
             # remove parameter part
-            name = re.split(r"<br>|•", name)[0]
+            name = _PARAM_SEPARATOR_RE.split(name)[0]
 
             # normalize spaces
             name = name.strip()
@@ -107,11 +111,17 @@ class ReportGenerator(ABC):
 
         return grouped
 
-    
-
 
 class MatrixModeRenderer(ReportGenerator):
-    """Renderer for creating a coverage matrix across multiple systems."""
+    """Renderer for creating a coverage matrix across multiple systems.
+
+    Besides the Markdown report, the renderer keeps a compact index of the
+    selected checks per target next to it (``<report>.index.json``) and writes
+    the checks added or removed per target since the previous run to
+    ``<report>.delta.json``.
+    """
+
+    INDEX_VERSION = 1
 
     def generate(self, data: List[Dict[str, Any]], path: Path, context: Dict[str, Any]) -> None:
         """Generates a Markdown coverage matrix.
@@ -135,15 +145,15 @@ class MatrixModeRenderer(ReportGenerator):
 
         target_keys = labels
 
-        grouped_tests = defaultdict(list)
-
         target_counts = {target_key: 0 for target_key in target_keys}
         raw_target_counts = {target_key: 0 for target_key in target_keys}
 
-        raw_seen = set()
-
-        existence_lookup = {}
-        unique_tests = {}
+        # Single pass over the data: every unique (display_name, file) is
+        # categorized and split into base name/parameters exactly once, and the
+        # targets selecting it are collected in `presence`.
+        presence = {}
+        sorted_groups = defaultdict(lambda: defaultdict(list))
+        params_cache = {}
 
         for test in data:
             display_name = test.get("display_name", "Unknown")
@@ -151,67 +161,20 @@ class MatrixModeRenderer(ReportGenerator):
             target = test.get("target", "")
             
             target_key = target.split(':')[0] if ':' in target else target
-        
-            key = (display_name, file_path, target_key)
-            existence_lookup[key] = True
-            
-            raw_key = (display_name, file_path, target_key)
-            if raw_key not in raw_seen:
-                raw_seen.add(raw_key)
-                if target_key in raw_target_counts:
-                    raw_target_counts[target_key] += 1
-
-            if (display_name, file_path) not in unique_tests:
-                unique_tests[(display_name, file_path)] = test
-
-        for test in unique_tests.values():
-            file_path_str = test.get("file", "")
-            group_key = "other"
-            
-            # Extract the actual system name for path logic (the part after ':')
-            target_entry = test.get("target", "")
-            exec_system = target_entry.split(':')[1] if ':' in target_entry else target_entry
-
-            rel_path = None
-            if "/checks/" in file_path_str:
-                rel_path = "checks/" + file_path_str.split("/checks/")[-1]
-            elif "checks/" in file_path_str:
-                rel_path = "checks/" + file_path_str.split("checks/")[-1]
-
-            if rel_path:
-                parts = rel_path.split("/")
-                if len(parts) >= 2 and parts[0] == "checks":
-                    folders = parts[1:-1]
-                    if folders:
-                        group_key = "/".join(folders)
-
-            grouped_tests[group_key].append(test) 
+            test_key = (display_name, file_path)
 
-        # Build grouped structure using SAME logic as single-system
-        sorted_groups = {}
+            if test_key not in presence:
+                presence[test_key] = set()
+                category = self._category(file_path)
+                base = self._base_name(test.get("display_name", ""))
+                sorted_groups[category][base].append(test)
 
-        for category, tests_list in grouped_tests.items():
-            groups = defaultdict(list)
-
-            for test in tests_list:
-                display_name = test.get("display_name", "")
-
-                # SAME base extraction
-                base = re.sub(r"\s*%.*?(?=\s%|$)", "", display_name).strip()
-                base = base.replace("CPE_", "").replace("Uenv_", "")
-
-                if not base:
-                    base = display_name
-
-                # category is already handled by the outer loop
-                groups[base].append(test)
-
-            sorted_groups[category] = groups
+            if target_key not in presence[test_key]:
+                presence[test_key].add(target_key)
+                if target_key in raw_target_counts:
+                    raw_target_counts[target_key] += 1
 
         for group in sorted(sorted_groups.keys()):
-            if group == "other" and not grouped_tests[group]:
-                continue
-
             base_groups = sorted_groups[group]
 
             content.append(f"### {group}")
@@ -247,12 +210,14 @@ class MatrixModeRenderer(ReportGenerator):
 
                 # cleaner collapsible block
                 if len(variants) > 1:
-                    all_params = []
+                    all_params = set()
                     for v in variants:
                         dn = v.get("display_name", "")
-                        all_params.extend(re.findall(r"%.*?(?=\s%|$)", dn))
+                        if dn not in params_cache:
+                            params_cache[dn] = _PARAM_RE.findall(dn)
+                        all_params.update(params_cache[dn])
 
-                    unique_params = sorted(set(all_params))
+                    unique_params = sorted(all_params)
 
                     if unique_params:
                         details = "".join(
@@ -268,14 +233,12 @@ class MatrixModeRenderer(ReportGenerator):
 
                 row_cells = [formatted_name]
 
+                selected_by = set()
+                for v in variants:
+                    selected_by |= presence[(v.get("display_name", "Unknown"), v.get("file", ""))]
+
                 for target_key in target_keys:
-                    exists = any(
-                        existence_lookup.get(
-                            (v.get("display_name", ""), v.get("file", ""), target_key),
-                            False
-                        )
-                        for v in variants
-                    )
+                    exists = target_key in selected_by
 
                     if exists:
                         target_counts[target_key] += 1
@@ -308,3 +271,101 @@ class MatrixModeRenderer(ReportGenerator):
 
         with open(path, "w", encoding="utf-8") as f:
             f.write("\n".join(content))
+
+        self._update_index(data, path, targets, timestamp, context.get("any_failures", False))
+
+    @staticmethod
+    def index_path(path: Path) -> Path:
+        """Returns the path of the index sidecar of a report."""
+        return path.with_name(f"{path.stem}.index.json")
+
+    @staticmethod
+    def delta_path(path: Path) -> Path:
+        """Returns the path of the per-target delta of a report."""
+        return path.with_name(f"{path.stem}.delta.json")
+
+    def _category(self, file_path: str) -> str:
+        """Returns the check category (folders below 'checks/') of a test file."""
+        rel_path = None
+        if "/checks/" in file_path:
+            rel_path = "checks/" + file_path.split("/checks/")[-1]
+        elif "checks/" in file_path:
+            rel_path = "checks/" + file_path.split("checks/")[-1]
+
+        if rel_path:
+            parts = rel_path.split("/")
+            if len(parts) >= 2 and parts[0] == "checks":
+                folders = parts[1:-1]
+                if folders:
+                    return "/".join(folders)
+
+        return "other"
+
+    def _base_name(self, display_name: str) -> str:
+        """Strips the parameters and the CPE_/Uenv_ prefixes from a display name."""
+        base = _PARAM_STRIP_RE.sub("", display_name).strip()
+        base = base.replace("CPE_", "").replace("Uenv_", "")
+        return base or display_name
+
+    def _update_index(self, data: List[Dict[str, Any]], path: Path, targets: List[str],
+                      timestamp: str, any_failures: bool) -> None:
+        """Updates the index sidecar of the report and writes the per-target delta.
+
+        The index maps every target to the sorted (display_name, file) pairs it
+        selects. Targets that produced no data in a run with failures keep their
+        previous entries, so a failed ReFrame invocation is not reported as
+        every check being removed.
+        """
+        index_file = self.index_path(path)
+        previous = {}
+        previous_generated = None
+        try:
+            with open(index_file, encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("version") == self.INDEX_VERSION:
+                previous = stored.get("targets", {})
+                previous_generated = stored.get("generated")
+        except (OSError, ValueError):
+            pass
+
+        current = defaultdict(set)
+        for test in data:
+            current[test.get("target", "")].add(
+                (test.get("display_name", "Unknown"), test.get("file", ""))
+            )
+
+        index = dict(previous)
+        delta = {}
+        for target in targets:
+            if not current.get(target) and any_failures:
+                continue
+
+            entries = current.get(target, set())
+            old_entries = {tuple(e) for e in previous.get(target, [])}
+            index[target] = sorted(entries)
+            if target not in previous:
+                status = "new"
+            elif entries == old_entries:
+                status = "unchanged"
+            else:
+                status = "changed"
+
+            delta[target] = {
+                "status": status,
+                "added": [list(e) for e in sorted(entries - old_entries)],
+                "removed": [list(e) for e in sorted(old_entries - entries)],
+            }
+
+        with open(index_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.INDEX_VERSION,
+                "generated": timestamp,
+                "targets": {t: [list(e) for e in entries] for t, entries in index.items()},
+            }, f, indent=1)
+
+        with open(self.delta_path(path), "w", encoding="utf-8") as f:
+            json.dump({
+                "generated": timestamp,
+                "previous": previous_generated,
+                "targets": delta,
+            }, f, indent=2)
@@ -0,0 +1,102 @@
+import os
+from unittest.mock import MagicMock
+from reframe_reporter.cache import DescribeCache
+from reframe_reporter.models import ReFrameReporterConfig, CommandResult
+from reframe_reporter.orchestrator import ReportOrchestrator
+
+
+def make_tree(tmp_path):
+    checks = tmp_path / "checks"
+    checks.mkdir()
+    (checks / "test_app.py").write_text("class A: pass\n")
+    config = tmp_path / "config"
+    config.mkdir()
+    (config / "cscs.py").write_text("site_configuration = {}\n")
+    (config / "systems.py").write_text("systems = []\n")
+    cmd = ["reframe", "--describe", "-C", str(config / "cscs.py"), "-c", str(checks)]
+    return cmd, checks, config
+
+
+def test_key_changes_with_inputs(tmp_path):
+    """Verify that the key depends on the command, the files and the CSCS_RFM_* environment."""
+    cache = DescribeCache(tmp_path / "cache")
+    cmd, checks, config = make_tree(tmp_path)
+    env = {"CSCS_RFM_UENV_TARGET_SYSTEMS": "daint", "HOME": "/a"}
+
+    key = cache.key(cmd, env)
+    assert key == cache.key(cmd, dict(env, HOME="/b"))
+    assert key != cache.key(cmd + ["--system", "eiger"], env)
+    assert key != cache.key(cmd, dict(env, CSCS_RFM_UENV_TARGET_SYSTEMS="eiger"))
+
+    (checks / "test_app.py").write_text("class B: pass\n")
+    key_checks = cache.key(cmd, env)
+    assert key_checks != key
+
+    # Sibling modules of the configuration file are part of the key too
+    (config / "systems.py").write_text("systems = [1]\n")
+    assert cache.key(cmd, env) != key_checks
+
+    inventory = tmp_path / "inventory.json"
+    inventory.write_text("[]")
+    env_inv = dict(env, CSCS_RFM_UENV_IMAGE_INVENTORY=str(inventory))
+    key_inv = cache.key(cmd, env_inv)
+    inventory.write_text('[{"name": "prgenv-gnu"}]')
+    assert cache.key(cmd, env_inv) != key_inv
+
+
+def test_get_put_roundtrip(tmp_path):
+    cache = DescribeCache(tmp_path / "cache")
+    assert cache.get("missing") is None
+
+    result = CommandResult(returncode=0, stdout="[]", stderr="warn", cmd=["reframe"])
+    cache.put("abc", result)
+    assert cache.get("abc") == result
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = DescribeCache(tmp_path / "cache", max_bytes=1200)
+    payload = "x" * 300
+    for i, key in enumerate(["k1", "k2", "k3"]):
+        cache.put(key, CommandResult(0, payload, "", ["reframe"]))
+        os.utime(cache._entry_path(key), (i, i))
+
+    # Using k1 makes k2 the least recently used entry
+    assert cache.get("k1") is not None
+    cache.put("k4", CommandResult(0, payload, "", ["reframe"]))
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None
+    assert cache.get("k4") is not None
+
+
+def test_orchestrator_skips_execution_on_hit(tmp_path):
+    """Verify that a second identical run is served from the cache."""
+    cmd_tree, checks, config_dir = make_tree(tmp_path)
+    config = ReFrameReporterConfig(output_dir=tmp_path / "out", cache_dir=tmp_path / "cache")
+    extra_args = cmd_tree[2:]
+    stdout = '[{"display_name": "A", "@file": "/checks/test_app.py"}]'
+
+    orchestrator = ReportOrchestrator(config)
+    orchestrator.matrix_renderer.generate = MagicMock()
+    orchestrator.executor.run = MagicMock(side_effect=lambda cmd, env=None: CommandResult(0, stdout, "", cmd))
+    orchestrator.run_matrix_mode(["a:daint:production"], extra_args)
+    orchestrator.run_matrix_mode(["a:daint:production"], extra_args)
+    assert orchestrator.executor.run.call_count == 1
+    assert orchestrator.matrix_renderer.generate.call_args[0][0][0]["display_name"] == "A"
+
+    config.use_cache = False
+    uncached = ReportOrchestrator(config)
+    uncached.matrix_renderer.generate = MagicMock()
+    uncached.executor.run = MagicMock(side_effect=lambda cmd, env=None: CommandResult(0, stdout, "", cmd))
+    uncached.run_matrix_mode(["a:daint:production"], extra_args)
+    assert uncached.executor.run.call_count == 1
+
+
+def test_failures_are_not_cached(tmp_path):
+    config = ReFrameReporterConfig(output_dir=tmp_path / "out", cache_dir=tmp_path / "cache")
+    orchestrator = ReportOrchestrator(config)
+    orchestrator.matrix_renderer.generate = MagicMock()
+    orchestrator.executor.run = MagicMock(side_effect=lambda cmd, env=None: CommandResult(1, "", "boom", cmd))
+    orchestrator.run_matrix_mode(["a:daint:production"], [])
+    orchestrator.run_matrix_mode(["a:daint:production"], [])
+    assert orchestrator.executor.run.call_count == 2
@@ -16,6 +16,8 @@ def mock_config(tmp_path):
     config.uenv_recipes_dir = None
     config.uenv_image_inventory = None
     config.uenv_env = {}
+    config.jobs = 1
+    config.use_cache = False
     return config
 
 def test_cli_explicit_filename(mock_config, tmp_path, monkeypatch):
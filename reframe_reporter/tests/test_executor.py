@@ -0,0 +1,107 @@
+import json
+import time
+import pytest
+from reframe_reporter.executor import ReFrameReporterExecutor
+
+
+def synthetic_describe_output(num_tests: int, noise_lines: int) -> str:
+    """Builds a noisy `reframe --describe` output with `num_tests` tests."""
+    tests = [
+        {
+            "display_name": f"Test_{i} %param={i % 7}",
+            "hashcode": f"{i:08x}",
+            "@file": f"/repo/checks/apps/app_{i % 50}/check.py",
+            "descr": f"Synthetic test {i}",
+            "tags": ["production", "maintenance", f"group{i % 3}"],
+            "valid_systems": ["daint:normal", "eiger:normal"],
+        }
+        for i in range(num_tests)
+    ]
+    noise = [
+        f"[WARNING] could not load module [mod_{i}] from [path/{i}]: skipping []"
+        for i in range(noise_lines)
+    ]
+    half = noise_lines // 2
+    return "\n".join(noise[:half] + [json.dumps(tests, indent=2)] + noise[half:])
+
+
+@pytest.fixture
+def executor():
+    return ReFrameReporterExecutor()
+
+
+def test_parse_json_with_noise(executor):
+    text = synthetic_describe_output(5, 20)
+    items = executor.parse_json(text)
+    assert [item["display_name"] for item in items] == [f"Test_{i} %param={i % 7}" for i in range(5)]
+    assert items[0]["file"] == "/repo/checks/apps/app_0/check.py"
+    assert items[0]["description"] == "Synthetic test 0"
+
+
+def test_parse_json_empty_array(executor):
+    assert executor.parse_json("[INFO] loading checks\n[]\n[INFO] done") == []
+    assert executor.parse_json("") == []
+
+
+def test_parse_json_noise_with_nested_arrays(executor):
+    """Arrays in log lines that are not lists of tests must be skipped."""
+    text = 'noise [1, [2, 3]] and []\n[{"display_name": "A", "@file": "a.py"}]\n[done]'
+    assert [item["display_name"] for item in executor.parse_json(text)] == ["A"]
+
+
+def test_parse_json_invalid(executor):
+    with pytest.raises(ValueError):
+        executor.parse_json("[ERROR] no json here")
+
+
+def test_parse_json_file(executor, tmp_path):
+    path = tmp_path / "describe.out"
+    path.write_text(synthetic_describe_output(3, 4))
+    assert len(executor.parse_json_file(path)) == 3
+
+
+def _best_parse_time(executor, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        executor.parse_json(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class _RecordingDecoder(json.JSONDecoder):
+    """Records the spans of the text decoded by `raw_decode`."""
+
+    def __init__(self):
+        super().__init__()
+        self.spans = []
+
+    def raw_decode(self, s, idx=0):
+        value, end = super().raw_decode(s, idx)
+        self.spans.append((idx, end))
+        return value, end
+
+
+def test_parse_json_scales_linearly(executor, monkeypatch):
+    """Parsing must decode each part of the output at most once: one decode per
+    `[]` of the noise before the tests and one for the tests, with no overlap."""
+    noise_lines = 2000
+    text = synthetic_describe_output(1000, noise_lines)
+    decoder = _RecordingDecoder()
+    monkeypatch.setattr(executor, "_decoder", decoder)
+    monkeypatch.setattr(json, "loads", pytest.fail)
+
+    assert len(executor.parse_json(text)) == 1000
+    assert len(decoder.spans) == noise_lines // 2 + 1
+    for (_, prev_end), (start, _) in zip(decoder.spans, decoder.spans[1:]):
+        assert start >= prev_end
+
+
+if __name__ == "__main__":
+    # Manual benchmark: python -m reframe_reporter.tests.test_executor
+    executor = ReFrameReporterExecutor()
+    print(f"{'tests':>8} {'noise lines':>12} {'MiB':>8} {'seconds':>10}")
+    for n in (1000, 2500, 5000, 10000):
+        text = synthetic_describe_output(n, 2 * n)
+        elapsed = _best_parse_time(executor, text)
+        print(f"{n:>8} {2 * n:>12} {len(text) / 2**20:>8.1f} {elapsed:>10.4f}")
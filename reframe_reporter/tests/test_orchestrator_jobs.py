@@ -0,0 +1,76 @@
+import threading
+import time
+import json
+from unittest.mock import MagicMock
+from reframe_reporter.models import ReFrameReporterConfig, CommandResult
+from reframe_reporter.orchestrator import ReportOrchestrator
+
+TARGETS = ["a:sys1:production", "b:sys2:production", "c:sys3:maintenance"]
+
+
+def make_orchestrator(tmp_path, jobs):
+    config = ReFrameReporterConfig(output_dir=tmp_path, jobs=jobs, use_cache=False)
+    orchestrator = ReportOrchestrator(config)
+    orchestrator.matrix_renderer.generate = MagicMock()
+    return orchestrator
+
+
+def fake_run_factory(delays, active, peak):
+    """Returns a fake executor.run that sleeps per system and tracks concurrency."""
+    lock = threading.Lock()
+
+    def fake_run(cmd, env=None):
+        system = cmd[cmd.index("--system") + 1]
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(delays[system])
+        with lock:
+            active[0] -= 1
+        stdout = json.dumps([{"display_name": f"test_{system}", "@file": f"/checks/{system}.py"}])
+        return CommandResult(returncode=0, stdout=stdout, stderr="", cmd=cmd)
+
+    return fake_run
+
+
+def test_parallel_targets_merge_in_target_order(tmp_path):
+    """Verify that results are merged in target order even if later targets finish first."""
+    orchestrator = make_orchestrator(tmp_path, jobs=3)
+    active, peak = [0], [0]
+    delays = {"sys1": 0.2, "sys2": 0.1, "sys3": 0.0}
+    orchestrator.executor.run = fake_run_factory(delays, active, peak)
+
+    orchestrator.run_matrix_mode(TARGETS, [])
+
+    data, _, context = orchestrator.matrix_renderer.generate.call_args[0]
+    assert [item["target"] for item in data] == TARGETS
+    assert context["targets"] == TARGETS
+    assert peak[0] > 1
+
+
+def test_jobs_bounds_concurrency(tmp_path):
+    """Verify that no more than --jobs targets run at the same time."""
+    orchestrator = make_orchestrator(tmp_path, jobs=1)
+    active, peak = [0], [0]
+    delays = {"sys1": 0.05, "sys2": 0.05, "sys3": 0.05}
+    orchestrator.executor.run = fake_run_factory(delays, active, peak)
+
+    orchestrator.run_matrix_tag_mode(TARGETS, [])
+
+    assert peak[0] == 1
+
+
+def test_raw_output_per_target(tmp_path):
+    """Verify that every target writes its own raw output file."""
+    orchestrator = make_orchestrator(tmp_path, jobs=2)
+    orchestrator.executor.run = fake_run_factory({"sys1": 0, "sys2": 0, "sys3": 0}, [0], [0])
+
+    orchestrator.run_matrix_mode(TARGETS, [])
+
+    raw_files = sorted(p.name for p in tmp_path.glob("*.reframe.out"))
+    assert raw_files == [
+        "reframe_raw_a_sys1_production.reframe.out",
+        "reframe_raw_b_sys2_production.reframe.out",
+        "reframe_raw_c_sys3_maintenance.reframe.out",
+    ]
+    assert "test_sys2" in (tmp_path / raw_files[1]).read_text()
@@ -0,0 +1,63 @@
+import json
+from reframe_reporter.renderers import MatrixModeRenderer
+
+TARGETS = ["prod:daint:production", "maint:daint:maintenance"]
+
+
+def entry(name, target, file="/repo/checks/apps/app/check.py"):
+    return {"display_name": name, "file": file, "target": target}
+
+
+def test_matrix_groups_variants(tmp_path):
+    data = [
+        entry("CPE_Foo %a=1", TARGETS[0]),
+        entry("CPE_Foo %a=2", TARGETS[1]),
+        entry("Bar", TARGETS[0]),
+    ]
+    path = tmp_path / "report.md"
+    MatrixModeRenderer().generate(data, path, {"targets": TARGETS})
+
+    content = path.read_text()
+    assert "### apps/app" in content
+    assert "<summary>🔽 2 variants</summary><br>- %a=1<br>- %a=2</details> | ✅ | ✅ |" in content
+    assert "[Bar](../checks/apps/app/check.py) | ✅ | ❌ |" in content
+    assert "| TOTAL (raw ReFrame-selected tests) | 2 | 1 |" in content
+
+
+def test_index_and_delta(tmp_path):
+    """Verify that the delta lists the checks added and removed per target."""
+    renderer = MatrixModeRenderer()
+    path = tmp_path / "report.md"
+    renderer.generate([entry("A", TARGETS[0]), entry("B", TARGETS[0]), entry("A", TARGETS[1])],
+                      path, {"targets": TARGETS})
+
+    delta = json.loads(renderer.delta_path(path).read_text())
+    assert delta["previous"] is None
+    assert delta["targets"][TARGETS[0]]["status"] == "new"
+
+    renderer.generate([entry("A", TARGETS[0]), entry("C", TARGETS[0]), entry("A", TARGETS[1])],
+                      path, {"targets": TARGETS})
+
+    delta = json.loads(renderer.delta_path(path).read_text())
+    prod = delta["targets"][TARGETS[0]]
+    assert prod["status"] == "changed"
+    assert prod["added"] == [["C", "/repo/checks/apps/app/check.py"]]
+    assert prod["removed"] == [["B", "/repo/checks/apps/app/check.py"]]
+    assert delta["targets"][TARGETS[1]] == {"status": "unchanged", "added": [], "removed": []}
+
+    index = json.loads(renderer.index_path(path).read_text())
+    assert index["targets"][TARGETS[0]] == [
+        ["A", "/repo/checks/apps/app/check.py"],
+        ["C", "/repo/checks/apps/app/check.py"],
+    ]
+
+
+def test_failed_target_keeps_previous_index(tmp_path):
+    renderer = MatrixModeRenderer()
+    path = tmp_path / "report.md"
+    renderer.generate([entry("A", TARGETS[0])], path, {"targets": TARGETS[:1]})
+    renderer.generate([], path, {"targets": TARGETS[:1], "any_failures": True})
+
+    index = json.loads(renderer.index_path(path).read_text())
+    assert index["targets"][TARGETS[0]] == [["A", "/repo/checks/apps/app/check.py"]]
+    assert json.loads(renderer.delta_path(path).read_text())["targets"] == {}
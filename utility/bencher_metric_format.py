@@ -1,71 +1,170 @@
 # https://bencher.dev/docs/reference/bencher-metric-format/
 
+import argparse
 import json
+import os
+import statistics
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-
-def reframe_to_bmf(reframe_report):
-    path = Path(reframe_report)
-    if not path.exists():
-        sys.exit(f"Error: File '{reframe_report}' not found.")
-
-    print("Converting ReFrame report to Bencher Metric Format...", flush=True)
-    print(f"File: {reframe_report}", flush=True)
-
-    with open(reframe_report, "r", encoding="utf-8") as f:
-        data = json.load(f)
+try:
+    # Parse the reports incrementally, without loading them in memory
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _testcases(report):
+    # Other JSON files, e.g. the references or the curves of the tests, have
+    # no runs and no test cases
+    with open(report, "rb") as f:
+        if ijson is not None:
+            yield from ijson.items(f, "runs.item.testcases.item",
+                                   use_float=True)
+        else:
+            data = json.load(f)
+            runs = data.get("runs") if isinstance(data, dict) else None
+            for run in runs or []:
+                yield from run.get("testcases", [])
+
+
+def _read_report(report):
+    """Return the performance values of a report as
+    ``(key, benchmark_name, measure, value)`` tuples; benchmarks without
+    performance values have a single tuple with ``measure`` ``None``"""
+    values = []
+    for testcase in _testcases(report):
+        if testcase["result"] != "pass":
+            if testcase["fail_phase"] != "performance":
+                continue
+
+        key = (testcase["system"],
+               testcase["partition"],
+               testcase["environ"])
+        benchmark_name = testcase["display_name"]
+        if not testcase["perfvalues"]:
+            values.append((key, benchmark_name, None, None))
+
+        for k, v in (testcase["perfvalues"] or {}).items():
+            measure = k.split(':')[-1]
+            values.append((key, benchmark_name, measure, v[0]))
+
+    return values
+
+
+def _expand(reports):
+    for report in reports:
+        path = Path(report)
+        if path.is_dir():
+            # Skip the Bencher files of previous conversions
+            yield from sorted(str(p) for p in path.rglob("*.json")
+                              if not p.name.startswith("bencher="))
+        elif path.exists():
+            yield report
+        else:
+            sys.exit(f"Error: File '{report}' not found.")
+
+
+def _aggregate(values):
+    """Bencher measure of the values of the repeated runs of a benchmark"""
+    if len(values) == 1:
+        return {"value": values[0]}
+
+    return {
+        "value": statistics.median(values),
+        "lower_value": min(values),
+        "upper_value": max(values)
+    }
+
+
+def _write(bencher_file_name, bmf):
+    with open(bencher_file_name, "w") as f:
+        json.dump(bmf, f, indent=2)
+
+    return bencher_file_name
+
+
+def reframe_to_bmf(reframe_reports, output_dir=".", jobs=None):
+    if isinstance(reframe_reports, (str, os.PathLike)):
+        reframe_reports = [reframe_reports]
+
+    reports = list(_expand(reframe_reports))
+    print("Converting ReFrame reports to Bencher Metric Format...",
+          flush=True)
+    for report in reports:
+        print(f"File: {report}", flush=True)
 
     # Bencher Metric Format: format used to upload JSON files on bencher.dev
     # testcases with key (system, partition, environ) to handle multiple
-    # partitions
-    bmf_testcase = {}
-
-    for run in data["runs"]:
-        for testcase in run["testcases"]:
-            if testcase["result"] != "pass":
-                if testcase["fail_phase"] != "performance":
-                    continue
-
-            key = (testcase["system"],
-                   testcase["partition"],
-                   testcase["environ"])
-
-            if key not in bmf_testcase:
-                bmf_testcase[key] = {}
-
-            perfvalues = testcase["perfvalues"]
-            benchmark_measures = {}
-            for k, v in perfvalues.items():
-                measure = k.split(':')[-1]
-                benchmark_measures[measure] = {"value": v[0]}
-
-            benchmark_name = testcase["display_name"]
-            if benchmark_name in bmf_testcase[key]:
-                raise ValueError(
-                    f"Error: Duplicate benchmark name '{benchmark_name}' "
-                    f"found in the report for {key}."
-                )
-            bmf_testcase[key][benchmark_name] = benchmark_measures
-
-    if not bmf_testcase:
+    # partitions; the values of the repeated runs of a benchmark, in the
+    # same or different reports, are aggregated
+    samples = {}
+    if len(reports) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            report_values = list(executor.map(_read_report, reports))
+    else:
+        report_values = [_read_report(r) for r in reports]
+
+    for values in report_values:
+        for key, benchmark_name, measure, value in values:
+            measures = samples.setdefault(key, {}).setdefault(
+                benchmark_name, {})
+            if measure is not None:
+                measures.setdefault(measure, []).append(value)
+
+    if not samples:
         raise ValueError(
             "Error: No passing testcases found; "
             "cannot determine environment, partition, or system."
         )
 
-    # The bencher file name is used in CI/CD as the testbed option
-    for (system_, partition_, environ_), bmf in bmf_testcase.items():
-        bencher_file_name = f"bencher={system_}={partition_}={environ_}.json"
-        with open(bencher_file_name, "w") as f:
-            json.dump(bmf, f, indent=2)
-
-        print(f"Bencher Metric Format file created: {bencher_file_name}",
+    bmf_testcase = {}
+    num_repeated, max_samples = 0, 1
+    for key, benchmarks in samples.items():
+        bmf_testcase[key] = {}
+        for benchmark_name, measures in benchmarks.items():
+            bmf_testcase[key][benchmark_name] = {
+                measure: _aggregate(values)
+                for measure, values in measures.items()
+            }
+            num_samples = max((len(v) for v in measures.values()),
+                              default=0)
+            num_repeated += num_samples > 1
+            max_samples = max(max_samples, num_samples)
+
+    if num_repeated:
+        print(f"Aggregated the repeated runs of {num_repeated} benchmarks "
+              f"into median, min and max (up to {max_samples} samples)",
               flush=True)
 
+    # The bencher file name is used in CI/CD as the testbed option
+    os.makedirs(output_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                _write,
+                str(Path(output_dir) /
+                    f"bencher={system_}={partition_}={environ_}.json"),
+                bmf
+            )
+            for (system_, partition_, environ_), bmf in bmf_testcase.items()
+        ]
+        for future in futures:
+            print(f"Bencher Metric Format file created: {future.result()}",
+                  flush=True)
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        sys.exit(f"Usage: your_python {sys.argv[0]} <reframe_report.json>")
 
-    reframe_to_bmf(sys.argv[1])
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert ReFrame reports to Bencher Metric Format"
+    )
+    parser.add_argument("reports", nargs="+",
+                        help="ReFrame JSON reports or directories of reports")
+    parser.add_argument("-o", "--output-dir", default=".",
+                        help="Directory of the Bencher files")
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="Number of reports processed concurrently")
+    args = parser.parse_args()
+
+    reframe_to_bmf(args.reports, args.output_dir, args.jobs)
@@ -0,0 +1,238 @@
+# Copyright Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+'''Derive the performance references of the tests from their history.
+
+The performance values are read from ReFrame JSON reports, ``filelog``
+perflog files or a perf history database (see
+``config/utilities/perf_history.py``). For every test, scope and performance
+variable the reference is the median of the values and the thresholds are
+``--mad-factor`` scaled median absolute deviations, with at least
+``--min-tolerance``. The references are written to an overrides file that the
+``ReferenceOverridesMixin`` (``checks/mixins/reference_overrides.py``)
+applies when ``$CSCS_RFM_REFERENCE_OVERRIDES`` points to it.
+
+A scope is ``system:partition:environ:uarch``. The uarch of the partitions is
+given with ``--uarch 'system:partition=uarch'`` (shell-style patterns are
+accepted); the values of all the partitions of the same uarch are also
+aggregated into a ``*:*:environ:uarch`` scope.
+
+    python3 derive_references.py --report latest.json \\
+        --uarch 'daint:normal=gh200' -o references.json
+'''
+
+import argparse
+import datetime
+import fnmatch
+import glob
+import json
+import math
+import os
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent / 'config' /
+                    'utilities'))
+
+import perf_history  # noqa: E402
+
+OVERRIDES_VERSION = 1
+
+# Scale of the median absolute deviation to the standard deviation of
+# normally distributed values
+_MAD_SCALE = 1.4826
+
+
+def rows_from_report(path):
+    '''Yield the performance values of a ReFrame JSON report'''
+    with open(path, encoding='utf-8') as fp:
+        data = json.load(fp)
+
+    for run in data.get('runs', []):
+        for testcase in run.get('testcases', []):
+            if (testcase.get('result') != 'pass' and
+                testcase.get('fail_phase') != 'performance'):
+                continue
+
+            session_info = data.get('session_info', {})
+            completion_time = (testcase.get('job_completion_time_unix') or
+                               session_info.get('time_end_unix') or
+                               os.path.getmtime(path))
+            for key, perf in (testcase.get('perfvalues') or {}).items():
+                value, ref, lower, upper, unit, *result = perf
+                yield {
+                    'time': completion_time,
+                    'system': testcase['system'],
+                    'partition': testcase['partition'],
+                    'environ': testcase['environ'],
+                    'test': testcase['display_name'],
+                    'perf_var': key.split(':')[-1],
+                    'value': value, 'ref': ref,
+                    'lower_thres': lower, 'upper_thres': upper,
+                    'unit': unit,
+                    'result': result[0] if result else None
+                }
+
+
+def _expand(paths, suffix):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, '**', f'*{suffix}'),
+                                        recursive=True))
+        else:
+            yield from sorted(glob.glob(path)) or [path]
+
+
+def _uarch(uarch_map, system, partition):
+    for pattern, name in uarch_map:
+        if fnmatch.fnmatchcase(f'{system}:{partition}', pattern):
+            return name
+
+    return '*'
+
+
+def _reference(values, lower, upper, mad_factor, min_tol, max_tol):
+    median = statistics.median(values)
+    mad = statistics.median(abs(v - median) for v in values)
+    if median == 0:
+        tol = min_tol
+    else:
+        tol = mad_factor * _MAD_SCALE * mad / abs(median)
+        tol = min(max(tol, min_tol), max_tol)
+
+    tol = round(tol, 4)
+
+    # Keep the direction of the thresholds of the test: performance values
+    # bounded only from below (bandwidths, flops) stay so
+    if not lower and not upper:
+        lower = upper = True
+
+    return [median, -tol if lower else None, tol if upper else None]
+
+
+def derive(rows, uarch_map=(), mad_factor=3.0, min_tolerance=0.05,
+           max_tolerance=0.5, min_samples=5, include_failures=False):
+    '''Return the references of the tests in the overrides format'''
+    samples = {}
+    for row in rows:
+        value = row.get('value')
+        if value is None or not math.isfinite(value):
+            continue
+
+        if not include_failures and row.get('result') == 'fail':
+            continue
+
+        uarch = _uarch(uarch_map, row['system'], row['partition'])
+        scopes = [f'{row["system"]}:{row["partition"]}:'
+                  f'{row["environ"]}:{uarch}']
+        if uarch != '*':
+            scopes.append(f'*:*:{row["environ"]}:{uarch}')
+
+        for scope in scopes:
+            entry = samples.setdefault(
+                (row['test'], scope, row['perf_var']),
+                {'values': [], 'lower': False, 'upper': False, 'unit': None}
+            )
+            entry['values'].append(float(value))
+            entry['lower'] |= row.get('lower_thres') is not None
+            entry['upper'] |= row.get('upper_thres') is not None
+            entry['unit'] = row.get('unit') or entry['unit']
+
+    references = {}
+    for (test, scope, var), entry in sorted(samples.items()):
+        if len(entry['values']) < min_samples:
+            continue
+
+        value, lower, upper = _reference(
+            entry['values'], entry['lower'], entry['upper'], mad_factor,
+            min_tolerance, max_tolerance
+        )
+        references.setdefault(test, {}).setdefault(scope, {})[var] = {
+            'reference': [value, lower, upper, entry['unit']],
+            'samples': len(entry['values'])
+        }
+
+    return references
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Derive the performance references from the history of '
+                    'the performance values'
+    )
+    parser.add_argument('--report', action='append', default=[],
+                        help='ReFrame JSON report (file, directory or glob)')
+    parser.add_argument('--perflog', action='append', default=[],
+                        help='filelog perflog (file, directory or glob)')
+    parser.add_argument('--db', help='perf history database')
+    parser.add_argument('--since', type=float, default=60,
+                        help='Days of history to use from the database '
+                             '(default: 60)')
+    parser.add_argument('--uarch', action='append', default=[],
+                        metavar='SYSTEM:PARTITION=UARCH',
+                        help='uarch of the matching partitions')
+    parser.add_argument('--mad-factor', type=float, default=3.0,
+                        help='Thresholds in scaled median absolute '
+                             'deviations (default: 3)')
+    parser.add_argument('--min-tolerance', type=float, default=0.05,
+                        help='Minimum relative threshold (default: 0.05)')
+    parser.add_argument('--max-tolerance', type=float, default=0.5,
+                        help='Maximum relative threshold (default: 0.5)')
+    parser.add_argument('--min-samples', type=int, default=5,
+                        help='Minimum number of values to derive a '
+                             'reference (default: 5)')
+    parser.add_argument('--include-failures', action='store_true',
+                        help='Also use the values of failed performance '
+                             'checks')
+    parser.add_argument('-o', '--output', default='references.json',
+                        help='Overrides file to write')
+    args = parser.parse_args(argv)
+    if not (args.report or args.perflog or args.db):
+        parser.error('no --report, --perflog or --db given')
+
+    uarch_map = []
+    for spec in args.uarch:
+        pattern, sep, name = spec.rpartition('=')
+        if not sep or not pattern:
+            parser.error(f'invalid --uarch {spec!r}')
+
+        uarch_map.append((pattern, name))
+
+    def _rows():
+        for path in _expand(args.report, '.json'):
+            yield from rows_from_report(path)
+
+        for path in _expand(args.perflog, '.log'):
+            yield from perf_history.parse_filelog(path)
+
+        if args.db:
+            with perf_history.PerfHistory(args.db) as store:
+                yield from map(dict, store.values(
+                    since=time.time() - args.since * 86400
+                ))
+
+    references = derive(_rows(), uarch_map, args.mad_factor,
+                        args.min_tolerance, args.max_tolerance,
+                        args.min_samples, args.include_failures)
+    with open(args.output, 'w') as fp:
+        json.dump({
+            'version': OVERRIDES_VERSION,
+            'generated': datetime.datetime.now(
+                datetime.timezone.utc
+            ).isoformat(timespec='seconds'),
+            'references': references
+        }, fp, indent=2)
+
+    num_refs = sum(len(perf_vars) for scopes in references.values()
+                   for perf_vars in scopes.values())
+    print(f'Derived {num_refs} references of {len(references)} tests into '
+          f'{args.output}', flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())